@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+Benchmark the time and the Python memory allocations needed to paint one
+frame of the tables of the activity overview.
+
+Usage: python benchmarks/bench_delegate_paint.py [nframes]
+
+Set QT_QPA_PLATFORM=offscreen to run the benchmark without a display.
+"""
+
+# ---- Standard imports
+
+import os.path as osp
+import sys
+import json
+import tempfile
+import time
+import tracemalloc
+
+# ---- Third party imports
+
+from PySide6.QtGui import QPixmap
+from PySide6.QtWidgets import QApplication
+
+# ---- Local imports
+
+sys.path.insert(0, osp.dirname(osp.dirname(osp.abspath(__file__))))
+from qwatson.watson_ext.watsonextends import Frames, Watson
+from qwatson.models.tablemodels import WatsonTableModel
+from qwatson.widgets.tableviews import ActivityOverviewWidget
+
+
+def create_client(nframes_per_day=10):
+    """
+    Create a Watson client in a temporary directory with activities
+    logged for every day of the current week.
+    """
+    import arrow
+    appdir = tempfile.mkdtemp()
+    span = arrow.now().floor('week').span('week')
+    frames = Frames()
+    duration = 24 * 3600 // nframes_per_day
+    for i in range(7 * nframes_per_day):
+        start = span[0].timestamp + i * duration
+        frames.add('project%d' % (i % 5), start, start + duration - 60,
+                   tags=['tag%d' % (i % 3), 'CI'], message='activity #%d' % i)
+    with open(osp.join(appdir, 'frames'), 'w') as f:
+        json.dump(frames.dump(), f)
+    return Watson(config_dir=appdir)
+
+
+def paint_frame(widget, pixmap):
+    """Paint all the tables of the widget on the pixmap."""
+    widget.render(pixmap)
+
+
+def main(nframes=50):
+    app = QApplication(sys.argv)
+
+    overview = ActivityOverviewWidget(WatsonTableModel(create_client()))
+    overview.resize(1200, 800)
+    overview.show()
+    app.processEvents()
+    widget = overview.table_widg.scrollarea.widget()
+    pixmap = QPixmap(widget.size())
+
+    # Paint a first frame so that caches are filled before measuring.
+    paint_frame(widget, pixmap)
+
+    t0 = time.perf_counter()
+    for i in range(nframes):
+        paint_frame(widget, pixmap)
+    elapsed = (time.perf_counter() - t0) / nframes
+
+    # The peak of the memory traced while painting a frame measures the
+    # size of the temporary objects allocated during the paint, while
+    # the number of blocks that are still allocated after painting the
+    # frames measures the objects that are kept alive.
+    tracemalloc.start()
+    peaks = []
+    blocks = sys.getallocatedblocks()
+    for i in range(nframes):
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        paint_frame(widget, pixmap)
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    blocks = sys.getallocatedblocks() - blocks
+    tracemalloc.stop()
+
+    nrows = sum(overview.table_widg.get_row_count())
+    print("Rows painted per frame: %d" % nrows)
+    print("Time per frame: %.2f ms" % (elapsed * 1000))
+    print("Peak temporary Python memory per frame: %.1f KiB" % (
+        sum(peaks) / nframes / 1024))
+    print("Python blocks kept alive per frame: %.1f" % (blocks / nframes))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+Benchmark the time needed to load the frames of a synthetic frames file,
+from its snapshot or by parsing the frames file.
+
+Usage: python benchmarks/bench_frames_load.py [nframes]
+"""
+
+# ---- Standard imports
+
+import os.path as osp
+import sys
+import json
+import random
+import tempfile
+import time
+
+# ---- Local imports
+
+sys.path.insert(0, osp.dirname(osp.dirname(osp.abspath(__file__))))
+from qwatson.watson_ext.watsonextends import Frame, Watson
+
+
+def create_frames_file(nframes):
+    """
+    Create a frames file with nframes frames of 30 minutes, one every hour,
+    in a temporary app directory and return the path of the directory.
+    """
+    appdir = tempfile.mkdtemp()
+    rows = []
+    start = 1500000000
+    for i in range(nframes):
+        rows.append([start, start + 1800, 'project%d' % (i % 50),
+                     '%032x' % random.getrandbits(128),
+                     ['tag%d' % (i % 7), 'CI'], start + 1800,
+                     'activity #%d' % i if i % 3 else None])
+        start += 3600
+    with open(osp.join(appdir, 'frames'), 'w') as f:
+        json.dump(rows, f)
+    return appdir
+
+
+def main(nframes=100000, repeat=3):
+    appdir = create_frames_file(nframes)
+
+    def load_frames_from_snapshot():
+        return Watson(config_dir=appdir).frames
+
+    def load_frames_in_batch():
+        client = Watson(config_dir=appdir)
+        client.snapshot.clear()
+        return client.frames
+
+    def load_frames_row_by_row():
+        with open(osp.join(appdir, 'frames')) as f:
+            return [Frame(*row) for row in json.load(f)]
+
+    for name, func in [('snapshot load', load_frames_from_snapshot),
+                       ('batch load', load_frames_in_batch),
+                       ('row by row load', load_frames_row_by_row)]:
+        timings = []
+        for i in range(repeat):
+            t0 = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - t0)
+        print('%s: %0.3f sec for %d frames (best of %d)' % (
+            name, min(timings), nframes, repeat))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -21,6 +21,7 @@ from PySide6.QtWidgets import QApplication, QVBoxLayout, QPushButton
 
 from qwatson.dialogs.basedialog import BaseDialog
 from qwatson.widgets.layout import InfoBox
+from qwatson.utils.dates import total_seconds_to_hour_min
 
 
 class DelProjectDialog(BaseDialog):
@@ -58,7 +59,7 @@ class DelProjectDialog(BaseDialog):
         layout.addWidget(self.button_box)
         layout.setStretch(0, 100)
 
-    def show(self, project, na):
+    def show(self, project, na, total_seconds=None):
         """
         Extend show method to update the text of the info box with the
         provided arguments.
@@ -74,6 +75,9 @@ class DelProjectDialog(BaseDialog):
         text += 'activity is' if na <= 1 else 'activities are'
         text += (" not currently in a project" if project == '' else
                  " currently in project \"%s\"" % project)
+        if total_seconds is not None:
+            text += " for a total of %s" % total_seconds_to_hour_min(
+                total_seconds)
         text += "."
         self.info_box.setText(text)
 
@@ -97,6 +101,6 @@ if __name__ == '__main__':
     d1.show('', 24)
     d1.setFixedSize(300, 162)
     d2 = DelProjectDialog()
-    d2.show('x', 35)
+    d2.show('x', 35, 98580)
     d2.setFixedSize(300, 162)
     app.exec_()
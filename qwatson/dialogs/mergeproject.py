@@ -22,6 +22,7 @@ from PySide6.QtWidgets import QApplication, QVBoxLayout, QPushButton
 
 from qwatson.dialogs.basedialog import BaseDialog
 from qwatson.widgets.layout import InfoBox
+from qwatson.utils.dates import total_seconds_to_hour_min
 
 
 class MergeProjectDialog(BaseDialog):
@@ -59,7 +60,8 @@ class MergeProjectDialog(BaseDialog):
         layout.addWidget(self.button_box)
         layout.setStretch(0, 100)
 
-    def show(self, proj1, na1, proj2, na2):
+    def show(self, proj1, na1, proj2, na2, total_seconds1=None,
+             total_seconds2=None):
         """
         Extend show method to update the text of the info box with the
         provided arguments.
@@ -78,11 +80,15 @@ class MergeProjectDialog(BaseDialog):
         text += 'activity is' if na1 <= 1 else 'activities are'
         text += (" not currently in a project" if proj1 == '' else
                  " currently in project \"%s\"" % proj1)
+        if total_seconds1 is not None:
+            text += " (%s)" % total_seconds_to_hour_min(total_seconds1)
         text += " and "
         text += "%d " % na2
         text += 'activity is' if na2 <= 1 else 'activities are'
         text += (" not currently in a project" if proj2 == '' else
                  " currently in project \"%s\"" % proj2)
+        if total_seconds2 is not None:
+            text += " (%s)" % total_seconds_to_hour_min(total_seconds2)
         text += "."
         self.info_box.setText(text)
 
@@ -108,7 +114,7 @@ if __name__ == '__main__':
     d1.setFixedSize(300, 162)
 
     d2 = MergeProjectDialog()
-    d2.show('x', 1, 'y', 4)
+    d2.show('x', 1, 'y', 4, 3600, 15300)
     d2.setFixedSize(300, 162)
 
     d3 = MergeProjectDialog()
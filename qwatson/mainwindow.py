@@ -24,7 +24,7 @@ import arrow
 #                              QSizePolicy, QWidget, QStackedWidget, QVBoxLayout)
 # Migrate to PySide6 imports
 from PySide6.QtCore import Qt, QModelIndex
-from PySide6.QtWidgets import QApplication, QGridLayout, QLabel, QLineEdit, QSizePolicy, QWidget, QStackedWidget, QVBoxLayout
+from PySide6.QtWidgets import QApplication, QGridLayout, QLabel, QLineEdit, QMessageBox, QSizePolicy, QWidget, QStackedWidget, QVBoxLayout
 
 # ---- Local imports
 
@@ -32,14 +32,17 @@ from qwatson.utils import icons
 from qwatson.widgets.tags import TagLineEdit
 from qwatson.watson_ext.watsonextends import Watson
 from qwatson.watson_ext.watsonhelpers import (
-    round_frame_at, reset_watson, get_frame_nbr_for_project)
+    round_frame_at, reset_watson, get_frame_nbr_for_project,
+    get_duration_for_project)
 from qwatson.widgets.projects import ProjectManager
 from qwatson.widgets.clock import StopWatchWidget
 from qwatson.widgets.tableviews import ActivityOverviewWidget
 from qwatson.widgets.toolbar import (QToolButtonSmall, DropDownToolButton,
                                      ToolBarWidget)
 from qwatson import __namever__
-from qwatson.models.tablemodels import WatsonTableModel
+from qwatson.models.tablemodels import WatsonTableModel, row_ranges
+from qwatson.models.saver import WatsonSaver
+from qwatson.models.watcher import WatsonWatcher
 from qwatson.dialogs import (ImportDialog, DateTimeInputDialog, CloseDialog,
                              DelProjectDialog, MergeProjectDialog)
 from qwatson.widgets.layout import ColoredFrame
@@ -104,11 +107,12 @@ class QWatsonProjectMixin(object):
             return
 
         if force is True:
-            self.model.beginResetModel()
-            self.project_manager.model.beginResetModel()
-            self.client.rename_project(old_name, new_name)
-            self.model.endResetModel()
-            self.project_manager.model.endResetModel()
+            # All the frames must be loaded to rename the project.
+            self.model.load_frames_since(None)
+            rows = self.client.frames.rows_for_project(old_name)
+            self.project_manager.model.rename_project(old_name, new_name)
+            self.model.emit_rows_changed(
+                rows, self.model.COLUMNS['project'])
             self.project_manager.setCurrentProject(new_name)
         elif force is False:
             na_old = get_frame_nbr_for_project(self.client, old_name)
@@ -119,16 +123,16 @@ class QWatsonProjectMixin(object):
                 # the user confirmation before merging all activities
                 # of project 'old_name' with those of project 'new_name'.
                 self.merge_project_dialog.show(
-                    old_name, na_old, new_name, na_new)
+                    old_name, na_old, new_name, na_new,
+                    get_duration_for_project(self.client, old_name),
+                    get_duration_for_project(self.client, new_name))
             else:
                 self.rename_project(old_name, new_name, force=True)
 
     def add_new_project(self, project):
         """Add the new project to the database."""
-        if project not in self.client.projects:
-            self.project_manager.model.beginResetModel()
-            self.client.add_project(project)
-            self.project_manager.model.endResetModel()
+        if not self.client.has_project(project):
+            self.project_manager.model.add_project(project)
         self.project_manager.setCurrentProject(project)
 
     def del_project(self, project, force=False):
@@ -141,15 +145,26 @@ class QWatsonProjectMixin(object):
         """
         if force is False:
             self.del_project_dialog.show(
-                project, get_frame_nbr_for_project(self.client, project))
-        elif force is True and project in self.client.projects:
+                project, get_frame_nbr_for_project(self.client, project),
+                get_duration_for_project(self.client, project))
+        elif force is True and self.client.has_project(project):
             index = self.project_manager.currentProjectIndex()
-
-            self.model.beginResetModel()
-            self.project_manager.model.beginResetModel()
-            self.client.delete_project(project)
-            self.model.endResetModel()
-            self.project_manager.model.endResetModel()
+            self.model.load_frames_since(None)
+
+            # The frames of the project are deleted in a single pass. The
+            # model is only reset when the rows are not consecutive, so that
+            # the views are not notified once per range of rows.
+            rows = self.client.frames.rows_for_project(project)
+            ranges = row_ranges(rows)
+            if len(ranges) == 1:
+                self.model.beginRemoveRows(QModelIndex(), *ranges[0])
+                self.client.frames.delete_rows(rows)
+                self.model.endRemoveRows()
+            elif ranges:
+                self.model.beginResetModel()
+                self.client.frames.delete_rows(rows)
+                self.model.endResetModel()
+            self.project_manager.model.delete_project(project)
 
             index = min(index, len(self.client.projects)-1)
             self.project_manager.setCurrentProjectIndex(index)
@@ -191,6 +206,9 @@ class QWatsonImportMixin(object):
         filenames = ['frames', 'frames.bak', 'last_sync', 'state', 'state.bak']
         watson_dir = (os.environ.get('WATSON_DIR') or
                       click.get_app_dir('watson'))
+        # The journal of the current frames file must not be replayed on
+        # top of the imported frames.
+        self.client.journal.clear()
         for filename in filenames:
             if osp.exists(osp.join(watson_dir, filename)):
                 shutil.copyfile(osp.join(watson_dir, filename),
@@ -243,7 +261,7 @@ class QWatsonActivityMixin(object):
         self.client.insert(
             index, self.currentProject(), start, stop,
             tags=self.tag_manager.tags, message=self.comment_manager.text())
-        self.client.save()
+        self.client.request_save()
         self.model.endInsertRows()
 
     def del_activity_at(self, frame_index):
@@ -252,7 +270,7 @@ class QWatsonActivityMixin(object):
         """
         self.model.beginRemoveRows(QModelIndex(), frame_index, frame_index)
         del self.client.frames[frame_index]
-        self.client.save()
+        self.client.request_save()
         self.model.endRemoveRows()
 
 
@@ -279,11 +297,19 @@ class QWatson(QWidget, QWatsonImportMixin, QWatsonProjectMixin,
                       click.get_app_dir('QWatson'))
 
         self.client = Watson(config_dir=config_dir)
+        self.saver = WatsonSaver(self.client, parent=self)
+        self.saver.sig_save_error.connect(self.show_save_error)
         self.model = WatsonTableModel(self.client)
 
         self.setup_activity_overview()
         self.setup()
 
+        # The frames are reloaded when they are changed outside of QWatson.
+        self.watcher = WatsonWatcher(self.model, parent=self)
+        self.watcher.sig_frames_reloaded.connect(
+            self.project_manager.model.modelReset.emit)
+        self.watcher.sig_reload_error.connect(self.show_save_error)
+
         if self.client.is_started:
             self.add_new_project(self.client.current['project'])
             self.stop_watson(tags=['error'],
@@ -355,7 +381,7 @@ class QWatson(QWidget, QWatsonImportMixin, QWatsonProjectMixin,
         """
         project_manager = self.setup_project_manager()
 
-        self.tag_manager = TagLineEdit()
+        self.tag_manager = TagLineEdit(client=self.client)
         self.tag_manager.setPlaceholderText("Tags (comma separated)")
 
         self.comment_manager = QLineEdit()
@@ -537,9 +563,13 @@ class QWatson(QWidget, QWatsonImportMixin, QWatsonProjectMixin,
         round_frame_at(self.client, -1,
                        self.roundTo() if round_to is None else round_to)
 
-        self.client.save()
+        self.client.request_save()
         self.model.endInsertRows()
 
+    def show_save_error(self, message):
+        """Show the error raised while saving the Watson client."""
+        QMessageBox.warning(self, 'Save Error', message, QMessageBox.Ok)
+
     def closeEvent(self, event):
         """Qt method override."""
         if self.client.is_started:
@@ -547,7 +577,11 @@ class QWatson(QWidget, QWatsonImportMixin, QWatsonProjectMixin,
             event.ignore()
         else:
             self.overview_widg.close()
-            self.client.save()
+            self.watcher.close()
+            self.saver.close()
+            if self.client.config.getboolean('qwatson', 'archive', False):
+                self.client.archive_frames()
+            self.client.compact_journal()
             event.accept()
             print("QWatson is closed.\n")
 
@@ -16,8 +16,7 @@
 
 # Migrate to PySide6
 from PySide6.QtCore import QEvent, QRect, QPoint, Qt
-from PySide6.QtGui import QPalette
-from PySide6.QtWidgets import QApplication, QComboBox, QDateTimeEdit, QLineEdit, QStyle, QStyledItemDelegate, QStyleOptionToolButton, QListView
+from PySide6.QtWidgets import QComboBox, QDateTimeEdit, QLineEdit, QStyle, QStyledItemDelegate, QStyleOptionToolButton, QStyleOptionViewItem
 
 # ---- Local imports
 
@@ -31,37 +30,67 @@ class BaseDelegate(QStyledItemDelegate):
 
     def __init__(self, parent):
         super(BaseDelegate, self) .__init__(parent)
+        # The position in the row and the text alignment of the items
+        # depend only on the column, so they are cached by column.
+        self._item_positions = {}
+        self._alignments = {}
+
+    def get_item_position(self, index):
+        """Return the position of the item of index in its row."""
+        column = index.column()
+        try:
+            return self._item_positions[column]
+        except KeyError:
+            if column == 0:
+                position = QStyleOptionViewItem.ViewItemPosition.Beginning
+            elif column == index.model().columnCount() - 1:
+                position = QStyleOptionViewItem.ViewItemPosition.End
+            else:
+                position = QStyleOptionViewItem.ViewItemPosition.Middle
+            self._item_positions[column] = position
+            return position
+
+    def get_alignment(self, index):
+        """
+        Return the alignment of the text of the item of index. The day
+        header rows of the span view are aligned differently than the
+        other rows of their column, so their alignment is not cached.
+        """
+        column = index.column()
+        is_header_row = index.model().is_header_row(index.row())
+        alignment = None if is_header_row else self._alignments.get(column)
+        if alignment is None:
+            if index.data(Qt.TextAlignmentRole) & Qt.AlignLeft:
+                alignment = Qt.AlignLeft | Qt.AlignVCenter
+            else:
+                alignment = Qt.AlignCenter | Qt.AlignVCenter
+            if not is_header_row:
+                self._alignments[column] = alignment
+        return alignment
 
     def paint(self, painter, option, index):
-        widget = QListView()
-        style = widget.style()
+        # The items are drawn with the style of the parent tableview, so
+        # that no widget needs to be created only to get a style.
+        view = self.parent()
 
         # A row can be highlighted only if the parent tableview is selected.
 
-        if not self.parent().is_selected:
+        if not view.is_selected:
             option.state &= ~QStyle.State_Selected
 
         # Set the options for mouse hover highlight.
 
-        if self.parent()._hovered_row == index.row():
+        if view._hovered_row == index.row():
             option.state |= QStyle.State_MouseOver
         else:
             option.state &= ~QStyle.State_MouseOver
 
-        if index.column() == 0:
-            option.viewItemPosition = 1
-        elif index.column() == self.parent().model().columnCount()-1:
-            option.viewItemPosition = 3
-        else:
-            option.viewItemPosition = 2
+        option.viewItemPosition = self.get_item_position(index)
 
         # Set the options for the text.
 
         option.text = index.data()
-        if index.data(Qt.TextAlignmentRole) & Qt.AlignLeft:
-            option.displayAlignment = Qt.AlignLeft | Qt.AlignVCenter
-        else:
-            option.displayAlignment = Qt.AlignCenter | Qt.AlignVCenter
+        option.displayAlignment = self.get_alignment(index)
 
         # Set the options for the focus rectangle.
 
@@ -72,7 +101,8 @@ class BaseDelegate(QStyledItemDelegate):
         # the table view.
         painter.fillRect(option.rect, index.data(Qt.BackgroundRole))
 
-        style.drawControl(QStyle.CE_ItemViewItem, option, painter, widget)
+        view.style().drawControl(
+            QStyle.CE_ItemViewItem, option, painter, view)
 
 
 class TagEditDelegate(BaseDelegate):
@@ -106,6 +136,7 @@ class ToolButtonDelegate(BaseDelegate):
 
     def __init__(self, parent):
         super(ToolButtonDelegate, self).__init__(parent)
+        self._btn_option = None
 
     def createEditor(self, parent, option, index):
         """Qt method override to prevent the creation of an editor."""
@@ -114,15 +145,24 @@ class ToolButtonDelegate(BaseDelegate):
     def paint(self, painter, option, index):
         """Paint a toolbutton with an icon."""
         super(ToolButtonDelegate, self).paint(painter, option, index)
-
-        opt = QStyleOptionToolButton()
+        if index.model().is_header_row(index.row()):
+            # No button is drawn in the day header rows of the span view.
+            return
+
+        # The option of the button is the same for all the rows, except
+        # for its position, so it is created only once.
+        if self._btn_option is None:
+            self._btn_option = QStyleOptionToolButton()
+            self._btn_option.iconSize = icons.get_iconsize('small')
+            self._btn_option.state |= (
+                QStyle.State_Enabled | QStyle.State_Raised)
+            self._btn_option.icon = icons.get_icon('erase-right')
+        opt = self._btn_option
         opt.rect = self.get_btn_rect(option)
-        opt.iconSize = icons.get_iconsize('small')
-        opt.state |= QStyle.State_Enabled | QStyle.State_Raised
-        opt.icon = icons.get_icon('erase-right')
 
-        QApplication.style().drawControl(
-            QStyle.CE_ToolButtonLabel, opt, painter)
+        view = self.parent()
+        view.style().drawControl(
+            QStyle.CE_ToolButtonLabel, opt, painter, view)
 
     def get_btn_rect(self, option):
         """Calculate the size and position of the checkbox."""
@@ -135,7 +175,8 @@ class ToolButtonDelegate(BaseDelegate):
     def editorEvent(self, event, model, option, index):
         """Qt method override."""
         if (event.type() == QEvent.MouseButtonPress
-                and event.button() == Qt.LeftButton):
+                and event.button() == Qt.LeftButton
+                and not model.is_header_row(index.row())):
             model.emit_btn_delrow_clicked(index)
             return True
         else:
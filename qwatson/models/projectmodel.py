@@ -8,6 +8,8 @@
 
 # ---- Standard imports
 
+from bisect import bisect_left
+
 # ---- Third parties imports
 
 # from PyQt5.QtCore import pyqtSignal as QSignal
@@ -50,6 +52,61 @@ class WatsonProjectModel(QAbstractListModel):
             # return QVariant()         # <-- QVariant was removed in PySide6, any python object can be returned
             return None
 
+    def add_project(self, project):
+        """
+        Add the project to the database and insert it in the model at its
+        sorted position.
+        """
+        row = bisect_left(self.client.projects, project)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.client.add_project(project)
+        self.endInsertRows()
+
+    def rename_project(self, old_name, new_name):
+        """
+        Rename the project in the database and update only the rows of the
+        model that are affected.
+        """
+        old_row = bisect_left(self.client.projects, old_name)
+        if not old_name:
+            # The empty project always exists, so its row is never removed
+            # and a row is inserted only if new_name does not exist yet.
+            if self.client.has_project(new_name):
+                self.client.rename_project(old_name, new_name)
+                self.model_changed()
+            else:
+                new_row = bisect_left(self.client.projects, new_name)
+                self.beginInsertRows(QModelIndex(), new_row, new_row)
+                self.client.rename_project(old_name, new_name)
+                self.endInsertRows()
+        elif self.client.has_project(new_name):
+            # The projects are merged, so only the row of old_name
+            # is removed from the model.
+            self.beginRemoveRows(QModelIndex(), old_row, old_row)
+            self.client.rename_project(old_name, new_name)
+            self.endRemoveRows()
+        else:
+            # The number of projects does not change, only the rows between
+            # the old and new name are shifted by one.
+            self.client.rename_project(old_name, new_name)
+            new_row = bisect_left(self.client.projects, new_name)
+            self.dataChanged.emit(self.index(min(old_row, new_row)),
+                                  self.index(max(old_row, new_row)))
+
+    def delete_project(self, project):
+        """
+        Delete the project from the database and remove its row, except for
+        the empty project, whose row is never removed.
+        """
+        if not project:
+            self.client.delete_project(project)
+            self.model_changed()
+            return
+        row = bisect_left(self.client.projects, project)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.client.delete_project(project)
+        self.endRemoveRows()
+
     # ---- Utils
 
     @property
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+A write-behind saver that saves the changes made to the Watson client on
+a background thread.
+"""
+
+# ---- Third party imports
+
+from PySide6.QtCore import QObject, QThreadPool, QTimer
+from PySide6.QtCore import Signal as QSignal
+from watson.watson import WatsonError
+
+
+class WatsonSaver(QObject):
+    """
+    A saver that is attached to a Watson client to save the changes made
+    to the client in the background, so that the GUI does not wait after
+    the disk each time an activity is edited.
+
+    The saves requested in a burst, while editing activities for instance,
+    are coalesced into a single save that is done once no other save was
+    requested for SAVE_DELAY milliseconds. The data to save are collected
+    on the GUI thread and written to the disk on a background thread. The
+    errors raised while writing are reported with sig_save_error.
+    """
+    SAVE_DELAY = 500
+    sig_save_error = QSignal(str)
+
+    def __init__(self, client, parent=None):
+        super(WatsonSaver, self).__init__(parent)
+        self.client = client
+        self.client.saver = self
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.SAVE_DELAY)
+        self.timer.timeout.connect(self.save)
+
+        # A single background thread is used, so that the writes are done
+        # in the order they were queued.
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+
+    def is_pending(self):
+        """Return whether a save is scheduled or being written."""
+        return self.timer.isActive() or self.thread_pool.activeThreadCount()
+
+    def schedule(self):
+        """
+        Schedule a save of the client, which is postponed each time this
+        method is called again before the save is done.
+        """
+        self.timer.start()
+
+    def save(self):
+        """
+        Queue the writes needed to save the client and do them on the
+        background thread.
+        """
+        self.timer.stop()
+        self.client.queue_save()
+        self.thread_pool.start(self.write_pending)
+
+    def write_pending(self):
+        """Do the writes queued to save the client."""
+        try:
+            self.client.write_pending()
+        except WatsonError as e:
+            self.sig_save_error.emit(str(e))
+
+    def flush(self):
+        """
+        Save the client right away on the calling thread, after the writes
+        being done on the background thread, if any, are done.
+        """
+        self.timer.stop()
+        try:
+            self.client.save()
+        except WatsonError as e:
+            self.sig_save_error.emit(str(e))
+
+    def close(self):
+        """Save the client and detach the saver from the client."""
+        self.flush()
+        self.thread_pool.waitForDone()
+        self.client.saver = None
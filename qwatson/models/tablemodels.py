@@ -8,8 +8,9 @@
 
 # ---- Standard imports
 
+from bisect import bisect_left, bisect_right
 from time import strftime, gmtime
-import datetime
+import weakref
 
 # ---- Third parties imports
 
@@ -20,15 +21,58 @@ import arrow
 
 # Migrate to PySide6
 from PySide6.QtCore import Signal as QSignal
-from PySide6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt          #, QVariant # <-- QVariant was removed in PySide6
+from PySide6.QtCore import QAbstractProxyModel, QAbstractTableModel, QModelIndex, QObject, Qt          #, QVariant # <-- QVariant was removed in PySide6
 
 # ---- Local imports
 
 from qwatson.utils import colors
-from qwatson.utils.dates import local_arrow_from_str, contraint_arrow_to_span
+from qwatson.utils.dates import (
+    local_arrow_from_str, contraint_arrow_to_span, arrowspan_to_str,
+    total_seconds_to_hour_min)
 from qwatson.utils.strformating import list_to_str
+from qwatson.utils.timezone import get_local_timezone
 from qwatson.watson_ext.watsonhelpers import edit_frame_at
 
+TZLOCAL = get_local_timezone()
+
+
+def frame_is_accepted(frame, span=None, project_filters=None,
+                      tag_filters=None):
+    """
+    Return whether the frame started within the span, defined by a tuple
+    of start and stop timestamps, and is accepted by the project and tag
+    filters.
+    """
+    if span is not None and not span[0] <= frame.start_timestamp <= span[1]:
+        return False
+    if project_filters is not None:
+        if not project_filters.get(frame.project, True):
+            return False
+    if tag_filters is not None:
+        tags = frame.tags or ['']
+        if not any([tag_filters.get(tag, True) for tag in tags]):
+            return False
+    return True
+
+
+def filters_key(filters):
+    """Return a hashable key for a dict of project or tag filters."""
+    return None if filters is None else frozenset(filters.items())
+
+
+def row_ranges(rows):
+    """
+    Return the list of the first and last rows of each range of
+    consecutive rows of a sorted list of rows.
+    """
+    ranges = []
+    for row in rows:
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+    return ranges
+
 
 class WatsonTableModel(QAbstractTableModel):
 
@@ -45,11 +89,15 @@ class WatsonTableModel(QAbstractTableModel):
     def __init__(self, client):
         super(WatsonTableModel, self).__init__()
         self.client = client
+        self._day_buckets = None
+        self._display_cache = {}
 
         self.dataChanged.connect(self.model_changed)
         self.rowsInserted.connect(self.model_changed)
         self.modelReset.connect(self.model_changed)
         self.rowsRemoved.connect(self.model_changed)
+        self.rowsAboutToBeRemoved.connect(self.rows_about_to_be_removed)
+        self.modelReset.connect(self.clear_display_cache)
 
     def model_changed(self):
         """Emit a signal whenever the model is changed."""
@@ -65,39 +113,39 @@ class WatsonTableModel(QAbstractTableModel):
 
     def data(self, index, role=Qt.DisplayRole):
         """Qt method override."""
-        frames = self.client.frames
         if role == Qt.DisplayRole:
+            frame, start, end, duration, tags = self.get_display_strings(
+                index.row())
             if index.column() == self.COLUMNS['start']:
-                return frames[index.row()][0].format('YYYY-MM-DD HH:mm')
+                return start
             elif index.column() == self.COLUMNS['end']:
-                return frames[index.row()][1].format('YYYY-MM-DD HH:mm')
+                return end
             elif index.column() == self.COLUMNS['duration']:
-                total_seconds = (frames[index.row()][1] -
-                                 frames[index.row()][0]).total_seconds()
-                return strftime("%Hh %Mmin", gmtime(total_seconds))
+                return duration
             elif index.column() == self.COLUMNS['project']:
-                return str(frames[index.row()].project)
+                return str(frame.project)
             elif index.column() == self.COLUMNS['comment']:
-                msg = frames[index.row()].message
+                msg = frame.message
                 return '' if msg is None else msg
             elif index.column() == self.COLUMNS['id']:
-                return frames[index.row()].id[:7]
+                return frame.id[:7]
             elif index.column() == self.COLUMNS['tags']:
-                return list_to_str(frames[index.row()].tags)
+                return tags
             else:
                 return ''
         elif role == Qt.ToolTipRole:
+            frame = self.client.frames[index.row()]
             if index.column() == self.COLUMNS['comment']:
-                msg = frames[index.row()].message
+                msg = frame.message
                 return '' if msg is None else msg
             elif index.column() == self.COLUMNS['id']:
-                return frames[index.row()].id
+                return frame.id
             elif index.column() == self.COLUMNS['icons']:
                 return "Delete frame"
             elif index.column() == self.COLUMNS['project']:
-                return frames[index.row()].project
+                return frame.project
             elif index.column() == self.COLUMNS['tags']:
-                return list_to_str(frames[index.row()].tags)
+                return self.get_display_strings(index.row())[4]
         elif role == Qt.BackgroundRole:
             return colors.get_qcolor('base')
         elif role == Qt.TextAlignmentRole:
@@ -111,6 +159,40 @@ class WatsonTableModel(QAbstractTableModel):
             # return QVariant()        # <-- QVariant was removed in PySide6, any python object can be returned
             return None
 
+    def get_display_strings(self, row):
+        """
+        Return the frame stored at row with its formatted start, end,
+        duration and tags strings.
+
+        The strings are cached by frame id. Since frames are replaced by a
+        new frame object when they are edited, a cached entry is valid only
+        as long as it refers to the same frame object.
+        """
+        frame = self.client.frames[row]
+        cached = self._display_cache.get(frame.id)
+        if cached is None or cached[0] is not frame:
+            cached = (
+                frame,
+                strftime('%Y-%m-%d %H:%M',
+                         TZLOCAL.localtime(frame.start_timestamp)),
+                strftime('%Y-%m-%d %H:%M',
+                         TZLOCAL.localtime(frame.stop_timestamp)),
+                strftime("%Hh %Mmin", gmtime(
+                    frame.stop_timestamp - frame.start_timestamp)),
+                list_to_str(frame.tags))
+            self._display_cache[frame.id] = cached
+        return cached
+
+    def clear_display_cache(self, *args):
+        """Clear the cache of the formatted strings of the frames."""
+        self._display_cache = {}
+
+    def rows_about_to_be_removed(self, parent, first, last):
+        """Remove the frames that are about to be removed from the cache."""
+        frames = self.client.frames
+        for row in range(first, last + 1):
+            self._display_cache.pop(frames[row].id, None)
+
     def headerData(self, section, orientation, role):
         """Qt method override."""
         if role == Qt.DisplayRole and orientation == Qt.Horizontal:
@@ -123,17 +205,100 @@ class WatsonTableModel(QAbstractTableModel):
 
     def flags(self, index):
         """Qt method override."""
-        if index.column() in self.EDIT_COLUMNS:
+        if index.column() in self.EDIT_COLUMNS and not self.is_archived(
+                index.row()):
             return Qt.ItemIsEnabled | Qt.ItemIsEditable | Qt.ItemIsSelectable
         else:
             return Qt.ItemIsEnabled | Qt.ItemIsSelectable
 
+    def emit_rows_changed(self, rows, column):
+        """
+        Emit a single dataChanged signal that covers the data of the column
+        at the specified rows.
+        """
+        if rows:
+            self.dataChanged.emit(self.index(min(rows), column),
+                                  self.index(max(rows), column))
+
     # ---- Utils
 
+    @property
+    def day_buckets(self):
+        """Return the layer shared by the day proxy models of this model."""
+        if self._day_buckets is None:
+            self._day_buckets = WatsonDayBuckets(self)
+        return self._day_buckets
+
+    def get_total_seconds(self, date_span, project_filters=None,
+                          tag_filters=None):
+        """
+        Return the total number of seconds of the frames that started within
+        the date span and are accepted by the filters from the duration
+        rollups of the client.
+
+        Return None if the rollups cannot answer it, which is the case when
+        the date span does not span whole days or when tags are filtered
+        out, since a frame is accepted if any of its tags is accepted.
+        """
+        if tag_filters is not None and not all(tag_filters.values()):
+            return None
+        start, stop = date_span
+        if start != start.floor('day') or stop != stop.ceil('day'):
+            return None
+        return float(self.client.rollups.filtered_total(
+            start, stop, project_filters))
+
     @property
     def projects(self):
         return self.client.projects
 
+    def load_frames_since(self, date=None):
+        """
+        Load the frames of the client that started since date, or all the
+        frames if date is None, that are not loaded yet and insert their
+        rows at the top of the model.
+        """
+        frames = self.client.frames
+        new_frames, loaded_since = frames.fetch_since(date)
+        if new_frames:
+            self.beginInsertRows(QModelIndex(), 0, len(new_frames) - 1)
+        frames.prepend_frames(new_frames, loaded_since)
+        if new_frames:
+            self.endInsertRows()
+
+    def reload_frames(self):
+        """
+        Reload the frames of the client if the frames file was changed
+        outside of QWatson and notify the views of the rows that were
+        removed, changed or inserted only. Return whether the frames were
+        reloaded.
+        """
+        new_frames = self.client.reload_frames()
+        if new_frames is None:
+            return False
+        frames = self.client.frames
+        deleted, updated, inserted = frames.diff(new_frames)
+        for first, last in reversed(row_ranges(deleted)):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for row in range(last, first - 1, -1):
+                del frames[row]
+            self.endRemoveRows()
+        for row, frame in updated.items():
+            frames[row] = frame
+        for first, last in row_ranges(sorted(updated)):
+            self.dataChanged.emit(self.index(first, 0),
+                                  self.index(last, self.columnCount() - 1))
+        for first, last in row_ranges([row for row, frame in inserted]):
+            self.beginInsertRows(QModelIndex(), first, last)
+            for row, frame in inserted[:last - first + 1]:
+                frames.insert_frame(row, frame)
+            del inserted[:last - first + 1]
+            self.endInsertRows()
+
+        # The changes come from the frames file, so they must not be saved.
+        frames.clear_changes()
+        return True
+
     def get_frame_from_index(self, index):
         """Return the frame stored at the row of index."""
         return self.client.frames[index.row()]
@@ -176,12 +341,22 @@ class WatsonTableModel(QAbstractTableModel):
 
     # ---- Watson handlers
 
+    def is_archived(self, row):
+        """
+        Return whether the activity at row is archived, in which case it
+        cannot be edited or deleted.
+        """
+        frames = self.client.frames
+        return frames.has_archived_frames() and frames.is_archived(
+            frames[row])
+
     def emit_btn_delrow_clicked(self, index):
         """
         Send a signal with the model index where the button to delete an
         activity has been clicked.
         """
-        self.sig_btn_delrow_clicked.emit(index)
+        if not self.is_archived(index.row()):
+            self.sig_btn_delrow_clicked.emit(index)
 
     def editFrame(self, index, start=None, stop=None, project=None,
                   message=None, tags=None):
@@ -189,9 +364,10 @@ class WatsonTableModel(QAbstractTableModel):
         Edit Frame stored at index in the model from the provided
         arguments
         """
+        self._display_cache.pop(self.get_frameid_from_index(index), None)
         edit_frame_at(self.client, index.row(), start,
                       stop, project, message, tags)
-        self.client.save()
+        self.client.request_save()
         self.dataChanged.emit(index, index)
 
     def editDateTime(self, index, date_time):
@@ -207,22 +383,140 @@ class WatsonTableModel(QAbstractTableModel):
                 index, stop=contraint_arrow_to_span(date_time, span))
 
 
-class WatsonSortFilterProxyModel(QSortFilterProxyModel):
+class WatsonDayBuckets(QObject):
+    """
+    A layer shared by all the day proxy models of a WatsonTableModel.
+
+    Each day proxy model holds the sorted rows of the source model of the
+    frames that started within its date span. The layer listens to the
+    changes of the source model only once and dispatches them to the day
+    proxy models, which update their rows incrementally instead of
+    filtering the whole source model again.
+
+    The layer also caches the rows and durations of the frames accepted
+    in a date span, so that the spans adjacent to the one that is shown
+    can be prefetched while the application is idle.
+    """
+    MAX_CACHED_SPANS = 256
+
+    def __init__(self, source_model):
+        super(WatsonDayBuckets, self).__init__(source_model)
+        self.source_model = source_model
+        self.proxies = weakref.WeakSet()
+        self._span_rows = {}
+        self._span_rows_version = None
+
+        source_model.rowsAboutToBeRemoved.connect(
+            self.source_rows_about_to_be_removed)
+        source_model.rowsRemoved.connect(self.source_rows_removed)
+        source_model.rowsInserted.connect(self.source_rows_inserted)
+        source_model.dataChanged.connect(self.source_data_changed)
+        source_model.modelReset.connect(self.source_model_reset)
+
+    @property
+    def frames(self):
+        return self.source_model.client.frames
+
+    def register(self, proxy):
+        """Register a day proxy model so that it is kept up to date."""
+        self.proxies.add(proxy)
+
+    def get_span_rows(self, date_span, project_filters=None,
+                      tag_filters=None):
+        """
+        Return the sorted rows of the source model of the frames that
+        started within the date span and are accepted by the project and
+        tag filters, with the list of their durations and their total.
+
+        The results are cached until the frames change.
+        """
+        frames = self.frames
+        if self._span_rows_version != (frames, frames.version):
+            self._span_rows = {}
+            self._span_rows_version = (frames, frames.version)
+
+        span = (int(date_span[0].float_timestamp),
+                int(date_span[1].float_timestamp))
+        key = (span, filters_key(project_filters), filters_key(tag_filters))
+        try:
+            return self._span_rows[key]
+        except KeyError:
+            pass
+
+        rows = [row for row in frames.rows_in_span(*date_span) if
+                frame_is_accepted(frames[row], span, project_filters,
+                                  tag_filters)]
+        durations = [frames[row].stop_timestamp - frames[row].start_timestamp
+                     for row in rows]
+        if len(self._span_rows) >= self.MAX_CACHED_SPANS:
+            self._span_rows = {}
+        self._span_rows[key] = (rows, durations, sum(durations))
+        return self._span_rows[key]
+
+    def prefetch(self, date_spans, project_filters=None, tag_filters=None):
+        """
+        Compute and cache the rows and durations of the frames accepted in
+        each of the date spans.
+        """
+        for date_span in date_spans:
+            self.get_span_rows(date_span, project_filters, tag_filters)
+
+    def source_rows_about_to_be_removed(self, parent, first, last):
+        for proxy in list(self.proxies):
+            proxy.remove_source_rows(first, last)
+
+    def source_rows_removed(self, parent, first, last):
+        for proxy in list(self.proxies):
+            proxy.shift_source_rows(last + 1, first - last - 1)
+            proxy.source_model_changed()
+
+    def source_rows_inserted(self, parent, first, last):
+        frames = self.frames
+        for proxy in list(self.proxies):
+            proxy.shift_source_rows(first, last - first + 1)
+            proxy.insert_source_rows(
+                [row for row in proxy.candidate_rows(first, last) if
+                 proxy.accepts_frame(frames[row])])
+            proxy.source_model_changed()
+
+    def source_data_changed(self, top_left, bottom_right, roles=None):
+        for proxy in list(self.proxies):
+            proxy.update_source_rows(top_left.row(), bottom_right.row())
+            proxy.source_model_changed()
+
+    def source_model_reset(self):
+        for proxy in list(self.proxies):
+            proxy.reset_rows()
+            proxy.source_model_changed()
+
+
+class WatsonDayProxyModel(QAbstractProxyModel):
+    """
+    A lightweight proxy model that shows the rows of the source model of
+    the frames that started within a date span, usually a day, and that
+    are accepted by the project and tag filters.
+    """
     sig_sourcemodel_changed = QSignal()
     sig_total_seconds_changed = QSignal(float)
 
     def __init__(self, source_model, date_span=None):
-        super(WatsonSortFilterProxyModel, self).__init__()
+        super(WatsonDayProxyModel, self).__init__()
         self.setSourceModel(source_model)
         self.date_span = date_span
         self.total_seconds = None
         self.project_filters = None
         self.tag_filters = None
+        self._rows = []
+        self._span = None
+
+        # The durations in seconds of the frames mapped by the proxy rows
+        # and their running sum, which are updated incrementally when
+        # rows are inserted, removed or edited.
+        self._durations = []
+        self._total = 0
 
-        source_model.dataChanged.connect(self.source_model_changed)
-        source_model.rowsInserted.connect(self.source_model_changed)
-        source_model.rowsRemoved.connect(self.source_model_changed)
-        source_model.modelReset.connect(self.source_model_changed)
+        source_model.day_buckets.register(self)
+        self.reset_rows()
 
     def source_model_changed(self):
         """Emit a signal whenever the source model changes."""
@@ -233,7 +527,7 @@ class WatsonSortFilterProxyModel(QSortFilterProxyModel):
         """Set the date span to use to filter the row of the source model."""
         if date_span != self.date_span:
             self.date_span = date_span
-            self.invalidateFilter()
+            self.reset_rows()
             self.calcul_total_seconds()
 
     def set_project_filters(self, project_filters):
@@ -242,7 +536,7 @@ class WatsonSortFilterProxyModel(QSortFilterProxyModel):
         """
         if project_filters != self.project_filters:
             self.project_filters = project_filters
-            self.invalidateFilter()
+            self.reset_rows()
             self.calcul_total_seconds()
 
     def set_tag_filters(self, tag_filters):
@@ -251,45 +545,180 @@ class WatsonSortFilterProxyModel(QSortFilterProxyModel):
         """
         if tag_filters != self.tag_filters:
             self.tag_filters = tag_filters
-            self.invalidateFilter()
+            self.reset_rows()
             self.calcul_total_seconds()
 
-    def filterAcceptsRow(self, source_row, source_parent):
-        """Qt method override."""
-        if self.project_filters is not None:
-            project = self.sourceModel().client.frames[source_row].project
-            if not self.project_filters.get(project, True):
-                return False
-        if self.tag_filters is not None:
-            tags = self.sourceModel().client.frames[source_row].tags or ['']
-            if not any([self.tag_filters.get(tag, True) for tag in tags]):
-                return False
+    # ---- Rows of the source model
+
+    @property
+    def frames(self):
+        return self.sourceModel().client.frames
+
+    def accepts_frame(self, frame):
+        """
+        Return whether the frame started within the date span and is
+        accepted by the project and tag filters.
+        """
+        return frame_is_accepted(
+            frame, self._span, self.project_filters, self.tag_filters)
+
+    def candidate_rows(self, first=0, last=None):
+        """
+        Return the sorted rows of the source model between first and last
+        of the frames that started within the date span. These are taken
+        from the date index of the frames when a date span is set.
+        """
+        frames = self.frames
+        last = len(frames) - 1 if last is None else last
+        if self.date_span is None:
+            return range(first, last + 1)
+        return [row for row in frames.rows_in_span(*self.date_span) if
+                first <= row <= last]
+
+    def get_span_rows(self):
+        """
+        Return the accepted rows of the date span, their durations and
+        their total from the cache of the day buckets.
+        """
+        return self.sourceModel().day_buckets.get_span_rows(
+            self.date_span, self.project_filters, self.tag_filters)
+
+    def reset_rows(self):
+        """Reload the rows of the proxy model from the source model."""
+        self.beginResetModel()
         if self.date_span is None:
-            return True
+            self._span = None
+            frames = self.frames
+            self._rows = [row for row in self.candidate_rows() if
+                          self.accepts_frame(frames[row])]
+            self._durations = [self.frame_duration(row) for row in self._rows]
+            self._total = sum(self._durations)
         else:
-            return self.is_in_date_span(source_row, self.date_span)
+            self._span = (int(self.date_span[0].float_timestamp),
+                          int(self.date_span[1].float_timestamp))
+            rows, durations, self._total = self.get_span_rows()
+            self._rows = list(rows)
+            self._durations = list(durations)
+        self.endResetModel()
+
+    def remove_source_rows(self, first, last):
+        """Remove the proxy rows mapped to the source rows first to last."""
+        i = bisect_left(self._rows, first)
+        j = bisect_right(self._rows, last)
+        if i < j:
+            self.beginRemoveRows(QModelIndex(), i, j - 1)
+            del self._rows[i:j]
+            self._total -= sum(self._durations[i:j])
+            del self._durations[i:j]
+            self.endRemoveRows()
+
+    def shift_source_rows(self, first, count):
+        """Shift the mapped source rows that are after first by count."""
+        for i in range(bisect_left(self._rows, first), len(self._rows)):
+            self._rows[i] += count
+
+    def insert_source_rows(self, rows):
+        """Insert the proxy rows mapped to the contiguous source rows."""
+        if rows:
+            i = bisect_left(self._rows, rows[0])
+            self.beginInsertRows(QModelIndex(), i, i + len(rows) - 1)
+            durations = [self.frame_duration(row) for row in rows]
+            self._rows[i:i] = rows
+            self._durations[i:i] = durations
+            self._total += sum(durations)
+            self.endInsertRows()
 
-    def is_in_date_span(self, source_row, date_span):
+    def update_source_rows(self, first, last):
         """
-        Return whether the start time of the frame stored at the specified
-        row of the source model is within the specified date_span.
+        Update the proxy rows after the data of the source rows first to
+        last changed, which may have moved frames in or out of the proxy.
         """
-        frame_start = self.sourceModel().client.frames[source_row].start
-        return (frame_start >= date_span[0] and frame_start <= date_span[1])
+        frames = self.frames
+        old_rows = self._rows[bisect_left(self._rows, first):
+                              bisect_right(self._rows, last)]
+        new_rows = [row for row in self.candidate_rows(first, last) if
+                    self.accepts_frame(frames[row])]
+        if old_rows != new_rows:
+            for row in sorted(set(old_rows) - set(new_rows)):
+                self.remove_source_rows(row, row)
+            for row in sorted(set(new_rows) - set(old_rows)):
+                self.insert_source_rows([row])
+        for row in set(old_rows) & set(new_rows):
+            i = bisect_left(self._rows, row)
+            duration = self.frame_duration(row)
+            self._total += duration - self._durations[i]
+            self._durations[i] = duration
+        if new_rows:
+            self.dataChanged.emit(
+                self.index(bisect_left(self._rows, new_rows[0]), 0),
+                self.index(bisect_left(self._rows, new_rows[-1]),
+                           self.columnCount() - 1))
 
-    def calcul_total_seconds(self):
+    # ---- Qt method override
+
+    def rowCount(self, parent=QModelIndex()):
+        """Qt method override."""
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        """Qt method override."""
+        return 0 if parent.isValid() else self.sourceModel().columnCount()
+
+    def index(self, row, column, parent=QModelIndex()):
+        """Qt method override."""
+        if (parent.isValid() or not 0 <= row < self.rowCount() or
+                not 0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        """Qt method override."""
+        if index is None:
+            return QObject.parent(self)
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        """Qt method override."""
+        if not proxy_index.isValid() or proxy_index.row() >= len(self._rows):
+            return QModelIndex()
+        return self.sourceModel().index(
+            self._rows[proxy_index.row()], proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        """Qt method override."""
+        if not source_index.isValid():
+            return QModelIndex()
+        i = bisect_left(self._rows, source_index.row())
+        if i < len(self._rows) and self._rows[i] == source_index.row():
+            return self.index(i, source_index.column())
+        return QModelIndex()
+
+    # ---- Utils
+
+    def frame_duration(self, source_row):
+        """Return the duration in seconds of the frame at source_row."""
+        frame = self.frames[source_row]
+        return frame.stop_timestamp - frame.start_timestamp
+
+    def get_total_seconds(self):
         """
         Return the total number of seconds of all the activities accepted
-        by the proxy model.
+        by the proxy model, from the duration rollups of the client when
+        possible or else from the running sum of their durations.
         """
-        timedelta = datetime.timedelta()
-        for i in range(self.rowCount()):
-            source_row = self.mapToSource(self.index(i, 0)).row()
-            frame = self.sourceModel().client.frames[source_row]
-            timedelta = timedelta + (frame.stop - frame.start)
+        total_seconds = None
+        if self.date_span is not None:
+            total_seconds = self.sourceModel().get_total_seconds(
+                self.date_span, self.project_filters, self.tag_filters)
+        return float(self._total) if total_seconds is None else total_seconds
 
+    def calcul_total_seconds(self):
+        """
+        Update the total number of seconds of all the activities accepted
+        by the proxy model and emit the difference if it changed.
+        """
         total_seconds_old = self.total_seconds
-        total_seconds_new = timedelta.total_seconds()
+        total_seconds_new = self.get_total_seconds()
         if total_seconds_new != total_seconds_old:
             self.total_seconds = total_seconds_new
             total_seconds_old = total_seconds_old or 0
@@ -302,6 +731,13 @@ class WatsonSortFilterProxyModel(QSortFilterProxyModel):
         """Return the number of rows that were accepted by the proxy."""
         return self.rowCount()
 
+    def is_header_row(self, row):
+        """
+        Return whether the proxy row is a header row, which the rows of
+        the proxy of a single day never are.
+        """
+        return False
+
     # ---- Map proxy to source
 
     @property
@@ -347,3 +783,243 @@ class WatsonSortFilterProxyModel(QSortFilterProxyModel):
         """Map proxy method to source."""
         self.sourceModel().editDateTime(
             self.mapToSource(proxy_index), date_time)
+
+
+class WatsonSpanProxyModel(WatsonDayProxyModel):
+    """
+    A proxy model that shows the frames of all the days of a date span in
+    a single table. Each day starts with a header row that shows the date
+    and the total time of the activities of that day.
+    """
+
+    def reset_rows(self):
+        """Reload the rows of the proxy model from the source model."""
+        self.beginResetModel()
+        if self.date_span is None:
+            self._span = None
+            self.day_spans = []
+        else:
+            self._span = (int(self.date_span[0].float_timestamp),
+                          int(self.date_span[1].float_timestamp))
+            self.day_spans = list(
+                arrow.Arrow.span_range('day', *self.date_span))
+        self._day_starts = [
+            int(span[0].float_timestamp) for span in self.day_spans]
+        self._day_rows = [[] for span in self.day_spans]
+        self._day_durations = [[] for span in self.day_spans]
+        if self.day_spans:
+            frames = self.frames
+            rows, durations, total = self.get_span_rows()
+            for row, duration in zip(rows, durations):
+                day = self.get_day_of_frame(frames[row])
+                self._day_rows[day].append(row)
+                self._day_durations[day].append(duration)
+        self._day_totals = [sum(durations) for durations in
+                            self._day_durations]
+        self._total = sum(self._day_totals)
+        self.update_offsets()
+        self.endResetModel()
+
+    def update_offsets(self):
+        """Update the rows of the day headers."""
+        self._offsets = [0]
+        for rows in self._day_rows:
+            self._offsets.append(self._offsets[-1] + 1 + len(rows))
+
+    def get_day_of_frame(self, frame):
+        """Return the index of the day in which the frame started."""
+        return bisect_right(self._day_starts, frame.start_timestamp) - 1
+
+    def locate(self, row):
+        """
+        Return the index of the day of the proxy row and the position of
+        the row in the list of the frames of that day, which is -1 for the
+        header row of the day.
+        """
+        day = bisect_right(self._offsets, row) - 1
+        return day, row - self._offsets[day] - 1
+
+    def is_header_row(self, row):
+        """Return whether the proxy row is the header row of a day."""
+        return self.locate(row)[1] == -1
+
+    # ---- Rows of the source model
+
+    def remove_day_rows(self, day, i, j):
+        """Remove the frames at positions i to j - 1 of the day."""
+        first = self._offsets[day] + 1 + i
+        self.beginRemoveRows(QModelIndex(), first, first + j - i - 1)
+        del self._day_rows[day][i:j]
+        duration = sum(self._day_durations[day][i:j])
+        del self._day_durations[day][i:j]
+        self._day_totals[day] -= duration
+        self._total -= duration
+        self.update_offsets()
+        self.endRemoveRows()
+        self.emit_header_changed(day)
+
+    def insert_day_rows(self, day, rows):
+        """Insert the contiguous source rows in the frames of the day."""
+        i = bisect_left(self._day_rows[day], rows[0])
+        first = self._offsets[day] + 1 + i
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        durations = [self.frame_duration(row) for row in rows]
+        self._day_rows[day][i:i] = rows
+        self._day_durations[day][i:i] = durations
+        self._day_totals[day] += sum(durations)
+        self._total += sum(durations)
+        self.update_offsets()
+        self.endInsertRows()
+        self.emit_header_changed(day)
+
+    def emit_header_changed(self, day):
+        """Emit a signal that the data of the header row of day changed."""
+        row = self._offsets[day]
+        self.dataChanged.emit(
+            self.index(row, 0), self.index(row, self.columnCount() - 1))
+
+    def remove_source_rows(self, first, last):
+        """Remove the proxy rows mapped to the source rows first to last."""
+        for day, rows in enumerate(self._day_rows):
+            i = bisect_left(rows, first)
+            j = bisect_right(rows, last)
+            if i < j:
+                self.remove_day_rows(day, i, j)
+
+    def shift_source_rows(self, first, count):
+        """Shift the mapped source rows that are after first by count."""
+        for rows in self._day_rows:
+            for i in range(bisect_left(rows, first), len(rows)):
+                rows[i] += count
+
+    def insert_source_rows(self, rows):
+        """Insert the proxy rows mapped to the contiguous source rows."""
+        frames = self.frames
+        days = {}
+        for row in rows:
+            days.setdefault(
+                self.get_day_of_frame(frames[row]), []).append(row)
+        for day, day_rows in days.items():
+            self.insert_day_rows(day, day_rows)
+
+    def update_source_rows(self, first, last):
+        """
+        Update the proxy rows after the data of the source rows first to
+        last changed, which may have moved frames to another day.
+        """
+        frames = self.frames
+        old_days = {}
+        for day, rows in enumerate(self._day_rows):
+            for row in rows[bisect_left(rows, first):
+                            bisect_right(rows, last)]:
+                old_days[row] = day
+        new_days = {
+            row: self.get_day_of_frame(frames[row]) for row in
+            self.candidate_rows(first, last) if
+            self.accepts_frame(frames[row])}
+
+        for row in sorted(old_days):
+            if new_days.get(row) != old_days[row]:
+                i = bisect_left(self._day_rows[old_days[row]], row)
+                self.remove_day_rows(old_days[row], i, i + 1)
+        for row in sorted(new_days):
+            if old_days.get(row) != new_days[row]:
+                self.insert_day_rows(new_days[row], [row])
+            else:
+                day = new_days[row]
+                i = bisect_left(self._day_rows[day], row)
+                duration = self.frame_duration(row)
+                delta = duration - self._day_durations[day][i]
+                self._day_durations[day][i] = duration
+                self._day_totals[day] += delta
+                self._total += delta
+                proxy_row = self._offsets[day] + 1 + i
+                self.dataChanged.emit(
+                    self.index(proxy_row, 0),
+                    self.index(proxy_row, self.columnCount() - 1))
+                self.emit_header_changed(day)
+
+    # ---- Qt method override
+
+    def rowCount(self, parent=QModelIndex()):
+        """Qt method override."""
+        return 0 if parent.isValid() else self._offsets[-1]
+
+    def mapToSource(self, proxy_index):
+        """Qt method override."""
+        if not proxy_index.isValid() or proxy_index.row() >= self.rowCount():
+            return QModelIndex()
+        day, i = self.locate(proxy_index.row())
+        if i == -1:
+            return QModelIndex()
+        return self.sourceModel().index(
+            self._day_rows[day][i], proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        """Qt method override."""
+        if not source_index.isValid() or not self.day_spans:
+            return QModelIndex()
+        row = source_index.row()
+        day = self.get_day_of_frame(self.frames[row])
+        if 0 <= day < len(self._day_rows):
+            rows = self._day_rows[day]
+            i = bisect_left(rows, row)
+            if i < len(rows) and rows[i] == row:
+                return self.index(self._offsets[day] + 1 + i,
+                                  source_index.column())
+        return QModelIndex()
+
+    def data(self, index, role=Qt.DisplayRole):
+        """Qt method override."""
+        day, i = self.locate(index.row())
+        if i != -1:
+            return super(WatsonSpanProxyModel, self).data(index, role)
+
+        columns = self.sourceModel().COLUMNS
+        if role == Qt.DisplayRole:
+            if index.column() == columns['start']:
+                return arrowspan_to_str(self.day_spans[day])
+            elif index.column() == columns['duration']:
+                return total_seconds_to_hour_min(self.get_day_total(day))
+            else:
+                return ''
+        elif role == Qt.BackgroundRole:
+            return colors.get_qcolor('grey')
+        elif role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def flags(self, index):
+        """Qt method override."""
+        if index.isValid() and self.is_header_row(index.row()):
+            return Qt.ItemIsEnabled
+        return super(WatsonSpanProxyModel, self).flags(index)
+
+    # ---- Utils
+
+    def calcul_total_seconds(self):
+        """
+        Update the total number of seconds of all the activities accepted
+        by the proxy model and emit it if it changed.
+        """
+        total_seconds = self.get_total_seconds()
+        if total_seconds != self.total_seconds:
+            self.total_seconds = total_seconds
+            self.sig_total_seconds_changed.emit(self.total_seconds)
+
+    def get_day_total(self, day):
+        """
+        Return the total number of seconds of the activities of the day,
+        from the duration rollups of the client when possible.
+        """
+        total_seconds = self.sourceModel().get_total_seconds(
+            self.day_spans[day], self.project_filters, self.tag_filters)
+        return self._day_totals[day] if total_seconds is None else total_seconds
+
+    def get_accepted_row_count(self):
+        """Return the number of frames that were accepted by the proxy."""
+        return sum(len(rows) for rows in self._day_rows)
+
+    def get_day_row_counts(self):
+        """Return a list with the number of frames shown for each day."""
+        return [len(rows) for rows in self._day_rows]
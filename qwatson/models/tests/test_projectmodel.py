@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+
+# ---- Third party imports
+
+import pytest
+
+# ---- Local imports
+
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.models.projectmodel import WatsonProjectModel
+
+
+# The QAbstractItemModelTester of the qtmodeltester fixture reports the
+# inconsistencies of the model as Qt warnings.
+pytestmark = pytest.mark.qt_log_level_fail('WARNING')
+
+
+# ---- Fixtures
+
+
+@pytest.fixture
+def model(qtmodeltester, tmpdir):
+    """
+    A project model fixture with frames for the empty project and the
+    projects p1 and p2, that is checked by a QAbstractItemModelTester.
+    """
+    client = Watson(config_dir=osp.join(str(tmpdir), 'appdir'))
+    for i, project in enumerate(['', 'p1', '', 'p2']):
+        client.frames.add(project, 3600 * i, 3600 * i + 1800)
+    client.save()
+    model = WatsonProjectModel(client)
+    qtmodeltester.check(model)
+    return model
+
+
+def notifications(model):
+    """Return the list of the row notifications emitted by the model."""
+    signals = []
+    for name in ['rowsInserted', 'rowsRemoved', 'dataChanged']:
+        getattr(model, name).connect(
+            lambda *args, name=name: signals.append(name))
+    return signals
+
+
+# ---- Tests
+
+
+def test_rename_empty_project_to_new_project(model):
+    """
+    Test that renaming the empty project to a new project inserts a row
+    for the new project without removing the row of the empty project.
+    """
+    signals = notifications(model)
+    model.rename_project('', 'p0')
+    assert model.projects == ['', 'p0', 'p1', 'p2']
+    assert model.rowCount() == 4
+    assert signals == ['rowsInserted']
+    assert [frame.project for frame in model.client.frames] == [
+        'p0', 'p1', 'p0', 'p2']
+
+
+def test_rename_empty_project_to_existing_project(model):
+    """
+    Test that renaming the empty project to an existing project does not
+    change the rows of the model.
+    """
+    signals = notifications(model)
+    model.rename_project('', 'p2')
+    assert model.projects == ['', 'p1', 'p2']
+    assert model.rowCount() == 3
+    assert signals == []
+    assert [frame.project for frame in model.client.frames] == [
+        'p2', 'p1', 'p2', 'p2']
+
+
+def test_delete_empty_project(model):
+    """
+    Test that deleting the empty project deletes its frames but does not
+    remove its row from the model.
+    """
+    signals = notifications(model)
+    model.delete_project('')
+    assert model.projects == ['', 'p1', 'p2']
+    assert model.rowCount() == 3
+    assert signals == []
+    assert [frame.project for frame in model.client.frames] == ['p1', 'p2']
+
+
+def test_rename_and_delete_projects(model):
+    """
+    Test that renaming and deleting projects other than the empty project
+    keep the rows of the model consistent.
+    """
+    model.add_project('p3')
+    model.rename_project('p1', 'p4')
+    assert model.projects == ['', 'p2', 'p3', 'p4']
+    model.rename_project('p4', 'p2')
+    assert model.projects == ['', 'p2', 'p3']
+    model.delete_project('p3')
+    assert model.projects == ['', 'p2']
+    assert model.rowCount() == 2
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
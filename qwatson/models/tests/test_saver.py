@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+
+# ---- Third party imports
+
+import pytest
+
+# ---- Local imports
+
+from qwatson.utils.dates import local_arrow_from_tuple
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.watson_ext.watsonhelpers import edit_frame_at
+from qwatson.models.saver import WatsonSaver
+
+
+# ---- Fixtures
+
+
+@pytest.fixture
+def client(tmpdir):
+    """A Watson client fixture with three frames saved on the disk."""
+    client = Watson(config_dir=osp.join(str(tmpdir), 'appdir'))
+    start = local_arrow_from_tuple((2018, 6, 14, 9, 0, 0))
+    for i in range(3):
+        client.frames.add('p%d' % i, start.shift(hours=i),
+                          start.shift(hours=i, minutes=30),
+                          message='frame #%d' % i)
+    client.save()
+    return client
+
+
+# ---- Tests
+
+
+def test_saves_are_coalesced(qtbot, client):
+    """
+    Test that the saves requested in a burst are coalesced into a single
+    save that is written in the background.
+    """
+    saver = WatsonSaver(client)
+    saver.SAVE_DELAY = 50
+    saver.timer.setInterval(saver.SAVE_DELAY)
+    for i in range(3):
+        edit_frame_at(client, i, message='edited #%d' % i)
+        client.request_save()
+    assert not client.journal.exists()
+    assert saver.is_pending()
+
+    qtbot.waitUntil(lambda: not saver.is_pending())
+    assert client.journal.record_count == 3
+    assert len(client._pending_writes) == 0
+    assert ([frame.message for frame in
+             Watson(config_dir=client._dir).frames] ==
+            ['edited #0', 'edited #1', 'edited #2'])
+
+
+def test_saver_flush_and_errors(qtbot, client):
+    """
+    Test that the pending changes are saved when the saver is closed and
+    that the errors raised while saving are reported with a signal.
+    """
+    saver = WatsonSaver(client)
+    edit_frame_at(client, 0, message='edited')
+    client.request_save()
+    saver.close()
+    assert client.saver is None
+    assert Watson(config_dir=client._dir).frames[0].message == 'edited'
+
+    # Force writing the frames file in a directory that does not exist.
+    saver = WatsonSaver(client)
+    client.frames_file = osp.join(client._dir, 'missing', 'frames')
+    client.frames.changed = True
+    with qtbot.waitSignal(saver.sig_save_error) as blocker:
+        saver.save()
+    assert 'Impossible to write' in blocker.args[0]
+
+    # All the frames are written again after a failed save.
+    client.frames_file = osp.join(client._dir, 'frames')
+    with qtbot.assertNotEmitted(saver.sig_save_error):
+        saver.flush()
+    assert Watson(config_dir=client._dir).frames[0].message == 'edited'
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+import json
+
+# ---- Third party imports
+
+import pytest
+
+# ---- Local imports
+
+from qwatson.utils.dates import local_arrow_from_tuple
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.watson_ext.watsonhelpers import edit_frame_at
+from qwatson.models.tablemodels import WatsonTableModel
+from qwatson.models.watcher import WatsonWatcher
+
+
+# ---- Fixtures
+
+
+@pytest.fixture
+def client(tmpdir):
+    """A Watson client fixture with four frames saved on the disk."""
+    client = Watson(config_dir=osp.join(str(tmpdir), 'appdir'))
+    start = local_arrow_from_tuple((2018, 6, 14, 9, 0, 0))
+    for i in range(4):
+        client.frames.add('p%d' % i, start.shift(hours=i),
+                          start.shift(hours=i, minutes=30),
+                          updated_at=start, message='frame #%d' % i)
+    client.save()
+    client.compact_journal()
+    return client
+
+
+def change_frames_file(client, func):
+    """Change the rows of the frames file as the Watson CLI would."""
+    with open(client.frames_file) as f:
+        rows = json.load(f)
+    rows = func(rows)
+    with open(client.frames_file, 'w') as f:
+        json.dump(rows, f)
+    # Make sure that the signature of the file changed.
+    stat = os.stat(client.frames_file)
+    os.utime(client.frames_file, ns=(stat.st_atime_ns,
+                                     stat.st_mtime_ns + 10 ** 9))
+
+
+# ---- Tests
+
+
+def test_reload_frames_incrementally(qtbot, client):
+    """
+    Test that only the frames that were added, removed or updated in the
+    frames file outside of QWatson are notified to the views.
+    """
+    model = WatsonTableModel(client)
+    watcher = WatsonWatcher(model)
+    old_frames = list(client.frames)
+
+    # The changes saved by QWatson are not reloaded.
+    edit_frame_at(client, 3, message='edited')
+    client.save()
+    client.compact_journal()
+    assert not client.frames_file_changed()
+    assert not model.reload_frames()
+
+    def cli_changes(rows):
+        rows[2][6] = 'edited by the CLI'
+        rows[2][5] += 60
+        new_row = list(rows[3])
+        new_row[3] = 'new-frame-id'
+        new_row[6] = 'added by the CLI'
+        return [rows[1], rows[2], rows[3], new_row]
+    change_frames_file(client, cli_changes)
+
+    signals = []
+    model.modelReset.connect(lambda: signals.append('reset'))
+    model.rowsRemoved.connect(
+        lambda parent, first, last: signals.append(('removed', first, last)))
+    model.rowsInserted.connect(
+        lambda parent, first, last: signals.append(('inserted', first, last)))
+    model.dataChanged.connect(
+        lambda top_left, bottom_right: signals.append(
+            ('changed', top_left.row(), bottom_right.row())))
+    with qtbot.waitSignal(watcher.sig_frames_reloaded):
+        watcher.schedule()
+
+    assert signals == [('removed', 0, 0), ('changed', 1, 1),
+                       ('inserted', 3, 3)]
+    assert [frame.message for frame in client.frames] == [
+        'frame #1', 'edited by the CLI', 'edited', 'added by the CLI']
+    # The frames that did not change are kept as is.
+    assert client.frames[0] is old_frames[1]
+    assert not client.frames.changed
+    assert not client.frames_file_changed()
+    watcher.close()
+
+
+def test_reordered_frames_are_moved(client):
+    """
+    Test that the frames that are not in the same order in the frames file
+    anymore are removed and inserted again.
+    """
+    model = WatsonTableModel(client)
+    change_frames_file(client, lambda rows: [rows[3]] + rows[:3])
+    assert model.reload_frames()
+    assert [frame.message for frame in client.frames] == [
+        'frame #3', 'frame #0', 'frame #1', 'frame #2']
+    assert client.frames.rows_in_span(
+        client.frames[1].start, client.frames[2].start) == [1, 2]
+
+
+def test_reload_frames_with_pending_writes(client):
+    """
+    Test that the changes queued to be written by the write-behind saver
+    are written before the frames are reloaded, so that they are not lost.
+    """
+    model = WatsonTableModel(client)
+    start = local_arrow_from_tuple((2018, 6, 14, 14, 0, 0))
+    client.frames.add('p4', start, start.shift(minutes=30), message='queued')
+    client.queue_save()
+    change_frames_file(client, lambda rows: rows[1:])
+
+    assert model.reload_frames()
+    expected = ['frame #1', 'frame #2', 'frame #3', 'queued']
+    assert [frame.message for frame in client.frames] == expected
+    assert [frame.message for frame in
+            Watson(config_dir=client._dir).frames] == expected
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
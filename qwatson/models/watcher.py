@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+A watcher of the data dir of QWatson that reloads the frames incrementally
+when they are changed outside of QWatson.
+"""
+
+# ---- Standard imports
+
+import os.path as osp
+
+# ---- Third party imports
+
+from PySide6.QtCore import QFileSystemWatcher, QObject, QTimer
+from PySide6.QtCore import Signal as QSignal
+from watson.watson import WatsonError
+
+
+class WatsonWatcher(QObject):
+    """
+    A watcher of the data dir and frames file of a Watson client that
+    reloads the frames of a WatsonTableModel when the frames file is
+    changed by the Watson CLI or a sync, for example.
+
+    Only the frames that were added, removed or updated since they were
+    loaded are notified to the views of the model, so that they keep
+    their state. The changes made by QWatson itself are ignored, since
+    the client keeps the signature of the frames file it last wrote.
+    """
+    RELOAD_DELAY = 300
+    sig_frames_reloaded = QSignal()
+    sig_reload_error = QSignal(str)
+
+    def __init__(self, model, parent=None):
+        super(WatsonWatcher, self).__init__(parent)
+        self.model = model
+        self.client = model.client
+
+        # The changes are coalesced, since the frames file is written in
+        # several steps.
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.RELOAD_DELAY)
+        self.timer.timeout.connect(self.reload)
+
+        self.file_watcher = QFileSystemWatcher(self)
+        self.file_watcher.directoryChanged.connect(self.schedule)
+        self.file_watcher.fileChanged.connect(self.schedule)
+        self.watch()
+
+    def watch(self):
+        """
+        Watch the data dir and the frames file, which must be watched
+        again each time it is replaced.
+        """
+        watched = (self.file_watcher.files() +
+                   self.file_watcher.directories())
+        paths = [path for path in (self.client._dir, self.client.frames_file)
+                 if osp.exists(path) and path not in watched]
+        if paths:
+            self.file_watcher.addPaths(paths)
+
+    def schedule(self, path=None):
+        """Schedule a reload of the frames."""
+        self.timer.start()
+
+    def reload(self):
+        """Reload the frames if they were changed outside of QWatson."""
+        self.timer.stop()
+        self.watch()
+        try:
+            if self.model.reload_frames():
+                self.sig_frames_reloaded.emit()
+        except WatsonError as e:
+            self.sig_reload_error.emit(str(e))
+
+    def close(self):
+        """Stop watching the data dir."""
+        self.timer.stop()
+        watched = (self.file_watcher.files() +
+                   self.file_watcher.directories())
+        if watched:
+            self.file_watcher.removePaths(watched)
@@ -27,6 +27,7 @@ from PySide6.QtWidgets import QMessageBox
 
 from qwatson.watson_ext.watsonextends import Frames
 from qwatson.mainwindow import QWatson
+from qwatson.widgets.tableviews import ActivityOverviewWidget
 from qwatson.utils.dates import local_arrow_from_tuple
 from qwatson.utils.fileio import delete_folder_recursively
 from qwatson.utils.dates import qdatetime_from_str
@@ -288,6 +289,122 @@ def test_filter_no_tags_or_project(qwatson):
     assert overview.table_widg.get_row_count() == [0, 2, 2, 2, 2, 2, 2]
 
 
+def test_edit_moves_activity_to_other_day(qwatson, span):
+    """
+    Test that an activity is moved to the table of another day when its
+    start time is edited, without affecting the other tables.
+    """
+    overview = qwatson.overview_widg
+    tables = overview.table_widg.tables
+    assert overview.table_widg.get_row_count() == [2, 2, 2, 2, 2, 2, 2]
+
+    # Move the second activity of the first day to the beginning of the
+    # second day.
+    index = qwatson.model.index(1, 0)
+    qwatson.model.editFrame(index, start=span[0].shift(days=1, hours=1),
+                            stop=span[0].shift(days=1, hours=5))
+    assert overview.table_widg.get_row_count() == [1, 3, 2, 2, 2, 2, 2]
+    assert overview.table_widg.total_seconds == (14*6 - 2) * (60*60)
+    assert tables[0].view.proxy_model.total_seconds == 6 * (60*60)
+    assert tables[1].view.proxy_model.total_seconds == 16 * (60*60)
+
+    index = tables[1].view.proxy_model.index(0, 0)
+    assert tables[1].view.proxy_model.mapToSource(index).row() == 1
+    assert tables[1].view.proxy_model.get_frame_from_index(index).message == (
+        'activity #1')
+
+
+def test_span_view(qtbot, mocker, appdir, now, span):
+    """
+    Test that the activities of the date span are shown in a single table
+    with a header row for each day that shows the time count of the day.
+    """
+    mocker.patch('arrow.now', return_value=now)
+    qwatson = QWatson(config_dir=appdir)
+    overview = ActivityOverviewWidget(qwatson.model, span_view=True)
+    qtbot.addWidget(overview)
+    proxy_model = overview.table_widg.view.proxy_model
+
+    assert overview.table_widg.get_row_count() == [2, 2, 2, 2, 2, 2, 2]
+    assert overview.table_widg.total_seconds == 7*(2*6)*60*60
+    assert proxy_model.rowCount() == 7 + 7*2
+    assert proxy_model.is_header_row(0) and proxy_model.is_header_row(3)
+    assert proxy_model.index(0, 2).data() == '12h 0min'
+    assert not proxy_model.mapToSource(proxy_model.index(3, 0)).isValid()
+    assert proxy_model.mapToSource(proxy_model.index(4, 0)).row() == 2
+
+    # The header rows are centered, while the comments are left-aligned.
+    column = qwatson.model.COLUMNS['comment']
+    delegate = overview.table_widg.view.itemDelegateForColumn(column)
+    assert (delegate.get_alignment(proxy_model.index(0, column)) ==
+            Qt.AlignCenter | Qt.AlignVCenter)
+    assert (delegate.get_alignment(proxy_model.index(1, column)) ==
+            Qt.AlignLeft | Qt.AlignVCenter)
+
+    # Move the second activity of the first day to the second day.
+    index = qwatson.model.index(1, 0)
+    qwatson.model.editFrame(index, start=span[0].shift(days=1, hours=1),
+                            stop=span[0].shift(days=1, hours=5))
+    assert overview.table_widg.get_row_count() == [1, 3, 2, 2, 2, 2, 2]
+    assert overview.table_widg.total_seconds == (14*6 - 2) * (60*60)
+    assert proxy_model.index(0, 2).data() == '6h 0min'
+    assert proxy_model.index(2, 2).data() == '16h 0min'
+    assert proxy_model.mapToSource(proxy_model.index(3, 0)).row() == 1
+
+    # Show the activities of the whole month in the table.
+    overview.table_widg.set_date_span(now.span('month'))
+    assert proxy_model.rowCount() == 30 + 14
+    assert sum(overview.table_widg.get_row_count()) == 14
+
+
+def test_span_frames_navigation(qtbot, mocker, appdir, now, span):
+    """
+    Test that the activities can be navigated by day, month, quarter, year
+    and custom date spans and that the adjacent spans are prefetched.
+    """
+    mocker.patch('arrow.now', return_value=now)
+    qwatson = QWatson(config_dir=appdir)
+    overview = qwatson.overview_widg
+    date_range_nav = overview.date_range_nav
+    assert overview.table_widg is overview.multi_table_widg
+
+    # Show the activities by month in the single span table.
+    date_range_nav.set_span_frame('month')
+    assert overview.table_widg is overview.span_table_widg
+    assert overview.table_widg.date_span == now.span('month')
+    assert sum(overview.table_widg.get_row_count()) == 14
+    assert not date_range_nav.btn_next.isEnabled()
+
+    # Prefetch the previous month and step to it.
+    prev_span = now.shift(months=-1).span('month')
+    day_buckets = qwatson.model.day_buckets
+    overview.prefetch_adjacent_spans()
+    cached = day_buckets.get_span_rows(prev_span)
+    assert day_buckets.get_span_rows(prev_span) is cached
+
+    date_range_nav.go_previous_range()
+    assert overview.table_widg.date_span == prev_span
+    assert overview.table_widg.total_seconds == 0
+    assert date_range_nav.btn_next.isEnabled()
+
+    # Show the activities by day in the stack of day tables.
+    date_range_nav.set_span_frame('day')
+    assert overview.table_widg is overview.multi_table_widg
+    assert overview.table_widg.get_row_count() == [2]
+
+    # Show the activities of a custom range of two weeks.
+    date_range_nav.set_custom_span((span[0].shift(weeks=-1), span[1]))
+    assert overview.table_widg is overview.span_table_widg
+    assert sum(overview.table_widg.get_row_count()) == 14
+    date_range_nav.go_previous_range()
+    assert overview.table_widg.date_span[0] == span[0].shift(weeks=-3)
+
+    date_range_nav.go_home()
+    assert overview.table_widg is overview.multi_table_widg
+    assert overview.table_widg.date_span == span
+    assert overview.table_widg.get_row_count() == [2, 2, 2, 2, 2, 2, 2]
+
+
 def test_daterange_navigation(qwatson, span, qtbot):
     """
     Test that the widget to change the datespan of the activity overview is
@@ -9,7 +9,6 @@
 # ---- Imports: standard libraries
 
 from time import strptime
-import dateutil
 from datetime import datetime
 
 # ---- Imports: third parties
@@ -20,6 +19,11 @@ import arrow
 # Migrate to PySide6
 from PySide6.QtCore import QDateTime
 
+# ---- Imports: local
+
+from qwatson.utils.timezone import get_local_timezone
+
+
 def total_seconds_to_hour_min(total_seconds):
     """
     Format the total number of seconds to a non-zero-padded str hour-minute
@@ -99,14 +103,14 @@ def local_arrow_from_tuple(datetime_tuple):
     Return an arrow object from a datetime tuple formatted for local timezone.
     """
     return arrow.get(datetime(*datetime_tuple)
-                     ).replace(tzinfo=dateutil.tz.tzlocal())
+                     ).replace(tzinfo=get_local_timezone())
 
 
 def local_arrow_from_str(datetime_str, fmt='YYYY-MM-DD HH:mm:ss'):
     """
     Return an arrow object from a string formatted for local timezone.
     """
-    return arrow.get(datetime_str, fmt).replace(tzinfo=dateutil.tz.tzlocal())
+    return arrow.get(datetime_str, fmt).replace(tzinfo=get_local_timezone())
 
 
 if __name__ == '__main__':
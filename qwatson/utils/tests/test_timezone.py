@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import time
+from datetime import datetime
+
+# ---- Third party imports
+
+import pytest
+
+# ---- Local imports
+
+from qwatson.utils.timezone import LocalTimezone
+
+
+@pytest.fixture
+def montreal_tz(monkeypatch):
+    """Fixture that sets the local timezone to America/Montreal."""
+    if not hasattr(time, 'tzset'):
+        pytest.skip("The local timezone cannot be changed on this platform.")
+    monkeypatch.setenv('TZ', 'America/Montreal')
+    time.tzset()
+    yield LocalTimezone()
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_local_timezone_offsets(montreal_tz):
+    """
+    Test that the offsets found in the table of transitions are the same
+    as those of the system, including around daylight saving time changes.
+    """
+    tz = montreal_tz
+    transitions, offsets, span = tz.transition_table()
+    assert offsets[:3] == [-5 * 3600, -4 * 3600, -5 * 3600]
+
+    # On 2018-03-11 at 2:00 EST, clocks were turned forward to 3:00 EDT
+    # and on 2018-11-04 at 2:00 EDT, they were turned back to 1:00 EST.
+    spring, fall = 1520751600, 1541311200
+    assert spring in transitions and fall in transitions
+    for timestamp in range(spring - 7200, fall + 7200, 1799):
+        assert tz.offset_at(timestamp) == time.localtime(timestamp).tm_gmtoff
+
+    # Test the conversions of a local time that was repeated.
+    first = datetime.fromtimestamp(fall - 1800, tz)
+    second = datetime.fromtimestamp(fall + 1800, tz)
+    assert first.replace(tzinfo=None) == second.replace(tzinfo=None)
+    assert (first.fold, second.fold) == (0, 1)
+    assert first.timestamp() == fall - 1800
+    assert second.timestamp() == fall + 1800
+    assert first.tzname() == 'EDT' and second.tzname() == 'EST'
+    assert tz.day_ordinal(fall) == datetime(2018, 11, 4).toordinal()
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+A service to convert UTC timestamps to and from the local timezone using
+a table of the transitions of the local timezone that is computed once
+per session.
+"""
+
+# ---- Standard imports
+
+from bisect import bisect_right
+from calendar import timegm
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+import time
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def _localtime_offset(timestamp):
+    """Return the UTC offset in seconds of the local timezone at timestamp."""
+    return time.localtime(timestamp).tm_gmtoff
+
+
+@lru_cache(maxsize=None)
+def _fixed_timezone(offset, name):
+    """Return the fixed offset timezone with the UTC offset in seconds."""
+    return timezone(timedelta(seconds=offset), name)
+
+
+class LocalTimezone(tzinfo):
+    """
+    The local timezone of the system as a tzinfo object.
+
+    The UTC offsets of the local timezone and the timestamps of its
+    transitions, from daylight saving time for instance, are computed
+    the first time they are needed for the years FIRST_YEAR to LAST_YEAR.
+    The offset at any timestamp is then found by bisecting the table of
+    transitions, instead of asking the system for each conversion.
+    """
+    FIRST_YEAR = 1970
+    LAST_YEAR = 2037
+
+    def __init__(self):
+        super(LocalTimezone, self).__init__()
+        self._transitions = None
+        self._offsets = None
+        self._span = None
+
+    def __reduce__(self):
+        return (get_local_timezone, ())
+
+    def __repr__(self):
+        return 'LocalTimezone()'
+
+    def _build_transitions(self):
+        """
+        Build the table of the transitions of the local timezone by
+        sampling its UTC offset every day and bisecting the days when
+        the offset changed to the second.
+        """
+        start = timegm((self.FIRST_YEAR, 1, 1, 0, 0, 0))
+        stop = timegm((self.LAST_YEAR + 1, 1, 1, 0, 0, 0))
+        transitions = []
+        offsets = [_localtime_offset(start)]
+        timestamp = start
+        while timestamp < stop:
+            try:
+                offset = _localtime_offset(timestamp + 86400)
+            except (OverflowError, OSError, ValueError):
+                stop = timestamp
+                break
+            if offset != offsets[-1]:
+                low, high = timestamp, timestamp + 86400
+                while high - low > 1:
+                    middle = (low + high) // 2
+                    if _localtime_offset(middle) == offsets[-1]:
+                        low = middle
+                    else:
+                        high = middle
+                transitions.append(high)
+                offsets.append(offset)
+            timestamp += 86400
+        self._span = (start, stop)
+        self._offsets = offsets
+        self._transitions = transitions
+
+    def transition_table(self):
+        """
+        Return the sorted UTC timestamps of the transitions of the local
+        timezone, the UTC offsets before the first and after each of the
+        transitions, and the span of timestamps covered by the table.
+        """
+        if self._transitions is None:
+            self._build_transitions()
+        return self._transitions, self._offsets, self._span
+
+    # ---- Conversions
+
+    def offset_at(self, timestamp):
+        """
+        Return the UTC offset in seconds of the local timezone at the
+        UTC timestamp.
+        """
+        if self._transitions is None:
+            self._build_transitions()
+        if not self._span[0] <= timestamp < self._span[1]:
+            return _localtime_offset(timestamp)
+        return self._offsets[bisect_right(self._transitions, timestamp)]
+
+    def to_local(self, timestamp):
+        """Return the local wall clock time of the UTC timestamp in seconds."""
+        return timestamp + self.offset_at(timestamp)
+
+    def from_local(self, local_timestamp, fold=0):
+        """
+        Return the UTC timestamp of a local wall clock time in seconds.
+
+        If the local time is repeated because clocks were turned back, the
+        first occurrence is returned, or the second if fold is 1. If the
+        local time was skipped because clocks were turned forward, it is
+        converted with the offset from before the transition.
+        """
+        offset_before = self.offset_at(local_timestamp - 86400)
+        offset_after = self.offset_at(local_timestamp + 86400)
+        candidates = sorted(
+            local_timestamp - offset for offset in
+            {offset_before, offset_after} if
+            self.offset_at(local_timestamp - offset) == offset)
+        if not candidates:
+            return local_timestamp - offset_before
+        return candidates[-1] if fold else candidates[0]
+
+    def fixed_timezone(self, timestamp):
+        """
+        Return a tzinfo object with the fixed UTC offset of the local
+        timezone at the UTC timestamp.
+
+        Datetimes that share a tzinfo object are subtracted and compared
+        with their wall clock times, which is wrong across daylight saving
+        time changes when the tzinfo object is the local timezone. The
+        datetimes of instants with a different UTC offset get a different
+        fixed offset tzinfo object instead, so that they are subtracted and
+        compared with their UTC times.
+        """
+        offset = self.offset_at(timestamp)
+        return _fixed_timezone(offset, time.localtime(timestamp).tm_zone)
+
+    def localtime(self, timestamp):
+        """Return the local time struct of the UTC timestamp."""
+        return time.gmtime(self.to_local(timestamp))
+
+    def day_ordinal(self, timestamp):
+        """Return the ordinal of the local date of the UTC timestamp."""
+        # The ordinal of 1970-01-01 is 719163.
+        return int(self.to_local(timestamp) // 86400) + 719163
+
+    # ---- tzinfo interface
+
+    def _local_timestamp(self, dt):
+        return (dt.replace(tzinfo=None) - EPOCH) // timedelta(seconds=1)
+
+    def utcoffset(self, dt):
+        timestamp = self.from_local(self._local_timestamp(dt), dt.fold)
+        return timedelta(seconds=self.offset_at(timestamp))
+
+    def dst(self, dt):
+        timestamp = self.from_local(self._local_timestamp(dt), dt.fold)
+        return timedelta(seconds=self.offset_at(timestamp) + time.timezone)
+
+    def tzname(self, dt):
+        timestamp = self.from_local(self._local_timestamp(dt), dt.fold)
+        return time.localtime(timestamp).tm_zone
+
+    def fromutc(self, dt):
+        timestamp = self._local_timestamp(dt)
+        local_timestamp = self.to_local(timestamp)
+        local_dt = dt + timedelta(seconds=local_timestamp - timestamp)
+        if self.from_local(local_timestamp) != timestamp:
+            # The local time is repeated after clocks were turned back
+            # and this is its second occurrence.
+            local_dt = local_dt.replace(fold=1)
+        return local_dt
+
+
+_LOCAL_TIMEZONE = LocalTimezone()
+
+
+def get_local_timezone():
+    """Return the local timezone shared by the whole application."""
+    return _LOCAL_TIMEZONE
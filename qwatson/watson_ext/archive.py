@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+A compressed archive of the frames of the closed years of the QWatson
+client, so that the old frames are not parsed, kept in memory and rewritten
+with the live frames.
+"""
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+import json
+import gzip
+import tempfile
+import threading
+from collections import namedtuple
+
+# ---- Local imports
+
+from qwatson.watson_ext.rollups import DurationRollups
+from qwatson.watson_ext.shardstore import month_key, shard_totals
+
+ARCHIVE_DIRNAME = 'archive'
+MANIFEST_FILENAME = 'manifest.json'
+
+# The fields of the rows that are needed to compute the rollups of a year.
+RowFrame = namedtuple(
+    'RowFrame', ['start_timestamp', 'stop_timestamp', 'project', 'tags'])
+
+
+def year_key(timestamp):
+    """Return the key 'YYYY' of the local year of a timestamp."""
+    return month_key(timestamp)[:4]
+
+
+def year_aggregates(rows):
+    """
+    Return the number of frames and total duration of the rows of a year
+    and of their projects and tags, with their daily duration rollups.
+    """
+    aggregates = shard_totals(rows)
+    aggregates['rollups'] = DurationRollups(
+        RowFrame(row[0], row[1], row[2], row[4] or []) for row in rows
+        ).dump()
+    return aggregates
+
+
+def atomic_write(filename, data):
+    """
+    Write the bytes to a temporary file that then replaces the file, so
+    that the file is never left partially written.
+    """
+    fd, tmpname = tempfile.mkstemp(
+        dir=osp.dirname(filename) or None, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmpname, filename)
+    except Exception:
+        try:
+            os.unlink(tmpname)
+        except OSError:
+            pass
+        raise
+
+
+class FramesArchive(object):
+    """
+    An archive, in a directory of the QWatson config dir, of the frames of
+    the closed years, with one gzip compressed JSON file per local year in
+    the format of the frames file of Watson and a manifest with the number
+    of frames, the total duration of each project and tag and the daily
+    duration rollups of each year.
+
+    The file of an archived year is only read when its frames are needed.
+    Archived frames cannot be edited, so the files are not rewritten when
+    the frames are saved, but only when more frames are archived in a year
+    or when a project is renamed or deleted.
+    """
+
+    def __init__(self, dirname):
+        self.dirname = dirname
+        self.filename = osp.join(dirname, MANIFEST_FILENAME)
+        self._manifest = None
+        self._lock = threading.RLock()
+
+    @property
+    def manifest(self):
+        """Return the manifest of the archive and read it if needed."""
+        if self._manifest is None:
+            try:
+                with open(self.filename) as f:
+                    self._manifest = json.load(f)
+            except (IOError, ValueError):
+                self._manifest = {'years': {}}
+        return self._manifest
+
+    def exists(self):
+        """Return whether the manifest of the archive exists on the disk."""
+        return osp.exists(self.filename)
+
+    def years(self):
+        """Return the sorted list of the keys of the archived years."""
+        with self._lock:
+            return sorted(self.manifest['years'])
+
+    def year_filename(self, year):
+        """Return the path of the compressed file of the archived year."""
+        return osp.join(self.dirname, year + '.json.gz')
+
+    def totals(self, years):
+        """
+        Return the number of frames and total duration of each project and
+        tag of the archived years, from the manifest.
+        """
+        totals = {'projects': {}, 'tags': {}}
+        with self._lock:
+            for year in years:
+                aggregates = self.manifest['years'][year]
+                for name in ('projects', 'tags'):
+                    for value, (count, duration) in aggregates[name].items():
+                        old_count, old_duration = totals[name].get(
+                            value, (0, 0))
+                        totals[name][value] = [old_count + count,
+                                               old_duration + duration]
+        return totals
+
+    def rollups(self, years):
+        """
+        Return the list of the daily duration rollups of the archived years,
+        as returned by DurationRollups.dump, from the manifest.
+        """
+        with self._lock:
+            return [self.manifest['years'][year]['rollups'] for year in years]
+
+    # ---- Load
+
+    def _read_year(self, year):
+        try:
+            with open(self.year_filename(year), 'rb') as f:
+                return json.loads(gzip.decompress(f.read()).decode('utf-8'))
+        except IOError:
+            return []
+
+    def load(self, years):
+        """
+        Return the list of the frames of the archived years, in the same
+        format as in the JSON frames file of Watson.
+        """
+        with self._lock:
+            rows = []
+            for year in sorted(years):
+                rows.extend(self._read_year(year))
+            return rows
+
+    # ---- Save
+
+    def add_rows(self, rows):
+        """
+        Archive the rows, formatted as in the frames file of Watson, in
+        the files of their local year.
+        """
+        with self._lock:
+            years = {}
+            for row in rows:
+                year = year_key(row[0])
+                if year not in years:
+                    years[year] = self._read_year(year)
+                years[year].append(list(row))
+            self._write_years(years)
+
+    def rename_project(self, old_name, new_name):
+        """Rename the project of the archived frames of the project."""
+        with self._lock:
+            years = self._years_of_project(old_name)
+            for rows in years.values():
+                for row in rows:
+                    if row[2] == old_name:
+                        row[2] = new_name
+            self._write_years(years)
+
+    def delete_project(self, project):
+        """Delete the archived frames of the project."""
+        with self._lock:
+            years = self._years_of_project(project)
+            self._write_years({
+                year: [row for row in rows if row[2] != project] for
+                year, rows in years.items()})
+
+    def _years_of_project(self, project):
+        """Return the rows of the archived years that contain the project."""
+        return {year: self._read_year(year) for year, aggregates in
+                self.manifest['years'].items() if
+                project in aggregates['projects']}
+
+    def _write_years(self, years):
+        """
+        Write the compressed rows of the years, delete the years without
+        rows and update the aggregates of the years in the manifest.
+        """
+        if not years:
+            return
+        if not osp.isdir(self.dirname):
+            os.makedirs(self.dirname)
+        for year, rows in years.items():
+            if rows:
+                rows.sort(key=lambda row: (row[0], row[1], row[3]))
+                atomic_write(self.year_filename(year), gzip.compress(
+                    json.dumps(rows, ensure_ascii=False).encode('utf-8')))
+                self.manifest['years'][year] = year_aggregates(rows)
+            else:
+                try:
+                    os.remove(self.year_filename(year))
+                except OSError:
+                    pass
+                self.manifest['years'].pop(year, None)
+        atomic_write(self.filename, json.dumps(
+            self.manifest, ensure_ascii=False).encode('utf-8'))
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+A read-only columnar view of the frames of the QWatson client for
+vectorized analytics. This module requires NumPy, which is an optional
+dependency of QWatson.
+"""
+
+# ---- Third party imports
+
+import numpy as np
+
+# ---- Local imports
+
+from qwatson.utils.timezone import get_local_timezone
+
+
+def local_utc_offsets(timestamps):
+    """
+    Return the offsets in seconds of the local timezone from UTC at each
+    of the timestamps, by searching the table of the transitions of the
+    local timezone for all the timestamps at once.
+    """
+    tz = get_local_timezone()
+    transitions, offsets, span = tz.transition_table()
+    offsets = np.array(offsets, dtype=np.int64)[np.searchsorted(
+        np.array(transitions, dtype=np.int64), timestamps, side='right')]
+    for i in np.flatnonzero((timestamps < span[0]) | (timestamps >= span[1])):
+        offsets[i] = tz.offset_at(int(timestamps[i]))
+    return offsets
+
+
+class FramesColumns(object):
+    """
+    A read-only columnar view of frames.
+
+    The start and stop timestamps are stored in int64 arrays, the projects
+    as codes in an int32 array that index the sorted list of projects, and
+    the tags as a boolean incidence matrix with a row per frame and a
+    column per tag of the sorted list of tags. After the view was edited,
+    these lists may include projects and tags that no frame has anymore.
+    """
+
+    def __init__(self, frames):
+        self.version = getattr(frames, 'version', None)
+        self.projects = sorted(set(frame.project for frame in frames))
+        self.tags = sorted(set(
+            tag for frame in frames for tag in frame.tags or []))
+        (self.starts, self.stops, self.project_codes,
+         self.tag_matrix) = self._columns_of(frames)
+        self._freeze()
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _columns_of(self, frames):
+        """
+        Return the arrays of the columns of the frames, which must only have
+        projects and tags from the lists of the view.
+        """
+        nframes = len(frames)
+        starts = np.fromiter(
+            (frame.start_timestamp for frame in frames), np.int64, nframes)
+        stops = np.fromiter(
+            (frame.stop_timestamp for frame in frames), np.int64, nframes)
+
+        codes = {project: i for i, project in enumerate(self.projects)}
+        project_codes = np.fromiter(
+            (codes[frame.project] for frame in frames), np.int32, nframes)
+
+        codes = {tag: i for i, tag in enumerate(self.tags)}
+        tag_matrix = np.zeros((nframes, len(self.tags)), dtype=bool)
+        for row, frame in enumerate(frames):
+            tag_matrix[row, [codes[tag] for tag in frame.tags or []]] = True
+        return starts, stops, project_codes, tag_matrix
+
+    def _freeze(self):
+        """Make the arrays of the columns read-only."""
+        for array in (self.starts, self.stops, self.project_codes,
+                      self.tag_matrix):
+            array.setflags(write=False)
+
+    def edited(self, edits, version):
+        """
+        Return a new view of the frames at version with the edits of their
+        rows applied to the columns of this view, which is left as is.
+
+        The edits are done in order and are either ('insert', row, frame),
+        ('set', rows, frames) or ('delete', rows). The arrays are copied and
+        edited with NumPy instead of being built anew from all the frames.
+        """
+        new_frames = [frame for edit in edits if edit[0] == 'insert' for
+                      frame in edit[2:]]
+        new_frames += [frame for edit in edits if edit[0] == 'set' for
+                       frame in edit[2]]
+
+        view = FramesColumns.__new__(FramesColumns)
+        view.version = version
+        view.projects = sorted(set(self.projects).union(
+            frame.project for frame in new_frames))
+        view.tags = sorted(set(self.tags).union(
+            tag for frame in new_frames for tag in frame.tags or []))
+
+        # The codes of the projects and the columns of the tags are mapped
+        # to the lists of the new view, which include the new ones.
+        codes = np.searchsorted(view.projects, self.projects).astype(np.int32)
+        starts, stops = self.starts.copy(), self.stops.copy()
+        project_codes = codes[self.project_codes]
+        tag_matrix = np.zeros((len(self), len(view.tags)), dtype=bool)
+        tag_matrix[:, np.searchsorted(view.tags, self.tags)] = self.tag_matrix
+        for edit in edits:
+            if edit[0] == 'delete':
+                rows = sorted(edit[1])
+                starts, stops, project_codes, tag_matrix = (
+                    np.delete(array, rows, axis=0) for array in
+                    (starts, stops, project_codes, tag_matrix))
+            elif edit[0] == 'insert':
+                starts, stops, project_codes, tag_matrix = (
+                    np.insert(array, edit[1], values, axis=0) for
+                    array, values in zip(
+                        (starts, stops, project_codes, tag_matrix),
+                        view._columns_of([edit[2]])))
+            else:
+                rows = list(edit[1])
+                for array, values in zip(
+                        (starts, stops, project_codes, tag_matrix),
+                        view._columns_of(edit[2])):
+                    array[rows] = values
+        view.starts, view.stops = starts, stops
+        view.project_codes, view.tag_matrix = project_codes, tag_matrix
+        view._freeze()
+        return view
+
+    # ---- Columns
+
+    @property
+    def durations(self):
+        """Return the durations in seconds of the frames."""
+        return self.stops - self.starts
+
+    def day_ordinals(self):
+        """Return the ordinals of the local dates when the frames started."""
+        local_days = (self.starts + local_utc_offsets(self.starts)) // 86400
+        # The ordinal of 1970-01-01 is 719163.
+        return local_days + 719163
+
+    def mask(self, start=None, stop=None, projects=None, tags=None):
+        """
+        Return a boolean mask of the frames that started between the start
+        and stop timestamps inclusively, whose project is in projects and
+        that have any of the tags.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self.starts >= start
+        if stop is not None:
+            mask &= self.starts <= stop
+        if projects is not None:
+            codes = [i for i, project in enumerate(self.projects) if
+                     project in projects]
+            mask &= np.isin(self.project_codes, codes)
+        if tags is not None:
+            codes = [i for i, tag in enumerate(self.tags) if tag in tags]
+            mask &= self.tag_matrix[:, codes].any(axis=1)
+        return mask
+
+    # ---- Group-bys
+
+    def project_totals(self, mask=None):
+        """
+        Return a dict with the total duration in seconds of the frames of
+        each project, for all the frames or only those of the mask.
+        """
+        codes, durations = self.project_codes, self.durations
+        if mask is not None:
+            codes, durations = codes[mask], durations[mask]
+        totals = np.bincount(codes, weights=durations,
+                             minlength=len(self.projects))
+        return {project: int(total) for project, total in
+                zip(self.projects, totals) if total}
+
+    def tag_totals(self, mask=None):
+        """
+        Return a dict with the total duration in seconds of the frames of
+        each tag, for all the frames or only those of the mask.
+        """
+        matrix, durations = self.tag_matrix, self.durations
+        if mask is not None:
+            matrix, durations = matrix[mask], durations[mask]
+        totals = durations @ matrix
+        return {tag: int(total) for tag, total in zip(self.tags, totals) if
+                total}
+
+    def day_totals(self, mask=None):
+        """
+        Return the sorted array of the ordinals of the local days in which
+        frames started and the array of the total duration in seconds of
+        the frames of each of these days.
+        """
+        days, durations = self.day_ordinals(), self.durations
+        if mask is not None:
+            days, durations = days[mask], durations[mask]
+        days, inverse = np.unique(days, return_inverse=True)
+        return days, np.bincount(inverse, weights=durations).astype(np.int64)
+
+    # ---- Checks
+
+    def overlaps(self):
+        """
+        Return the array of the rows of the frames that start before any of
+        the frames above them has stopped. The frames must be sorted
+        chronologically, as they are in the Frames.
+        """
+        if len(self) < 2:
+            return np.array([], dtype=np.int64)
+        max_stops = np.maximum.accumulate(self.stops)
+        return np.flatnonzero(self.starts[1:] < max_stops[:-1]) + 1
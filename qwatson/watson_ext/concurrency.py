@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+An advisory lock of the data dir of the QWatson client shared between
+processes, and the merge of the frames that were changed concurrently by
+another process.
+"""
+
+# ---- Standard imports
+
+import errno
+import time
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # The lock file is locked with msvcrt on Windows.
+    fcntl = None
+    import msvcrt
+
+
+LOCK_FILENAME = 'qwatson.lock'
+
+
+class DataDirLock(object):
+    """
+    An advisory lock on a lock file of the data dir that is held while
+    the files of the data dir are written, so that several processes
+    that use this lock never write these files at the same time.
+
+    The lock is reentrant within a process and is only held for the time
+    of the writes, so that several writers can save in turn without
+    waiting for each other for long. An OSError is raised if the lock
+    cannot be acquired within timeout seconds.
+    """
+
+    def __init__(self, filename, timeout=10):
+        self.filename = filename
+        self.timeout = timeout
+        self._thread_lock = threading.RLock()
+        self._count = 0
+        self._file = None
+
+    def acquire(self):
+        """Acquire the lock, waiting for other processes to release it."""
+        self._thread_lock.acquire()
+        if self._count == 0:
+            try:
+                self._lock_file()
+            except Exception:
+                self._thread_lock.release()
+                raise
+        self._count += 1
+
+    def release(self):
+        """Release the lock."""
+        self._count -= 1
+        if self._count == 0:
+            self._unlock_file()
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+    def _lock_file(self):
+        f = open(self.filename, 'a+')
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    f.close()
+                    raise OSError(errno.ETIMEDOUT,
+                                  'Timed out waiting for the lock',
+                                  self.filename)
+                time.sleep(0.01)
+        self._file = f
+
+    def _unlock_file(self):
+        f, self._file = self._file, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            f.close()
+
+
+def merge_frames(rows, disk_rows, changed_ids=None, deleted_ids=()):
+    """
+    Merge the rows of the frames of the client with the rows of the frames
+    file saved by another process since it was last synced, by frame id
+    and updated_at, and return the merged rows in chronological order.
+
+    The frames that are in both are merged by keeping the one that was
+    updated last. The frames that are only in the frames file are kept,
+    unless the client deleted them. The frames that are only in the client
+    are kept if they were inserted or edited by the client since the frames
+    file was last synced, since they were otherwise deleted by the other
+    process. All of them are kept if changed_ids is None.
+    """
+    disk_frames = {row[3]: row for row in disk_rows}
+    merged = []
+    for row in rows:
+        disk_row = disk_frames.pop(row[3], None)
+        if disk_row is None:
+            if changed_ids is None or row[3] in changed_ids:
+                merged.append(row)
+        elif disk_row[5] > row[5]:
+            merged.append(disk_row)
+        else:
+            merged.append(row)
+    merged.extend(row for frame_id, row in disk_frames.items() if
+                  frame_id not in deleted_ids)
+    merged.sort(key=lambda row: row[0])
+    return merged
+
+
+def merge_synced_frames(rows, disk_rows, synced_ids):
+    """
+    Merge the rows of the frames of a store with the rows of the frames
+    file, using the ids of the frames that were in the frames file when it
+    was last imported in or exported from the store.
+
+    The frames of the store that are not in synced_ids were added to the
+    store since then and are kept, while the other frames of the store
+    that are no longer in the frames file were deleted by another process.
+    The frames of the frames file that are in synced_ids but that are no
+    longer in the store were deleted from the store since then.
+    """
+    ids = {row[3] for row in rows}
+    return merge_frames(rows, disk_rows, ids - synced_ids, synced_ids - ids)
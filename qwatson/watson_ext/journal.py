@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+An append-only journal of the changes made to the frames, so that a small
+edit does not require rewriting the whole frames file to the disk.
+"""
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+import json
+
+
+JOURNAL_EXT = '.journal'
+JOURNAL_MAX_RECORDS = 500
+
+
+class FramesJournal(object):
+    """
+    A journal file stored next to the frames file where the inserts, edits
+    and deletes of frames are appended as one JSON record per line.
+
+    The frames file itself is left untouched, so that it stays readable by
+    the Watson CLI, until the journal is compacted into it.
+    """
+
+    def __init__(self, frames_file):
+        self.filename = frames_file + JOURNAL_EXT
+        self.record_count = None
+
+        # The size of the journal file as it was last read or written by
+        # this journal, and whether another process appended records to
+        # the journal file since it was last read.
+        self._size = None
+        self._appended_elsewhere = False
+
+    def exists(self):
+        """Return whether there is a journal file on the disk."""
+        return osp.exists(self.filename)
+
+    def read(self):
+        """
+        Return the list of the valid records saved in the journal file.
+
+        Reading stops at the first record that was not completely written
+        to the disk, which can only happen if QWatson crashed while
+        appending to the journal. The journal file is then truncated after
+        the last valid record, so that the next records are not appended
+        on the same line as the torn record.
+        """
+        records = []
+        try:
+            with open(self.filename, 'rb') as f:
+                content = f.read()
+        except IOError:
+            content = b''
+        size = 0
+        for line in content.split(b'\n')[:-1]:
+            try:
+                records.append(json.loads(line.decode('utf-8')))
+            except ValueError:
+                break
+            size += len(line) + 1
+        if size < len(content):
+            try:
+                os.truncate(self.filename, size)
+            except OSError:
+                pass
+        self.record_count = len(records)
+        self._size = size
+        self._appended_elsewhere = False
+        return records
+
+    def append(self, records):
+        """Append the records to the journal file and sync it to the disk."""
+        if not records:
+            return
+        lines = ''.join(
+            json.dumps(record, ensure_ascii=False) + '\n'
+            for record in records)
+        with open(self.filename, 'ab') as f:
+            if f.tell() != (self._size or 0):
+                self._appended_elsewhere = True
+            f.write(lines.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+            self._size = f.tell()
+        self.record_count = (self.record_count or 0) + len(records)
+
+    def clear(self):
+        """Delete the journal file from the disk."""
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass
+        self.record_count = 0
+        self._size = 0
+        self._appended_elsewhere = False
+
+    def changed_elsewhere(self):
+        """
+        Return whether the journal file was changed by another process
+        since it was last read by this journal.
+        """
+        try:
+            size = os.path.getsize(self.filename)
+        except OSError:
+            size = 0
+        return self._appended_elsewhere or size != (self._size or 0)
+
+    def is_full(self, pending=0):
+        """
+        Return whether enough records were appended to the journal, plus
+        the pending records, that it should be compacted into the frames
+        file.
+        """
+        return (self.record_count or 0) + pending >= JOURNAL_MAX_RECORDS
+
+
+def replay_journal(frames, records):
+    """
+    Apply the journal records to frames in the order they were appended.
+
+    Replaying is idempotent, so that a journal that was not cleared after
+    being compacted into the frames file can be replayed again safely. The
+    records of frames that were updated since in the frames file, by the
+    Watson CLI for example, are skipped.
+    """
+    for record in records:
+        op = record[0]
+        if op == 'insert':
+            index, values = record[1], record[2]
+            frame = frames.new_frame(
+                values[2], values[0], values[1], tags=values[4],
+                id=values[3], updated_at=values[5], message=values[6])
+            if not frames.has_id(frame.id):
+                frames.insert_frame(min(index, len(frames)), frame)
+            elif (frames[frame.id].updated_timestamp <=
+                    frame.updated_timestamp):
+                frames[frame.id] = frame
+        elif op == 'edit':
+            values = record[1]
+            frame = frames.new_frame(
+                values[2], values[0], values[1], tags=values[4],
+                id=values[3], updated_at=values[5], message=values[6])
+            if (not frames.has_id(frame.id) or
+                    frames[frame.id].updated_timestamp <=
+                    frame.updated_timestamp):
+                frames[frame.id] = frame
+        elif op == 'delete':
+            if frames.has_id(record[1]):
+                del frames[record[1]]
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+Pre-aggregated daily duration rollups of the frames of the QWatson client.
+"""
+
+# ---- Standard imports
+
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+# ---- Local imports
+
+from qwatson.utils.timezone import get_local_timezone
+
+TZLOCAL = get_local_timezone()
+
+
+def day_ordinal(timestamp):
+    """Return the ordinal of the local date of a timestamp."""
+    return TZLOCAL.day_ordinal(timestamp)
+
+
+def to_day_ordinal(value):
+    """
+    Return the ordinal of the local date of a timestamp, an arrow object
+    or a date.
+    """
+    if isinstance(value, date):
+        return value.toordinal()
+    try:
+        return day_ordinal(value.float_timestamp)
+    except AttributeError:
+        return day_ordinal(value)
+
+
+class DurationSeries(object):
+    """
+    The total duration in seconds of frames for each day, with a Fenwick
+    tree of these durations indexed by the offset of the days from the
+    first day.
+
+    The tree is built on the first query and is then updated in place when
+    durations are added or removed, so that both the updates and the total
+    duration over any range of days take a logarithmic time. It is only
+    rebuilt when a day before the first day is added.
+    """
+
+    def __init__(self):
+        self.days = []
+        self.durations = []
+        self._first_day = None
+        self._tree = None
+
+    def __len__(self):
+        return len(self.days)
+
+    def add(self, day, duration):
+        """Add the duration to the total of the day."""
+        i = bisect_left(self.days, day)
+        if i < len(self.days) and self.days[i] == day:
+            self.durations[i] += duration
+        else:
+            self.days.insert(i, day)
+            self.durations.insert(i, duration)
+        if self._tree is not None:
+            if day < self._first_day:
+                self._tree = None
+            else:
+                self._update_tree(day - self._first_day, duration)
+
+    def remove(self, day, duration):
+        """Remove the duration from the total of the day."""
+        i = bisect_left(self.days, day)
+        self.durations[i] -= duration
+        if self._tree is not None:
+            self._update_tree(day - self._first_day, -duration)
+
+    def total(self, first_day, last_day):
+        """Return the total duration from first_day to last_day inclusively."""
+        if not self.days:
+            return 0
+        if self._tree is None:
+            self._build_tree()
+        first = max(first_day - self._first_day, 0)
+        last = min(last_day - self._first_day + 1, len(self._tree) - 1)
+        if last <= first:
+            return 0
+        return self._prefix_sum(last) - self._prefix_sum(first)
+
+    # ---- Fenwick tree
+
+    def _build_tree(self):
+        """Build the Fenwick tree of the durations in a linear time."""
+        self._first_day = self.days[0]
+        size = self.days[-1] - self._first_day + 1
+        tree = [0] * (size + 1)
+        for day, duration in zip(self.days, self.durations):
+            tree[day - self._first_day + 1] += duration
+        for i in range(1, size + 1):
+            j = i + (i & -i)
+            if j <= size:
+                tree[j] += tree[i]
+        self._tree = tree
+
+    def _prefix_sum(self, i):
+        """Return the total duration of the i first days of the tree."""
+        tree = self._tree
+        total = 0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _update_tree(self, offset, duration):
+        """Add the duration to the day at offset in the tree."""
+        tree = self._tree
+        i = offset + 1
+
+        # The tree is extended up to the day, with the nodes of the days
+        # in between that have no duration.
+        while len(tree) <= i:
+            j = len(tree)
+            tree.append(self._prefix_sum(j - 1) -
+                        self._prefix_sum(j - (j & -j)))
+        while i < len(tree):
+            tree[i] += duration
+            i += i & -i
+
+
+class DurationRollups(object):
+    """
+    Daily duration rollups of frames, for all the frames and for each
+    project and tag. A frame is counted entirely in the local day in
+    which it started.
+
+    The rollups are updated incrementally when frames are added or
+    removed, so that the total time spent between two dates on all the
+    frames, a project or a tag, and the breakdown of that time by project
+    or tag, can be answered without iterating over the frames.
+    """
+
+    def __init__(self, frames=()):
+        self.all = DurationSeries()
+        self.projects = {}
+        self.tags = {}
+        for frame in frames:
+            self.add(frame)
+
+    def add(self, frame, sign=1):
+        """Add the duration of the frame to the rollups."""
+        day = day_ordinal(frame.start_timestamp)
+        duration = sign * (frame.stop_timestamp - frame.start_timestamp)
+        self.all.add(day, duration)
+        self.projects.setdefault(frame.project, DurationSeries()).add(
+            day, duration)
+        for tag in set(frame.tags):
+            self.tags.setdefault(tag, DurationSeries()).add(day, duration)
+
+    def remove(self, frame):
+        """Remove the duration of the frame from the rollups."""
+        self.add(frame, sign=-1)
+
+    def dump(self):
+        """
+        Return the days and durations of the rollups in a dict that can be
+        saved in the JSON format.
+        """
+        return {
+            'all': [self.all.days, self.all.durations],
+            'projects': {project: [series.days, series.durations] for
+                         project, series in self.projects.items()},
+            'tags': {tag: [series.days, series.durations] for
+                     tag, series in self.tags.items()}}
+
+    def add_dump(self, dump):
+        """Add the days and durations of rollups returned by dump."""
+        for series, (days, durations) in [(self.all, dump['all'])] + [
+                (self.projects.setdefault(project, DurationSeries()), value)
+                for project, value in dump['projects'].items()] + [
+                (self.tags.setdefault(tag, DurationSeries()), value)
+                for tag, value in dump['tags'].items()]:
+            for day, duration in zip(days, durations):
+                series.add(day, duration)
+
+    # ---- Queries
+
+    def total(self, start, stop, project=None, tag=None):
+        """
+        Return the total duration in seconds of the frames that started
+        between the days of the start and stop dates inclusively, for all
+        the frames or only for those of the project or tag.
+        """
+        if project is not None:
+            series = self.projects.get(project)
+        elif tag is not None:
+            series = self.tags.get(tag)
+        else:
+            series = self.all
+        if series is None:
+            return 0
+        return series.total(to_day_ordinal(start), to_day_ordinal(stop))
+
+    def project_totals(self, start, stop):
+        """
+        Return a dict with the total duration in seconds of each project
+        between the days of the start and stop dates inclusively.
+        """
+        return self._breakdown(self.projects, start, stop)
+
+    def tag_totals(self, start, stop):
+        """
+        Return a dict with the total duration in seconds of each tag
+        between the days of the start and stop dates inclusively.
+        """
+        return self._breakdown(self.tags, start, stop)
+
+    def filtered_total(self, start, stop, project_filters=None):
+        """
+        Return the total duration in seconds of the frames that started
+        between the days of the start and stop dates inclusively and whose
+        project is accepted by the project filters.
+        """
+        if project_filters is None or all(project_filters.values()):
+            return self.total(start, stop)
+        first_day, last_day = to_day_ordinal(start), to_day_ordinal(stop)
+        return sum(series.total(first_day, last_day) for project, series in
+                   self.projects.items() if
+                   project_filters.get(project, True))
+
+    def _breakdown(self, series_dict, start, stop):
+        first_day, last_day = to_day_ordinal(start), to_day_ordinal(stop)
+        totals = {}
+        for key, series in series_dict.items():
+            total = series.total(first_day, last_day)
+            if total:
+                totals[key] = total
+        return totals
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+An optional storage backend that saves the frames of the QWatson client
+in one file per month, so that only the months that are shown need to be
+loaded and only the months that are edited need to be written.
+"""
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+import json
+import threading
+import calendar
+
+# ---- Third party imports
+
+from watson.watson import make_json_writer, safe_save
+
+# ---- Local imports
+
+from qwatson.utils.timezone import get_local_timezone
+from qwatson.watson_ext.concurrency import merge_synced_frames
+from qwatson.watson_ext.sqlitestore import file_signature
+
+SHARDS_DIRNAME = 'shards'
+MANIFEST_FILENAME = 'manifest.json'
+SYNCED_IDS_FILENAME = 'frames_file_ids.json'
+TZLOCAL = get_local_timezone()
+
+
+def month_key(timestamp):
+    """Return the key 'YYYY-MM' of the local month of a timestamp."""
+    local_time = TZLOCAL.localtime(timestamp)
+    return '%04d-%02d' % (local_time.tm_year, local_time.tm_mon)
+
+
+def month_start(month):
+    """Return the UTC timestamp of the start of the local month of a key."""
+    year, month = map(int, month.split('-'))
+    return TZLOCAL.from_local(calendar.timegm((year, month, 1, 0, 0, 0)))
+
+
+def shard_totals(rows):
+    """
+    Return the number of frames and their total duration in seconds, for
+    all the rows of a shard and for each of their projects and tags.
+    """
+    totals = {'count': 0, 'duration': 0, 'projects': {}, 'tags': {}}
+    for row in rows:
+        duration = row[1] - row[0]
+        totals['count'] += 1
+        totals['duration'] += duration
+        for key, values in [('projects', [row[2]]),
+                            ('tags', set(row[4] or []))]:
+            for value in values:
+                count, total = totals[key].get(value, (0, 0))
+                totals[key][value] = [count + 1, total + duration]
+    return totals
+
+
+class ShardedFramesStore(object):
+    """
+    A store that saves the frames in a directory with one JSON file per
+    local month, in the format of the frames file of Watson, and a small
+    manifest with the number of frames and total duration of each shard
+    and of their projects and tags.
+
+    The store keeps track of the month of the frames it loaded, so that
+    the changes recorded by the Frames are applied by rewriting only the
+    shards they touch. The frames can be imported from and exported to a
+    single frames file, so that the Watson CLI can still be used with
+    QWatson data.
+    """
+
+    def __init__(self, dirname):
+        self.dirname = dirname
+        self.filename = osp.join(dirname, MANIFEST_FILENAME)
+        self._manifest = None
+        self._id_months = {}
+        self._lock = threading.RLock()
+
+    @property
+    def manifest(self):
+        """Return the manifest of the store and read it if needed."""
+        if self._manifest is None:
+            try:
+                with open(self.filename) as f:
+                    self._manifest = json.load(f)
+            except (IOError, ValueError):
+                self._manifest = {'frames_file_signature': None,
+                                  'shards': {}}
+        return self._manifest
+
+    def exists(self):
+        """Return whether the manifest of the store exists on the disk."""
+        return osp.exists(self.filename)
+
+    def months(self):
+        """Return the sorted list of the keys of the months of the shards."""
+        with self._lock:
+            return sorted(self.manifest['shards'])
+
+    def shard_filename(self, month):
+        """Return the path of the file of the shard of the month."""
+        return osp.join(self.dirname, month + '.json')
+
+    def startup_month(self, timestamp):
+        """
+        Return the key of the month from which the frames are loaded at
+        startup, so that the frames of the week before the timestamp and
+        the last frame are loaded, or None if all the months are loaded.
+        """
+        months = self.months()
+        if not months:
+            return None
+        month = min(month_key(timestamp - 7 * 86400), months[-1])
+        return None if month <= months[0] else month
+
+    def totals_before(self, month):
+        """
+        Return the number of frames and total duration of each project and
+        tag of the shards of the months before month, from the manifest.
+        """
+        totals = {'projects': {}, 'tags': {}}
+        if month is None:
+            return totals
+        with self._lock:
+            for key, shard in self.manifest['shards'].items():
+                if key >= month:
+                    continue
+                for name in ('projects', 'tags'):
+                    for value, (count, duration) in shard[name].items():
+                        old_count, old_duration = totals[name].get(
+                            value, (0, 0))
+                        totals[name][value] = [old_count + count,
+                                               old_duration + duration]
+        return totals
+
+    # ---- Load
+
+    def _read_shard(self, month):
+        try:
+            with open(self.shard_filename(month)) as f:
+                return json.load(f)
+        except IOError:
+            return []
+
+    def load(self, since=None, until=None):
+        """
+        Return the list of the frames of the shards of the months from
+        since inclusively to until exclusively, in chronological order and
+        in the same format as in the JSON frames file of Watson.
+        """
+        with self._lock:
+            rows = []
+            for month in self.months():
+                if ((since is None or month >= since) and
+                        (until is None or month < until)):
+                    shard = self._read_shard(month)
+                    for row in shard:
+                        self._id_months[row[3]] = month
+                    rows.extend(shard)
+            return rows
+
+    # ---- Save
+
+    def apply(self, changes):
+        """
+        Apply the list of changes recorded by the Frames by rewriting only
+        the shards of the months that they touch.
+        """
+        with self._lock:
+            shards = {}
+
+            def get_shard(month):
+                if month not in shards:
+                    shards[month] = {
+                        row[3]: row for row in self._read_shard(month)}
+                return shards[month]
+
+            for change in changes:
+                frame_id = change[-1][3] if change[0] != 'delete' else (
+                    change[1])
+                old_month = self._id_months.pop(frame_id, None)
+                if old_month is not None:
+                    get_shard(old_month).pop(frame_id, None)
+                if change[0] in ('insert', 'edit'):
+                    month = month_key(change[-1][0])
+                    get_shard(month)[frame_id] = list(change[-1])
+                    self._id_months[frame_id] = month
+            self._write_shards({
+                month: list(shard.values()) for month, shard in
+                shards.items()})
+
+    def replace_all(self, frames, since=None):
+        """
+        Replace the frames saved in the shards of the months since the
+        specified month, or of all the months if since is None, by the
+        provided list of frames, formatted as in the frames file of Watson.
+        """
+        with self._lock:
+            shards = {month: [] for month in self.months() if
+                      since is None or month >= since}
+            for frame in frames:
+                month = month_key(frame[0])
+                shards.setdefault(month, []).append(list(frame))
+                self._id_months[frame[3]] = month
+            self._write_shards(shards)
+
+    def _write_shards(self, shards):
+        """
+        Write the rows of the shards, delete the shards without rows and
+        update the totals of the shards in the manifest.
+        """
+        if not osp.isdir(self.dirname):
+            os.makedirs(self.dirname)
+        for month, rows in shards.items():
+            if rows:
+                rows.sort(key=lambda row: (row[0], row[1], row[3]))
+                safe_save(self.shard_filename(month),
+                          make_json_writer(lambda: rows))
+                self.manifest['shards'][month] = shard_totals(rows)
+            else:
+                try:
+                    os.remove(self.shard_filename(month))
+                except OSError:
+                    pass
+                self.manifest['shards'].pop(month, None)
+        self._write_manifest()
+
+    def _write_manifest(self):
+        safe_save(self.filename, make_json_writer(lambda: self.manifest))
+
+    # ---- Import and export
+
+    def is_synced_with(self, frames_file):
+        """
+        Return whether the JSON frames file was not changed since it was
+        last imported in or exported from the store.
+        """
+        if not osp.exists(frames_file):
+            return True
+        return (self.manifest['frames_file_signature'] ==
+                file_signature(frames_file))
+
+    def synced_ids(self):
+        """
+        Return the set of the ids of the frames of the JSON frames file
+        when it was last imported in or exported from the store.
+        """
+        try:
+            with open(osp.join(self.dirname, SYNCED_IDS_FILENAME)) as f:
+                return set(json.load(f))
+        except (IOError, ValueError):
+            return set()
+
+    def _set_synced_ids(self, frames):
+        ids = [frame[3] for frame in frames]
+        safe_save(osp.join(self.dirname, SYNCED_IDS_FILENAME),
+                  make_json_writer(lambda: ids))
+
+    def import_frames_file(self, frames_file):
+        """
+        Merge the frames of the frames file in the store, so that the
+        frames saved in the store since the frames file was last synced
+        are not lost.
+        """
+        try:
+            with open(frames_file) as f:
+                frames = json.load(f)
+        except IOError:
+            frames = []
+        with self._lock:
+            rows = merge_synced_frames(self.load(), frames, self.synced_ids())
+            self._id_months = {}
+            self.replace_all(rows)
+            self._set_synced_ids(frames)
+            self.manifest['frames_file_signature'] = file_signature(
+                frames_file)
+            self._write_manifest()
+
+    def export_frames_file(self, frames_file):
+        """
+        Write the frames of all the shards to a single JSON frames file
+        that can be read by the Watson CLI.
+        """
+        with self._lock:
+            rows = [row for month in self.months() for row in
+                    self._read_shard(month)]
+            safe_save(frames_file, make_json_writer(lambda: rows))
+            self._set_synced_ids(rows)
+            self.manifest['frames_file_signature'] = file_signature(
+                frames_file)
+            self._write_manifest()
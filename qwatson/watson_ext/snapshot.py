@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+A binary snapshot of the parsed frames of the QWatson client, so that the
+JSON frames file does not need to be parsed again at each startup.
+"""
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+import sys
+import marshal
+import hashlib
+import tempfile
+
+
+SNAPSHOT_FILENAME = 'frames.snapshot'
+SNAPSHOT_FORMAT = 1
+
+
+def content_digest(data):
+    """Return the hexadecimal BLAKE2 digest of bytes."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def file_digest(filename):
+    """Return the hexadecimal BLAKE2 digest of the content of a file."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FramesSnapshot(object):
+    """
+    A snapshot file, saved in the QWatson config dir, of the rows of the
+    frames file of Watson and of the sorted indexes of their start and
+    stop dates, in the binary format of the marshal module.
+
+    The snapshot is keyed by the size, modification time and digest of the
+    frames file it was made from, so that it is ignored as soon as the
+    frames file is changed outside of QWatson, by the Watson CLI for
+    example. The frames file itself is never replaced by the snapshot.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def _file_key(self, frames_file):
+        stat = os.stat(frames_file)
+        return (SNAPSHOT_FORMAT, marshal.version, sys.version_info[:2],
+                stat.st_size, stat.st_mtime_ns)
+
+    def load(self, frames_file):
+        """
+        Return the rows and date indexes saved in the snapshot if it was
+        made from the current content of the frames file, else None.
+        """
+        try:
+            with open(self.filename, 'rb') as f:
+                key, digest = marshal.load(f)
+                # The digest of the frames file is only computed if its
+                # size and modification time match those of the snapshot.
+                if (tuple(key) != self._file_key(frames_file) or
+                        digest != file_digest(frames_file)):
+                    return None
+                rows, indexes = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        return rows, indexes
+
+    def save(self, frames_file, rows, indexes=None):
+        """
+        Save the rows of the frames and their date indexes to the snapshot,
+        keyed by the current content of the frames file.
+        """
+        header = (self._file_key(frames_file), file_digest(frames_file))
+        dirname = osp.dirname(self.filename)
+        fd, tmpname = tempfile.mkstemp(dir=dirname or None, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                marshal.dump(header, f)
+                marshal.dump((rows, indexes), f)
+            os.replace(tmpname, self.filename)
+        except Exception:
+            try:
+                os.unlink(tmpname)
+            except OSError:
+                pass
+            raise
+
+    def clear(self):
+        """Delete the snapshot file from the disk."""
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass
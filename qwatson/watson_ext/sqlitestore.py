@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+An optional SQLite storage backend for the frames of the QWatson client.
+"""
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+import json
+import sqlite3
+
+# ---- Third party imports
+
+from watson.watson import make_json_writer, safe_save
+
+# ---- Local imports
+
+from qwatson.watson_ext.concurrency import merge_synced_frames
+
+
+SQLITE_FILENAME = 'frames.sqlite'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frames (
+    id TEXT PRIMARY KEY,
+    start INTEGER NOT NULL,
+    stop INTEGER NOT NULL,
+    project TEXT NOT NULL,
+    updated_at INTEGER,
+    message TEXT);
+CREATE INDEX IF NOT EXISTS frames_start ON frames (start);
+CREATE INDEX IF NOT EXISTS frames_project ON frames (project);
+CREATE TABLE IF NOT EXISTS frame_tags (
+    frame_id TEXT NOT NULL REFERENCES frames (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (frame_id, position));
+CREATE INDEX IF NOT EXISTS frame_tags_tag ON frame_tags (tag);
+CREATE TABLE IF NOT EXISTS frames_file_ids (
+    id TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT);
+"""
+
+
+def file_signature(filename):
+    """Return a string made of the modification time and size of a file."""
+    stat = os.stat(filename)
+    return '%d:%d' % (stat.st_mtime_ns, stat.st_size)
+
+
+class SQLiteFramesStore(object):
+    """
+    A store that saves the frames in a SQLite database instead of a JSON
+    file, so that only the frames that changed are written to the disk.
+
+    The store is only used to persist the frames. All the frames are
+    loaded in memory at startup, where the projects, tags and counts are
+    answered from the indexes of the Frames, which also include the
+    changes that are not saved in the database yet.
+
+    Frames are loaded from the database in chronological order. The frames
+    can be imported from and exported to the JSON frames file format of
+    Watson, so that the Watson CLI can still be used with QWatson data.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._connection = None
+
+    @property
+    def connection(self):
+        """Return the connection to the database and create it if needed."""
+        if self._connection is None:
+            dirname = osp.dirname(self.filename)
+            if dirname and not osp.isdir(dirname):
+                os.makedirs(dirname)
+            # The connection can be used by a write-behind saver on
+            # another thread, since the writes are serialized by the client.
+            self._connection = sqlite3.connect(
+                self.filename, check_same_thread=False)
+            self._connection.execute('PRAGMA foreign_keys = ON')
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def close(self):
+        """Close the connection to the database."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def exists(self):
+        """Return whether the database file exists on the disk."""
+        return osp.exists(self.filename)
+
+    # ---- Load and save
+
+    def load(self):
+        """
+        Return the list of all the frames saved in the database, in the
+        same format as in the JSON frames file of Watson.
+        """
+        tags = {}
+        for frame_id, tag in self.connection.execute(
+                "SELECT frame_id, tag FROM frame_tags "
+                "ORDER BY frame_id, position"):
+            tags.setdefault(frame_id, []).append(tag)
+        return [
+            [start, stop, project, frame_id, tags.get(frame_id, []),
+             updated_at, message]
+            for frame_id, start, stop, project, updated_at, message in
+            self.connection.execute(
+                "SELECT id, start, stop, project, updated_at, message "
+                "FROM frames ORDER BY start, stop, id")]
+
+    def apply(self, changes):
+        """
+        Apply the list of changes recorded by the Frames to the database in
+        a single transaction.
+        """
+        with self.connection as connection:
+            for change in changes:
+                if change[0] in ('insert', 'edit'):
+                    self._write_frame(connection, change[-1])
+                elif change[0] == 'delete':
+                    connection.execute(
+                        "DELETE FROM frames WHERE id = ?", (change[1],))
+
+    def replace_all(self, frames):
+        """
+        Replace all the frames saved in the database by the provided list
+        of frames, formatted as in the JSON frames file of Watson.
+        """
+        with self.connection as connection:
+            connection.execute("DELETE FROM frames")
+            for frame in frames:
+                self._write_frame(connection, frame)
+
+    def _write_frame(self, connection, frame):
+        """Insert or replace the frame and its tags in the database."""
+        if len(frame) == 6:
+            # Frames saved by the Watson CLI have no message.
+            start, stop, project, frame_id, tags, updated_at = frame
+            message = None
+        else:
+            start, stop, project, frame_id, tags, updated_at, message = frame
+        connection.execute(
+            "INSERT OR REPLACE INTO frames "
+            "(id, start, stop, project, updated_at, message) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (frame_id, start, stop, project, updated_at, message))
+        connection.execute(
+            "DELETE FROM frame_tags WHERE frame_id = ?", (frame_id,))
+        connection.executemany(
+            "INSERT INTO frame_tags (frame_id, position, tag) "
+            "VALUES (?, ?, ?)",
+            [(frame_id, i, tag) for i, tag in enumerate(tags or [])])
+
+    # ---- Import and export
+
+    def get_meta(self, key, default=None):
+        """Return the value stored for key in the meta table."""
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def set_meta(self, key, value):
+        """Store the value for key in the meta table."""
+        with self.connection as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, str(value)))
+
+    def is_synced_with(self, frames_file):
+        """
+        Return whether the JSON frames file was not changed since it was
+        last imported in or exported from the database.
+        """
+        if not osp.exists(frames_file):
+            return True
+        return (self.get_meta('frames_file_signature') ==
+                file_signature(frames_file))
+
+    def synced_ids(self):
+        """
+        Return the set of the ids of the frames of the JSON frames file
+        when it was last imported in or exported from the database.
+        """
+        return {row[0] for row in self.connection.execute(
+            "SELECT id FROM frames_file_ids")}
+
+    def _set_synced_ids(self, frames):
+        with self.connection as connection:
+            connection.execute("DELETE FROM frames_file_ids")
+            connection.executemany(
+                "INSERT OR IGNORE INTO frames_file_ids (id) VALUES (?)",
+                [(frame[3],) for frame in frames])
+
+    def import_frames_file(self, frames_file):
+        """
+        Merge the frames of the frames file in the database, so that the
+        frames saved in the database since the frames file was last synced
+        are not lost.
+        """
+        try:
+            with open(frames_file) as f:
+                frames = json.load(f)
+        except IOError:
+            frames = []
+        self.replace_all(
+            merge_synced_frames(self.load(), frames, self.synced_ids()))
+        self._set_synced_ids(frames)
+        self.set_meta('frames_file_signature', file_signature(frames_file))
+
+    def export_frames_file(self, frames_file):
+        """Write all the frames of the database to a JSON frames file."""
+        frames = self.load()
+        safe_save(frames_file, make_json_writer(lambda: frames))
+        self._set_synced_ids(frames)
+        self.set_meta('frames_file_signature', file_signature(frames_file))
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os.path as osp
+
+# ---- Third party imports
+
+import pytest
+from watson.config import ConfigParser
+
+# ---- Local imports
+
+from qwatson.watson_ext.watsonextends import Watson
+
+
+# ---- Fixtures
+
+
+@pytest.fixture
+def frames():
+    """
+    The list of the keyword arguments of the frames that are saved in the
+    frames file of the app directory fixture. Test modules override this
+    fixture to provide their own frames.
+    """
+    return []
+
+
+@pytest.fixture
+def backend():
+    """
+    The frames backend that is selected in the config file of the app
+    directory fixture, or None to keep the default JSON backend.
+    """
+    return None
+
+
+@pytest.fixture
+def appdir(tmpdir, frames, backend):
+    """
+    Temporary app directory fixture with a frames file that contains the
+    frames of the frames fixture and a config file that selects the
+    backend of the backend fixture.
+    """
+    appdir = osp.join(str(tmpdir), 'appdir')
+    client = Watson(config_dir=appdir)
+    for frame in frames:
+        client.frames.add(**frame)
+    if backend is not None:
+        config = ConfigParser()
+        config.add_section('qwatson')
+        config.set('qwatson', 'backend', backend)
+        client.config = config
+    client.save()
+    return appdir
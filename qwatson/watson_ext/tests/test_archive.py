@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+import json
+
+# ---- Third party imports
+
+import pytest
+from watson.config import ConfigParser
+
+# ---- Local imports
+
+from qwatson.utils.dates import local_arrow_from_tuple
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.watson_ext.watsonhelpers import get_frame_nbr_for_project
+
+
+# ---- Fixtures
+
+
+@pytest.fixture
+def frames():
+    """Two frames in each of the years 2015, 2016 and 2018."""
+    frames = []
+    for i, year in enumerate([2015, 2015, 2016, 2016, 2018, 2018]):
+        start = local_arrow_from_tuple((year, 6, 14, 9 + i, 0, 0))
+        frames.append(dict(project='p%d' % (i % 2), start=start,
+                           stop=start.shift(minutes=30), tags=['tag%d' % i],
+                           message='frame #%d' % i))
+    return frames
+
+
+# ---- Tests
+
+
+def test_archive_frames_of_closed_years(appdir):
+    """
+    Test that the frames of the closed years are moved to the archive and
+    that they are only loaded when needed.
+    """
+    client = Watson(config_dir=appdir)
+    assert client.archive_frames(2017) == 4
+    assert client.archive.years() == ['2015', '2016']
+    assert osp.exists(client.archive.year_filename('2015'))
+    assert client.frames.is_archived(client.frames[0])
+    assert not client.frames.is_archived(client.frames[-1])
+    client.compact_journal()
+    with open(client.frames_file) as f:
+        assert [row[-1] for row in json.load(f)] == ['frame #4', 'frame #5']
+
+    # The archived frames are not loaded at startup, but their aggregates
+    # are included in the totals and rollups of the frames.
+    client = Watson(config_dir=appdir)
+    assert len(client.frames) == 2
+    assert client.frames.loaded_since == '2017-01'
+    assert client.projects == ['', 'p0', 'p1']
+    assert get_frame_nbr_for_project(client, 'p0') == 3
+    assert client.frames.tag_durations['tag2'] == 1800
+    day = local_arrow_from_tuple((2016, 6, 14, 0, 0, 0))
+    assert client.rollups.total(day, day) == 3600
+
+    # Fault in the frames of 2016 and then of all the archived years.
+    assert client.load_frames_since(day) == 2
+    assert client.frames.loaded_since == '2016-06'
+    assert [frame.message for frame in client.frames] == [
+        'frame #%d' % i for i in range(2, 6)]
+    assert get_frame_nbr_for_project(client, 'p0') == 3
+    assert client.rollups.total(day, day) == 3600
+    assert client.load_frames_since() == 2
+    assert client.frames.loaded_since is None
+    assert get_frame_nbr_for_project(client, 'p0') == 3
+
+    # The archived frames are exported with the other frames.
+    filename = osp.join(appdir, 'export.json')
+    client.export_frames(filename)
+    with open(filename) as f:
+        assert len(json.load(f)) == 6
+
+
+def test_archived_frames_with_shards_backend(appdir):
+    """
+    Test that the archived years are loaded after the shards of the
+    months that are not loaded yet.
+    """
+    client = Watson(config_dir=appdir)
+    client.archive_frames(2017)
+    client.compact_journal()
+    config = ConfigParser()
+    config.add_section('qwatson')
+    config.set('qwatson', 'backend', 'shards')
+    client.config = config
+    client.save()
+
+    client = Watson(config_dir=appdir)
+    assert len(client.frames) == 2
+    assert client.store.months() == ['2018-06']
+    assert get_frame_nbr_for_project(client, 'p1') == 3
+    assert client.load_frames_since() == 4
+    assert [frame.message for frame in client.frames] == [
+        'frame #%d' % i for i in range(6)]
+    assert get_frame_nbr_for_project(client, 'p1') == 3
+
+
+def test_rename_and_delete_archived_project(appdir):
+    """
+    Test that renaming or deleting a project also rewrites the archived
+    years that contain frames of this project.
+    """
+    client = Watson(config_dir=appdir)
+    client.archive_frames(2017)
+    client.rename_project('p0', 'renamed')
+    client.compact_journal()
+
+    client = Watson(config_dir=appdir)
+    assert client.projects == ['', 'p1', 'renamed']
+    assert get_frame_nbr_for_project(client, 'renamed') == 3
+    client.load_frames_since()
+    assert [frame.project for frame in client.frames] == [
+        'renamed', 'p1'] * 3
+
+    client.delete_project('p1')
+    client = Watson(config_dir=appdir)
+    assert client.projects == ['', 'renamed']
+    assert client.archive.manifest['years']['2015']['count'] == 1
+    assert client.load_frames_since() == 2
+    assert len(client.frames) == 3
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import random
+
+# ---- Third party imports
+
+import pytest
+np = pytest.importorskip('numpy')
+
+# ---- Local imports
+
+from qwatson.utils.dates import local_arrow_from_tuple
+from qwatson.watson_ext.columnar import FramesColumns
+from qwatson.watson_ext.watsonextends import Frames
+
+
+def test_frames_columns():
+    """
+    Test that the columnar view of the frames is kept in sync with the
+    frames and that it answers the same totals as the rollups.
+    """
+    day1 = local_arrow_from_tuple((2018, 6, 14, 9, 0, 0))
+    day2 = day1.shift(days=1)
+
+    frames = Frames()
+    frames.add('p1', day1, day1.shift(hours=1), tags=['a'], id='id1')
+    frames.add('p2', day1.shift(minutes=30), day1.shift(hours=4),
+               tags=['a', 'b'], id='id2')
+    frames.add('p1', day2, day2.shift(hours=3), tags=[], id='id3')
+    columns = frames.columns
+    assert frames.columns is columns
+    assert not columns.starts.flags.writeable
+
+    assert list(columns.durations) == [3600, 3.5 * 3600, 3 * 3600]
+    assert list(columns.day_ordinals()) == [
+        day1.date().toordinal(), day1.date().toordinal(),
+        day2.date().toordinal()]
+    assert columns.project_totals() == frames.rollups.project_totals(
+        day1, day2)
+    assert columns.tag_totals() == frames.rollups.tag_totals(day1, day2)
+    assert list(columns.overlaps()) == [1]
+
+    days, totals = columns.day_totals(columns.mask(projects=['p1']))
+    assert list(days) == [day1.date().toordinal(), day2.date().toordinal()]
+    assert list(totals) == [3600, 3 * 3600]
+    assert columns.tag_totals(columns.mask(tags=['b'])) == {
+        'a': 3.5 * 3600, 'b': 3.5 * 3600}
+
+    # The view is rebuilt after the frames changed.
+    del frames['id2']
+    assert frames.columns is not columns
+    assert len(frames.columns) == 2
+    assert len(frames.columns.overlaps()) == 0
+
+
+def test_frames_columns_edits():
+    """
+    Test that the columnar view updated with the edits of the rows of the
+    frames is the same as the view built anew from the frames.
+    """
+    rng = random.Random(0)
+    frames = Frames()
+    for i in range(40):
+        frames.add('p%d' % rng.randrange(3), 3600 * i, 3600 * i + 1800,
+                   tags=rng.sample(['a', 'b', 'c'], rng.randrange(3)))
+
+    def random_frame(i):
+        return frames.new_frame(
+            rng.choice(['p0', 'p3', 'p4']), 3600 * i, 3600 * i + 900,
+            tags=rng.sample(['a', 'd', 'e'], rng.randrange(3)))
+
+    for i in range(10):
+        columns = frames.columns
+        frames.insert_frame(rng.randrange(len(frames)), random_frame(i))
+        frames[rng.randrange(len(frames))] = random_frame(i)
+        del frames[rng.randrange(len(frames))]
+        rows = rng.sample(range(len(frames)), 3)
+        frames.replace_rows({row: frames[row]._replace(
+            project='p%d' % i, tags=['f']) for row in rows})
+        frames.delete_rows(rng.sample(range(len(frames)), 2))
+
+        edited = frames.columns
+        assert edited is not columns and edited.version == frames.version
+        assert not edited.tag_matrix.flags.writeable
+        built = FramesColumns(frames)
+        assert list(edited.starts) == list(built.starts)
+        assert list(edited.stops) == list(built.stops)
+        assert [edited.projects[code] for code in edited.project_codes] == (
+            [built.projects[code] for code in built.project_codes])
+        assert [{edited.tags[i] for i in np.flatnonzero(row)} for row in
+                edited.tag_matrix] == [
+            {built.tags[i] for i in np.flatnonzero(row)} for row in
+            built.tag_matrix]
+        assert edited.project_totals() == built.project_totals()
+        assert edited.tag_totals() == built.tag_totals()
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+import threading
+
+# ---- Third party imports
+
+import pytest
+
+# ---- Local imports
+
+from qwatson.utils.dates import local_arrow_from_tuple
+from qwatson.watson_ext.concurrency import DataDirLock
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.watson_ext.watsonhelpers import edit_frame_at
+
+
+# ---- Fixtures
+
+
+@pytest.fixture
+def frames():
+    """Four frames that were last updated at the same time."""
+    start = local_arrow_from_tuple((2018, 6, 14, 9, 0, 0))
+    return [dict(project='p%d' % i, start=start.shift(hours=i),
+                 stop=start.shift(hours=i, minutes=30), updated_at=start,
+                 message='frame #%d' % i) for i in range(4)]
+
+
+# ---- Tests
+
+
+def test_data_dir_lock(tmpdir):
+    """
+    Test that the lock is reentrant within a client, but that it cannot be
+    acquired by another client while it is held.
+    """
+    filename = osp.join(str(tmpdir), 'qwatson.lock')
+    lock = DataDirLock(filename)
+    other_lock = DataDirLock(filename, timeout=0.1)
+    with lock:
+        with lock:
+            pass
+        with pytest.raises(OSError):
+            other_lock.acquire()
+    with other_lock:
+        pass
+
+
+def test_concurrent_saves_are_merged(appdir):
+    """
+    Test that the frames saved by another client since they were loaded
+    are merged by id and updated_at instead of being overwritten.
+    """
+    client = Watson(config_dir=appdir)
+    other_client = Watson(config_dir=appdir)
+    client.frames
+    other_client.frames
+
+    # The other client edits the first frame, deletes the last frame and
+    # adds a new frame.
+    edit_frame_at(other_client, 0, message='edited by the other client')
+    del other_client.frames[3]
+    other_client.frames.add('new', 0, 1800, message='new frame')
+    other_client.save()
+    other_client.compact_journal()
+
+    # The client edits the second frame and deletes the third one, which
+    # are appended to the journal and then compacted in the frames file.
+    edit_frame_at(client, 1, message='edited by the client')
+    del client.frames[2]
+    client.save()
+    client.compact_journal()
+    assert client.frames_file_changed()
+
+    frames = Watson(config_dir=appdir).frames
+    assert sorted(frame.message for frame in frames) == [
+        'edited by the client', 'edited by the other client', 'new frame']
+
+    # The journal of another client must not be lost when it is
+    # compacted by the client.
+    client = Watson(config_dir=appdir)
+    other_client = Watson(config_dir=appdir)
+    client.frames
+    other_client.frames
+    other_client.frames.add('journal', 3600, 5400, message='journaled')
+    other_client.save()
+    client.frames.add('client', 7200, 9000, message='compacted')
+    client.save()
+    client.compact_journal()
+    assert sorted(frame.message for frame in
+                  Watson(config_dir=appdir).frames) == [
+        'compacted', 'edited by the client', 'edited by the other client',
+        'journaled', 'new frame']
+
+
+def test_two_writers_do_not_lose_frames(appdir):
+    """
+    Test that no frame is lost when two clients add and save frames at the
+    same time, from two threads.
+    """
+    def add_frames(project):
+        client = Watson(config_dir=appdir)
+        for i in range(50):
+            client.frames.add(project, i * 3600, i * 3600 + 60)
+            client.save()
+            if i % 10 == 0:
+                client.compact_journal()
+        client.compact_journal()
+
+    threads = [threading.Thread(target=add_frames, args=(project,)) for
+               project in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counts = Watson(config_dir=appdir).frames.project_counts
+    assert counts['a'] == 50 and counts['b'] == 50
+
+
+def test_tracked_ids_are_taken_for_writes(appdir, mocker):
+    """
+    Test that the ids of the changed and deleted frames are taken from the
+    client for the write of the frames file, so that the frames changed
+    in the meantime stay tracked, and that these ids are tracked again if
+    the write fails.
+    """
+    client = Watson(config_dir=appdir)
+    ids = list(client.frames['id'])
+    edit_frame_at(client, 0, message='edited')
+    client.queue_save()
+    rows, indexes, changes = client._dump_frames_file()
+    assert changes == ({ids[0]}, set())
+    assert client._changed_ids == set() and client._deleted_ids == set()
+
+    # The first frame is deleted and the second one is edited while the
+    # frames file is written, which fails.
+    del client.frames[0]
+    edit_frame_at(client, 0, message='edited')
+    client.queue_save()
+    mocker.patch('qwatson.watson_ext.watsonextends.safe_save',
+                 side_effect=OSError)
+    with pytest.raises(OSError):
+        client._write_frames_file(rows, indexes, changes)
+    assert client._changed_ids == {ids[1]}
+    assert client._deleted_ids == {ids[0]}
+
+    mocker.stopall()
+    client._write_frames_file(*client._dump_frames_file())
+    assert client._changed_ids == set() and client._deleted_ids == set()
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+import json
+
+# ---- Third party imports
+
+import pytest
+import arrow
+
+# ---- Local imports
+
+from qwatson.utils.dates import local_arrow_from_tuple
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.watson_ext.watsonhelpers import edit_frame_at
+
+
+# ---- Fixtures
+
+
+@pytest.fixture
+def frames():
+    """Three frames of three projects on the same day."""
+    start = local_arrow_from_tuple((2018, 6, 14, 9, 0, 0))
+    return [dict(project='p%d' % i, start=start.shift(hours=i),
+                 stop=start.shift(hours=i, minutes=30),
+                 message='frame #%d' % i) for i in range(3)]
+
+
+def read_frames_file(appdir):
+    with open(osp.join(appdir, 'frames')) as f:
+        return json.load(f)
+
+
+# ---- Tests
+
+
+def test_changes_are_appended_to_journal(appdir):
+    """
+    Test that the changes made to the frames are appended to the journal
+    instead of rewriting the frames file.
+    """
+    client = Watson(config_dir=appdir)
+    assert len(read_frames_file(appdir)) == 3
+    assert not client.journal.exists()
+
+    edit_frame_at(client, 0, message='edited')
+    client.insert(1, 'p3', arrow.now(), arrow.now(), message='inserted')
+    del client.frames[2]
+    client.save()
+
+    assert client.journal.exists()
+    assert client.journal.record_count == 3
+    frames = read_frames_file(appdir)
+    assert len(frames) == 3
+    assert frames[0][-1] == 'frame #0'
+
+    # The changes must be replayed when loading the frames.
+    client = Watson(config_dir=appdir)
+    assert len(client.frames) == 3
+    assert client.frames[0].message == 'edited'
+    assert client.frames[1].message == 'inserted'
+    assert client.frames[2].message == 'frame #2'
+    assert not client.frames.changed
+
+
+def test_compact_journal(appdir):
+    """Test that the journal is compacted correctly in the frames file."""
+    client = Watson(config_dir=appdir)
+    edit_frame_at(client, 1, message='edited')
+    client.save()
+    assert client.journal.exists()
+
+    client.compact_journal()
+    assert not client.journal.exists()
+    frames = read_frames_file(appdir)
+    assert len(frames) == 3
+    assert frames[1][-1] == 'edited'
+
+
+def test_replay_is_idempotent(appdir):
+    """
+    Test that replaying a journal that was already compacted into the frames
+    file does not change the frames.
+    """
+    client = Watson(config_dir=appdir)
+    client.insert(0, 'p3', arrow.now(), arrow.now(), message='inserted')
+    del client.frames[-1]
+    client.save()
+    with open(client.journal.filename) as f:
+        journal = f.read()
+
+    client.compact_journal()
+    with open(client.journal.filename, 'w') as f:
+        f.write(journal)
+
+    client = Watson(config_dir=appdir)
+    assert [frame.message for frame in client.frames] == [
+        'inserted', 'frame #0', 'frame #1']
+
+
+def test_torn_journal_record_is_ignored(appdir):
+    """
+    Test that a record that was partially written to the journal, because
+    of a crash for example, is ignored when replaying the journal.
+    """
+    client = Watson(config_dir=appdir)
+    edit_frame_at(client, 0, message='edited')
+    client.save()
+    with open(client.journal.filename, 'a') as f:
+        f.write('["delete", "%s' % client.frames[1].id)
+
+    client = Watson(config_dir=appdir)
+    assert len(client.frames) == 3
+    assert client.frames[0].message == 'edited'
+    assert client.journal.record_count == 1
+
+
+def test_append_after_torn_journal_record(appdir):
+    """
+    Test that the records appended after a torn record are not lost when
+    the journal is replayed.
+    """
+    client = Watson(config_dir=appdir)
+    edit_frame_at(client, 0, message='edited')
+    client.save()
+    with open(client.journal.filename, 'a') as f:
+        f.write('["delete", "%s' % client.frames[1].id)
+
+    client = Watson(config_dir=appdir)
+    for i in range(3):
+        client.frames.add('p3', arrow.now(), arrow.now(),
+                          message='added #%d' % i)
+        client.save()
+    assert len(client.frames) == 6
+
+    client = Watson(config_dir=appdir)
+    assert len(client.frames) == 6
+    assert client.journal.record_count == 4
+    assert client.frames[0].message == 'edited'
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
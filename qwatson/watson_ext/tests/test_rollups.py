@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import random
+
+# ---- Third party imports
+
+import pytest
+
+# ---- Local imports
+
+from qwatson.utils.dates import local_arrow_from_tuple
+from qwatson.watson_ext.rollups import DurationSeries
+from qwatson.watson_ext.watsonextends import Frames
+
+
+def test_duration_rollups():
+    """
+    Test that the range totals and breakdowns of the duration rollups are
+    kept up to date when frames are added, edited and deleted.
+    """
+    day1 = local_arrow_from_tuple((2018, 6, 14, 9, 0, 0))
+    day2 = day1.shift(days=1)
+    day3 = day1.shift(days=2)
+
+    frames = Frames()
+    frames.add('p1', day1, day1.shift(hours=1), tags=['a'], id='id1')
+    frames.add('p2', day1.shift(hours=2), day1.shift(hours=4),
+               tags=['a', 'b'], id='id2')
+    frames.add('p1', day2, day2.shift(hours=3), tags=[], id='id3')
+    rollups = frames.rollups
+
+    assert rollups.total(day1, day3) == 6 * 3600
+    assert rollups.total(day1, day1) == 3 * 3600
+    assert rollups.total(day2, day3, project='p1') == 3 * 3600
+    assert rollups.total(day1, day2, tag='a') == 3 * 3600
+    assert rollups.total(day3, day3) == 0
+    assert rollups.project_totals(day1, day2) == {'p1': 4 * 3600,
+                                                  'p2': 2 * 3600}
+    assert rollups.tag_totals(day1, day1) == {'a': 3 * 3600, 'b': 2 * 3600}
+    assert rollups.filtered_total(day1, day2, {'p1': False}) == 2 * 3600
+
+    # Move the second frame to the third day and delete the first one.
+    frames['id2'] = frames['id2']._replace(
+        start=day3, stop=day3.shift(hours=1))
+    del frames['id1']
+    frames.add('p3', day3.shift(hours=2), day3.shift(hours=3), id='id4')
+    assert rollups.total(day1, day1) == 0
+    assert rollups.total(day3, day3) == 2 * 3600
+    assert rollups.project_totals(day1, day3) == {
+        'p1': 3 * 3600, 'p2': 3600, 'p3': 3600}
+    assert rollups.tag_totals(day1, day3) == {'a': 3600, 'b': 3600}
+
+
+
+def test_duration_series_updates():
+    """
+    Test that the range totals of a duration series are right when the
+    durations of days before, within and after the days of the series are
+    added and removed between the queries.
+    """
+    series = DurationSeries()
+    durations = {}
+    rand = random.Random(0)
+    for i in range(500):
+        day = rand.randint(100, 200) - (i // 50)
+        if durations.get(day) and rand.random() < 0.3:
+            series.remove(day, durations[day])
+            durations[day] = 0
+        else:
+            duration = rand.randint(1, 3600)
+            series.add(day, duration)
+            durations[day] = durations.get(day, 0) + duration
+        first_day = rand.randint(80, 220)
+        last_day = rand.randint(first_day - 5, 230)
+        assert series.total(first_day, last_day) == sum(
+            duration for day, duration in durations.items() if
+            first_day <= day <= last_day)
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
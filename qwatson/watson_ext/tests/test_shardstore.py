@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+import json
+
+# ---- Third party imports
+
+import pytest
+from watson.watson import safe_save as watson_safe_save
+
+# ---- Local imports
+
+from qwatson.utils.dates import local_arrow_from_tuple
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.watson_ext.watsonhelpers import (
+    edit_frame_at, get_frame_nbr_for_project)
+
+
+# ---- Fixtures
+
+
+@pytest.fixture
+def frames():
+    """Two frames in each of April, May and June 2018."""
+    frames = []
+    for i in range(6):
+        start = local_arrow_from_tuple((2018, 4 + i // 2, 14, 9 + i, 0, 0))
+        frames.append(dict(project='p%d' % (i % 2), start=start,
+                           stop=start.shift(minutes=30),
+                           tags=['tag%d' % i, 'CI'], message='frame #%d' % i))
+    return frames
+
+
+@pytest.fixture
+def backend():
+    """Select the shards backend in the config file."""
+    return 'shards'
+
+
+# ---- Tests
+
+
+def test_import_frames_file_in_shards(appdir):
+    """
+    Test that the frames are imported in one shard per month and that only
+    the shard of the last frame is loaded at startup.
+    """
+    client = Watson(config_dir=appdir)
+    assert not client.store.exists()
+
+    assert len(client.frames) == 2
+    assert client.store.months() == ['2018-04', '2018-05', '2018-06']
+    assert client.frames.loaded_since == '2018-06'
+    assert client.frames[-1].message == 'frame #5'
+    shard = client.store.manifest['shards']['2018-05']
+    assert shard['count'] == 2 and shard['duration'] == 3600
+    assert shard['projects'] == {'p0': [1, 1800], 'p1': [1, 1800]}
+
+    # The totals of the projects and tags include the frames that are
+    # not loaded yet.
+    assert client.projects == ['', 'p0', 'p1']
+    assert get_frame_nbr_for_project(client, 'p0') == 3
+    assert client.tags == ['CI'] + ['tag%d' % i for i in range(6)]
+
+    # Fault in the frames of May and then of all the months.
+    assert client.load_frames_since(
+        local_arrow_from_tuple((2018, 5, 20, 0, 0, 0))) == 2
+    assert client.frames.loaded_since == '2018-05'
+    assert [frame.message for frame in client.frames] == [
+        'frame #2', 'frame #3', 'frame #4', 'frame #5']
+    assert client.load_frames_since() == 2
+    assert client.frames.loaded_since is None
+    assert len(client.frames) == 6
+    assert get_frame_nbr_for_project(client, 'p0') == 3
+
+
+def test_save_touched_shards_only(appdir, mocker):
+    """
+    Test that only the shards of the months touched by the changes made
+    to the frames are written when saving.
+    """
+    client = Watson(config_dir=appdir)
+    client.frames
+    safe_save = mocker.patch(
+        'qwatson.watson_ext.shardstore.safe_save', wraps=watson_safe_save)
+    edit_frame_at(client, 0, message='edited')
+    client.save()
+    assert [osp.basename(call[0][0]) for call in
+            safe_save.call_args_list] == ['2018-06.json', 'manifest.json']
+
+    # Move the first frame of June to May.
+    safe_save.reset_mock()
+    edit_frame_at(client, 0, start=local_arrow_from_tuple(
+        (2018, 5, 31, 9, 0, 0)))
+    client.save()
+    assert [osp.basename(call[0][0]) for call in
+            safe_save.call_args_list] == [
+                '2018-06.json', '2018-05.json', 'manifest.json']
+
+    client = Watson(config_dir=appdir)
+    assert len(client.frames) == 1
+    client.load_frames_since()
+    assert [frame.message for frame in client.frames] == [
+        'frame #0', 'frame #1', 'frame #2', 'frame #3', 'edited',
+        'frame #5']
+
+
+def test_export_frames_file_from_shards(appdir):
+    """
+    Test that the shards are exported to a single frames file when closing
+    and that changes made to the frames file by the Watson CLI are
+    imported.
+    """
+    client = Watson(config_dir=appdir)
+    del client.frames[-1]
+    client.save()
+    client.compact_journal()
+    with open(client.frames_file) as f:
+        frames = json.load(f)
+    assert [frame[-1] for frame in frames] == [
+        'frame #%d' % i for i in range(5)]
+    assert client.store.is_synced_with(client.frames_file)
+
+    # Change the frames file as the Watson CLI would.
+    with open(client.frames_file, 'w') as f:
+        json.dump(frames[:3], f)
+    client = Watson(config_dir=appdir)
+    assert [frame.message for frame in client.frames] == ['frame #2']
+    assert client.store.months() == ['2018-04', '2018-05']
+
+
+def test_import_keeps_frames_not_exported(appdir):
+    """
+    Test that the frames saved in the shards since the frames file was
+    last exported are merged with the changes made to the frames file by
+    the Watson CLI instead of being overwritten.
+    """
+    client = Watson(config_dir=appdir)
+    client.load_frames_since()
+    start = client.frames[-1].start.shift(hours=2)
+    client.frames.add('p2', start, start.shift(hours=1),
+                      message='not exported')
+    client.save()
+
+    # The Watson CLI deletes the first frame and adds a new frame.
+    with open(client.frames_file) as f:
+        frames = json.load(f)
+    new_frame = list(frames[-1])
+    new_frame[3] = 'cli-frame-id'
+    new_frame[6] = 'added by the CLI'
+    with open(client.frames_file, 'w') as f:
+        json.dump(frames[1:] + [new_frame], f)
+
+    expected = ['added by the CLI', 'frame #1', 'frame #2', 'frame #3',
+                'frame #4', 'frame #5', 'not exported']
+    frames = client.reload_frames()
+    assert sorted(frame.message for frame in frames) == expected
+    client = Watson(config_dir=appdir)
+    client.load_frames_since()
+    assert sorted(frame.message for frame in client.frames) == expected
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+import json
+
+# ---- Third party imports
+
+import pytest
+
+# ---- Local imports
+
+from qwatson.utils.dates import local_arrow_from_tuple
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.watson_ext.watsonhelpers import edit_frame_at
+
+
+# ---- Fixtures
+
+
+@pytest.fixture
+def frames():
+    """Three frames of three projects on the same day."""
+    start = local_arrow_from_tuple((2018, 6, 14, 9, 0, 0))
+    return [dict(project='p%d' % i, start=start.shift(hours=i),
+                 stop=start.shift(hours=i, minutes=30),
+                 tags=['tag%d' % i], message='frame #%d' % i)
+            for i in range(3)]
+
+
+# ---- Tests
+
+
+def test_frames_are_loaded_from_snapshot(appdir, mocker):
+    """
+    Test that the frames are loaded from the snapshot that is saved with
+    the frames file instead of parsing the frames file.
+    """
+    client = Watson(config_dir=appdir)
+    assert osp.exists(client.snapshot.filename)
+    expected_frames = list(Watson(config_dir=appdir).frames)
+
+    mocker.patch.object(Watson, '_load_json_file', side_effect=AssertionError)
+    client = Watson(config_dir=appdir)
+    assert list(client.frames) == expected_frames
+    assert client.frames.rows_in_span(
+        expected_frames[1].start, expected_frames[2].start) == [1, 2]
+
+    # Changes saved in the journal must still be replayed.
+    edit_frame_at(client, 0, message='edited')
+    client.save()
+    client = Watson(config_dir=appdir)
+    assert client.frames[0].message == 'edited'
+    assert client.frames[1] == expected_frames[1]
+
+
+def test_snapshot_is_ignored_when_frames_file_changed(appdir):
+    """
+    Test that the frames file is parsed again when it was changed outside
+    of QWatson since the snapshot was saved, and that the snapshot is then
+    updated.
+    """
+    with open(osp.join(appdir, 'frames')) as f:
+        rows = json.load(f)
+    rows[0][2] = 'cli'
+    # Use the format of the Watson CLI, which does not save messages.
+    with open(osp.join(appdir, 'frames'), 'w') as f:
+        json.dump([row[:6] for row in rows], f)
+
+    client = Watson(config_dir=appdir)
+    assert client.frames[0].project == 'cli'
+    assert client.frames[0].message is None
+    assert client.snapshot.load(client.frames_file) is not None
+
+    client.snapshot.clear()
+    assert client.snapshot.load(client.frames_file) is None
+    assert Watson(config_dir=appdir).frames[0].project == 'cli'
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+import json
+
+# ---- Third party imports
+
+import pytest
+
+# ---- Local imports
+
+from qwatson.utils.dates import local_arrow_from_tuple
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.watson_ext.watsonhelpers import (
+    edit_frame_at, get_frame_nbr_for_project)
+
+
+# ---- Fixtures
+
+
+@pytest.fixture
+def frames():
+    """Three frames of two projects on the same day."""
+    start = local_arrow_from_tuple((2018, 6, 14, 9, 0, 0))
+    return [dict(project='p%d' % (i // 2), start=start.shift(hours=i),
+                 stop=start.shift(hours=i, minutes=30),
+                 tags=['tag%d' % i, 'CI'], message='frame #%d' % i)
+            for i in range(3)]
+
+
+@pytest.fixture
+def backend():
+    """Select the sqlite backend in the config file."""
+    return 'sqlite'
+
+
+# ---- Tests
+
+
+def test_import_frames_file(appdir):
+    """
+    Test that the frames are imported from the frames file the first
+    time the database is used.
+    """
+    client = Watson(config_dir=appdir)
+    assert client.store is not None
+    assert not client.store.exists()
+
+    assert len(client.frames) == 3
+    assert client.store.exists()
+    assert len(client.store.load()) == 3
+    assert client.frames[2].tags == ['tag2', 'CI']
+    assert client.projects == ['', 'p0', 'p1']
+    assert client.tags == ['CI', 'tag0', 'tag1', 'tag2']
+    assert get_frame_nbr_for_project(client, 'p0') == 2
+
+
+def test_save_to_database(appdir):
+    """Test that the changes to the frames are saved in the database."""
+    client = Watson(config_dir=appdir)
+    edit_frame_at(client, 0, message='edited', tags=['edited'])
+    del client.frames[1]
+    client.save()
+
+    client = Watson(config_dir=appdir)
+    assert len(client.frames) == 2
+    assert client.frames[0].message == 'edited'
+    assert client.frames[0].tags == ['edited']
+    assert client.frames[1].message == 'frame #2'
+    assert client.tags == ['CI', 'edited', 'tag2']
+
+    # The frames file is not updated until the frames are exported.
+    with open(client.frames_file) as f:
+        assert len(json.load(f)) == 3
+
+
+def test_export_frames_file(appdir):
+    """
+    Test that the frames are exported to the frames file when closing and
+    that changes made to the frames file by the Watson CLI are imported.
+    """
+    client = Watson(config_dir=appdir)
+    del client.frames[0]
+    client.save()
+    client.compact_journal()
+    with open(client.frames_file) as f:
+        frames = json.load(f)
+    assert len(frames) == 2
+    assert client.store.is_synced_with(client.frames_file)
+
+    # Change the frames file as the Watson CLI would.
+    with open(client.frames_file, 'w') as f:
+        json.dump(frames[:1], f)
+    client = Watson(config_dir=appdir)
+    assert len(client.frames) == 1
+    assert len(client.store.load()) == 1
+
+
+def test_import_frames_saved_by_watson_cli(appdir):
+    """
+    Test that the frames saved by the Watson CLI, which have no message,
+    are imported in the database.
+    """
+    with open(osp.join(appdir, 'frames')) as f:
+        frames = json.load(f)
+    with open(osp.join(appdir, 'frames'), 'w') as f:
+        json.dump([frame[:6] for frame in frames], f)
+
+    client = Watson(config_dir=appdir)
+    assert len(client.frames) == 3
+    assert len(client.store.load()) == 3
+    assert client.frames[0].message is None
+    assert client.frames[2].tags == ['tag2', 'CI']
+
+
+def test_import_keeps_frames_not_exported(appdir):
+    """
+    Test that the frames saved in the database since the frames file was
+    last exported are merged with the changes made to the frames file by
+    the Watson CLI instead of being overwritten.
+    """
+    client = Watson(config_dir=appdir)
+    start = client.frames[-1].start.shift(hours=2)
+    client.frames.add('p2', start, start.shift(hours=1),
+                      message='not exported')
+    client.save()
+
+    # The Watson CLI deletes the first frame and adds a new frame.
+    with open(client.frames_file) as f:
+        frames = json.load(f)
+    new_frame = list(frames[-1])
+    new_frame[3] = 'cli-frame-id'
+    new_frame[6] = 'added by the CLI'
+    with open(client.frames_file, 'w') as f:
+        json.dump(frames[1:] + [new_frame], f)
+
+    expected = ['added by the CLI', 'frame #1', 'frame #2', 'not exported']
+    frames = client.reload_frames()
+    assert sorted(frame.message for frame in frames) == expected
+    client = Watson(config_dir=appdir)
+    assert sorted(frame.message for frame in client.frames) == expected
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
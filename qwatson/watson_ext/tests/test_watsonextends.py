@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+import time
+
+# ---- Third party imports
+
+import pytest
+import arrow
+
+# ---- Local imports
+
+from qwatson.utils.dates import local_arrow_from_tuple
+from qwatson.utils.timezone import LocalTimezone
+import qwatson.watson_ext.watsonextends as watsonextends
+from qwatson.watson_ext.watsonextends import (
+    Frame, Frames, Watson, frames_from_rows)
+
+
+def test_frame_tuple_interface():
+    """
+    Test that a frame can still be used as the namedtuple of Watson and that
+    the arrow objects of the start and stop dates are created lazily.
+    """
+    start = local_arrow_from_tuple((2018, 6, 14, 15, 59, 54))
+    stop = local_arrow_from_tuple((2018, 6, 14, 16, 34, 25))
+    frame = Frame(start, stop, 'p1', 'abc', tags=['CI', 'test'],
+                  updated_at=stop, message='comment')
+    assert frame._start is None and frame._stop is None
+    assert frame.start_timestamp == start.timestamp
+    assert frame.stop_timestamp == stop.timestamp
+
+    assert frame[0] == start
+    assert frame[1] == stop
+    assert frame.start.utcoffset() == start.utcoffset()
+    assert frame[2:4] == ('p1', 'abc')
+    assert frame[-1] == 'comment'
+    assert len(frame) == 7
+    assert list(frame)[4] == ['CI', 'test']
+    assert frame.updated_at == stop
+
+    assert frame.dump() == (start.timestamp, stop.timestamp, 'p1', 'abc',
+                            ['CI', 'test'], stop.timestamp, 'comment')
+    assert Frame(*frame.dump()) == frame
+
+    new_frame = frame._replace(project='p2', start=start.shift(hours=-1))
+    assert new_frame.project == 'p2'
+    assert new_frame.start == start.shift(hours=-1)
+    assert new_frame.stop == stop
+    assert new_frame != frame
+    assert new_frame < frame
+
+
+def test_frame_dst_duration(monkeypatch):
+    """
+    Test that the duration of a frame and the comparison of its start and
+    stop are those of its timestamps across a daylight saving time change.
+    """
+    if not hasattr(time, 'tzset'):
+        pytest.skip("The local timezone cannot be changed on this platform.")
+    monkeypatch.setenv('TZ', 'America/Montreal')
+    time.tzset()
+    monkeypatch.setattr(watsonextends, 'TZLOCAL', LocalTimezone())
+    try:
+        # On 2020-03-08 at 2:00 EST, clocks were turned forward to 3:00 EDT.
+        frame = Frame(1583650000, 1583700000, 'p0', 'id0')
+        assert (frame.stop - frame.start).total_seconds() == 50000
+        assert frame.start.format('HH:mm ZZ') == '01:46 -05:00'
+        assert frame.stop.format('HH:mm ZZ') == '16:40 -04:00'
+        assert frame.day.format('YYYY-MM-DD HH:mm ZZ') == (
+            '2020-03-08 00:00 -05:00')
+
+        # On 2018-11-04 at 2:00 EDT, clocks were turned back to 1:00 EST.
+        frame = Frame(1541311200 - 1800, 1541311200 + 1200, 'p1', 'id1')
+        assert (frame.stop - frame.start).total_seconds() == 3000
+        assert frame.start < frame.stop
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_frames_from_timestamps():
+    """
+    Test that frames are created from the timestamps saved in the frames
+    file without creating any arrow object.
+    """
+    frames = Frames([[1528984794, 1528986865, 'p1', 'abc', [], 1528986865]])
+    frame = frames[0]
+    assert frame._start is None and frame._stop is None
+    assert frame.message is None
+    assert frame.tags == []
+    assert frame.start == arrow.get(1528984794)
+    assert frame.stop == arrow.get(1528986865)
+    assert frames['project'] == ('p1',)
+
+
+def test_frames_from_rows():
+    """
+    Test that frames are built in a batch from rows with and without a
+    message and that other rows fall back to the Frame constructor.
+    """
+    start = local_arrow_from_tuple((2018, 6, 14, 15, 59, 54))
+    frame = Frame(start, start.shift(hours=1), 'p3', 'ghi')
+    frames = frames_from_rows([
+        [1528984794, 1528986865, 'p1', 'abc', ['CI'], 1528986865, 'msg'],
+        [1528984794, 1528986865, 'p2', 'def', None, 1528986865],
+        [start.isoformat(), start.shift(hours=1).isoformat(), 'p3', 'ghi',
+         [], frame.updated_timestamp],
+        frame])
+    assert frames[0] == Frame(1528984794, 1528986865, 'p1', 'abc', ['CI'],
+                              1528986865, 'msg')
+    assert frames[1].message is None and frames[1].tags == []
+    assert frames[2] == frame
+    assert frames[3] is frame
+    assert frames[1].start == arrow.get(1528984794)
+
+
+def test_frames_id_index(mocker):
+    """
+    Test that the frames can be retrieved by id after inserting, deleting
+    and replacing frames.
+    """
+    frames = Frames()
+    for i in range(5):
+        frames.add('p%d' % i, 3600 * i, 3600 * i + 1800, id='id%d' % i)
+    assert frames['id3'].project == 'p3'
+
+    frames.insert(1, 'p5', 600, 1200, id='id5')
+    frames.insert(0, 'p6', 0, 100, id='id6')
+    del frames['id2']
+    del frames[-1]
+    frames[0] = frames.new_frame('p7', 0, 100, id='id7')
+    frames['id1'] = frames['id1']._replace(project='p8')
+    frames.add('p9', 20000, 20100, id='id9')
+
+    expected = ['id7', 'id0', 'id5', 'id1', 'id3', 'id9']
+    assert list(frames['id']) == expected
+    for row, frame_id in enumerate(expected):
+        assert frames._get_index_by_id(frame_id) == row
+        assert frames[frame_id].id == frame_id
+    assert frames['id1'].project == 'p8'
+    for frame_id in ['id2', 'id4', 'id6']:
+        with pytest.raises(KeyError):
+            frames[frame_id]
+
+    # Frames can still be retrieved with the first characters of their id.
+    frames.add('p10', 30000, 30100, id='abcdef')
+    assert frames['abc'].project == 'p10'
+    assert frames.has_id('abcdef') and not frames.has_id('abc')
+
+    # A full frame id that is not in the index is not searched for as the
+    # first characters of another id.
+    frame = frames.add('p11', 40000, 40100)
+    mocker.patch.object(
+        Frames.__bases__[0], '_get_index_by_id', side_effect=AssertionError)
+    with pytest.raises(KeyError):
+        frames[frame.id[::-1]]
+    assert frames[frame.id] is frame
+
+
+def test_frames_date_index():
+    """
+    Test that the rows of the frames within a date span and the row where
+    to insert a new frame are found correctly with the date index.
+    """
+    frames = Frames()
+    for i in range(5):
+        frames.add('p%d' % i, 3600 * i, 3600 * i + 1800, id='id%d' % i)
+    assert frames.rows_in_span(3600, 3 * 3600) == [1, 2, 3]
+    assert frames.rows_in_span(3601, 3 * 3600 - 1) == [2]
+    assert frames.row_for_start(3600, 'above') == 1
+    assert frames.row_for_start(3600, 'below') == 1
+    assert frames.row_for_start(3600 + 1800, 'below') == 2
+    assert frames.row_for_start(10 * 3600, 'above') == 5
+
+    # Test that the index is updated when the frames change.
+    frames.insert(1, 'p5', 1800, 2400, id='id5')
+    del frames['id3']
+    frames['id4'] = frames['id4']._replace(start=3 * 3600)
+    assert frames.rows_in_span(1800, 3 * 3600) == [1, 2, 3, 4]
+    assert frames.row_for_start(2000, 'below') == 1
+    assert frames.row_for_start(3 * 3600, 'above') == 4
+    assert frames.row_for_start(
+        arrow.get(3 * 3600 + 1).to('local'), 'above') == 5
+
+
+def test_frames_tag_index():
+    """
+    Test that the number of frames and total duration of each tag are
+    updated when frames are added, edited and deleted.
+    """
+    frames = Frames()
+    frames.add('p0', 0, 100, tags=['a', 'b'], id='id0')
+    frames.add('p1', 200, 250, tags=['b'], id='id1')
+    assert frames.tag_counts == {'a': 1, 'b': 2}
+    assert frames.tag_durations == {'a': 100, 'b': 150}
+
+    frames.add('p2', 300, 310, tags=['c', 'c'], id='id2')
+    frames['id0'] = frames['id0']._replace(tags=['b'], stop=50)
+    del frames['id1']
+    assert frames.tag_counts == {'b': 1, 'c': 1}
+    assert frames.tag_durations == {'b': 50, 'c': 10}
+
+
+def test_frames_bulk_operations():
+    """
+    Test that frames are replaced and deleted in a single pass and that
+    the indexes and the list of changes are updated accordingly.
+    """
+    frames = Frames()
+    for i, project in enumerate(['p0', 'p1', 'p0', 'p2', 'p0']):
+        frames.add(project, 3600 * i, 3600 * i + 1800, id='id%d' % i)
+    frames.pop_changes()
+    frames.rows_in_span(0, 10 * 3600)
+
+    rows = frames.rows_for_project('p0')
+    assert rows == [0, 2, 4]
+    frames.replace_rows({row: frames[row]._replace(project='p2')
+                         for row in rows})
+    assert frames.project_counts == {'p1': 1, 'p2': 4}
+    assert frames.project_durations == {'p1': 1800, 'p2': 4 * 1800}
+    assert [change[0] for change in frames.pop_changes()] == ['edit'] * 3
+
+    frames.delete_rows([1, 2])
+    assert list(frames['id']) == ['id0', 'id3', 'id4']
+    assert frames['id4'].project == 'p2'
+    assert frames.rows_in_span(3600, 10 * 3600) == [1, 2]
+    assert frames.project_durations == {'p2': 3 * 1800}
+    assert frames.pop_changes() == [['delete', 'id1'], ['delete', 'id2']]
+
+
+def test_project_registry(tmpdir):
+    """
+    Test that the list of projects is built from the frames and the projects
+    file and is kept sorted when projects are added, renamed and deleted.
+    """
+    appdir = osp.join(str(tmpdir), 'appdir')
+    client = Watson(config_dir=appdir)
+    for i, project in enumerate(['p3', 'p1', 'p3', 'p2']):
+        client.frames.add(project, 3600 * i, 3600 * i + 1800)
+    client.add_project('p0')
+    assert client.frames.project_counts == {'p1': 1, 'p2': 1, 'p3': 2}
+
+    client = Watson(config_dir=appdir)
+    assert client.projects == ['', 'p0', 'p1', 'p2', 'p3']
+    assert client.projects is client.projects
+    assert client.has_project('p2') and not client.has_project('p4')
+
+    client.add_project('a0')
+    client.rename_project('p3', 'p5')
+    client.rename_project('p1', 'p2')
+    client.delete_project('p0')
+    assert client.projects == ['', 'a0', 'p2', 'p5']
+    assert client.frames.project_counts == {'p2': 2, 'p5': 2}
+
+    client = Watson(config_dir=appdir)
+    assert client.projects == ['', 'a0', 'p2', 'p5']
+
+    # The empty project is never removed from the list of projects.
+    client.frames.add('', 0, 1800)
+    client.rename_project('', 'p6')
+    assert client.projects == ['', 'a0', 'p2', 'p5', 'p6']
+    client.delete_project('')
+    assert client.projects == ['', 'a0', 'p2', 'p5', 'p6']
+
+
+def test_save_writes_changed_files_only(tmpdir, mocker):
+    """
+    Test that saving the client only writes the files whose content
+    changed since they were last saved.
+    """
+    appdir = osp.join(str(tmpdir), 'appdir')
+    client = Watson(config_dir=appdir)
+    client.frames.add('p1', 0, 1800)
+    client.projects
+    client.last_sync
+    client.save()
+    assert sorted(os.listdir(appdir)) == [
+        'frames', 'frames.snapshot', 'last_sync', 'projects', 'qwatson.lock']
+
+    client = Watson(config_dir=appdir)
+    client.projects
+    client.last_sync
+    safe_save = mocker.patch('qwatson.watson_ext.watsonextends.safe_save')
+    client.frames.add('p1', 3600, 5400)
+    client.save()
+    assert client.journal.record_count == 1
+    assert safe_save.call_count == 0
+
+    client.add_project('p2')
+    assert [call[0][0] for call in safe_save.call_args_list] == [
+        client.projects_file]
+
+    client.start('p2')
+    client.save()
+    assert safe_save.call_args_list[-1][0][0] == client.state_file
+    assert safe_save.call_count == 2
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
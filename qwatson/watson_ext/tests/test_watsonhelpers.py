@@ -36,6 +36,8 @@ def test_client_start_stop():
     frames_file = osp.join(WORKDIR, 'frames')
     delete_file_safely(frames_file)
     delete_file_safely(frames_file + '.bak')
+    delete_file_safely(frames_file + '.journal')
+    delete_file_safely(frames_file + '.snapshot')
     assert not osp.exists(frames_file)
 
     client = Watson(config_dir=WORKDIR)
@@ -7,82 +7,394 @@
 # Licensed under the terms of the GNU General Public License.
 
 import os
+import io
+import json
+import sys
+import time
+import gc
+import threading
+from collections import deque
+from contextlib import contextmanager
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+import sqlite3
 import watson
 from watson.watson import (WatsonError, make_json_writer, safe_save, arrow,
                            deduplicate)
-from watson.frames import uuid, namedtuple
+from watson.frames import uuid
+
+from qwatson.utils.timezone import get_local_timezone
+from qwatson.watson_ext.rollups import DurationRollups
+from qwatson.watson_ext.archive import FramesArchive, ARCHIVE_DIRNAME, year_key
+from qwatson.watson_ext.journal import FramesJournal, replay_journal
+from qwatson.watson_ext.sqlitestore import (
+    SQLiteFramesStore, SQLITE_FILENAME, file_signature)
+from qwatson.watson_ext.shardstore import (
+    ShardedFramesStore, SHARDS_DIRNAME, month_key, month_start)
+from qwatson.watson_ext.concurrency import (
+    DataDirLock, LOCK_FILENAME, merge_frames)
+from qwatson.watson_ext.snapshot import (
+    FramesSnapshot, SNAPSHOT_FILENAME, content_digest, file_digest)
 
 
 HEADERS = ('start', 'stop', 'project', 'id', 'tags', 'updated_at', 'message')
+
+# The length of the ids of the frames, which are uuid4 hex strings.
+FRAME_ID_LENGTH = 32
+
+# The maximum number of edits of the rows that are applied to the columnar
+# view of the frames instead of building it anew.
+MAX_COLUMN_EDITS = 64
 watson.frames.HEADERS = HEADERS
+TZLOCAL = get_local_timezone()
 
 
-class Frame(namedtuple('Frame', HEADERS)):
+@contextmanager
+def gc_paused():
     """
-    This an extension of the Frame class to support adding comments to Frame.
+    Pause the garbage collector, which is otherwise triggered repeatedly
+    when many objects are created in a batch, as when loading frames.
     """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _to_timestamp(value):
+    """Convert a date to an integer UTC timestamp."""
+    if isinstance(value, int):
+        return value
+    elif isinstance(value, float):
+        return int(value)
+    try:
+        if not isinstance(value, arrow.Arrow):
+            value = arrow.get(value)
+    except RuntimeError as e:
+        raise WatsonError("Error converting date: {}".format(e))
+    return int(value.float_timestamp)
+
+
+class Frame(object):
+    """
+    This an extension of the Frame class to support adding comments to Frame.
 
-    def __new__(cls, start, stop, project, id, tags=None, updated_at=None,
-                message=None):
-        try:
-            if not isinstance(start, arrow.Arrow):
-                start = arrow.get(start)
-
-            if not isinstance(stop, arrow.Arrow):
-                stop = arrow.get(stop)
-        except RuntimeError as e:
-            # from .watson import WatsonError
-            from watson import WatsonError              # <-- May have just been a typo
-            raise WatsonError("Error converting date: {}".format(e))
-
-        start = start.to('local')
-        stop = stop.to('local')
+    The start, stop and updated_at dates are stored as UTC timestamps and
+    the project and tags strings are interned to keep frames small in
+    memory. The Arrow objects of the start and stop dates are only created
+    when these attributes are accessed. The frame otherwise behaves like the
+    namedtuple of Watson, so that frame[0] is the start date for instance.
+    """
+    __slots__ = ('start_timestamp', 'stop_timestamp', 'project', 'id',
+                 'tags', 'updated_timestamp', 'message', '_start', '_stop')
+    _fields = HEADERS
+
+    def __init__(self, start, stop, project, id, tags=None, updated_at=None,
+                 message=None):
+        self.start_timestamp = _to_timestamp(start)
+        self.stop_timestamp = _to_timestamp(stop)
+        self.project = (
+            sys.intern(project) if isinstance(project, str) else project)
+        self.id = id
+        self.tags = [sys.intern(tag) for tag in tags or []]
+        self.updated_timestamp = (
+            int(time.time()) if updated_at is None else
+            _to_timestamp(updated_at))
+        self.message = message
+        self._start = None
+        self._stop = None
+
+    @classmethod
+    def _make(cls, iterable):
+        return cls(*iterable)
 
-        if updated_at is None:
-            updated_at = arrow.utcnow()
-        elif not isinstance(updated_at, arrow.Arrow):
-            updated_at = arrow.get(updated_at)
+    @property
+    def start(self):
+        if self._start is None:
+            self._start = arrow.Arrow.fromtimestamp(
+                self.start_timestamp,
+                tzinfo=TZLOCAL.fixed_timezone(self.start_timestamp))
+        return self._start
 
-        if tags is None:
-            tags = []
+    @property
+    def stop(self):
+        if self._stop is None:
+            self._stop = arrow.Arrow.fromtimestamp(
+                self.stop_timestamp,
+                tzinfo=TZLOCAL.fixed_timezone(self.stop_timestamp))
+        return self._stop
 
-        return super(Frame, cls).__new__(
-            cls, start, stop, project, id, tags, updated_at, message
-        )
+    @property
+    def updated_at(self):
+        return arrow.Arrow.utcfromtimestamp(self.updated_timestamp)
 
     def dump(self):
-        start = self.start.to('utc').timestamp
-        stop = self.stop.to('utc').timestamp
-        updated_at = self.updated_at.timestamp
+        return (self.start_timestamp, self.stop_timestamp, self.project,
+                self.id, self.tags, self.updated_timestamp, self.message)
+
+    def _replace(self, **kwargs):
+        values = dict(zip(HEADERS, self.dump()))
+        values.update(kwargs)
+        return Frame(**values)
 
-        return (start, stop, self.project, self.id, self.tags, updated_at,
-                self.message)
+    def _asdict(self):
+        return {field: getattr(self, field) for field in HEADERS}
 
     @property
     def day(self):
-        return self.start.floor('day')
+        return self.start.to(TZLOCAL).floor('day')
+
+    # ---- Tuple interface
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(getattr(self, field) for field in HEADERS[index])
+        return getattr(self, HEADERS[index])
+
+    def __iter__(self):
+        return (getattr(self, field) for field in HEADERS)
+
+    def __len__(self):
+        return len(HEADERS)
+
+    def __eq__(self, other):
+        if not isinstance(other, Frame):
+            return NotImplemented
+        return self.dump() == other.dump()
+
+    def __ne__(self, other):
+        if not isinstance(other, Frame):
+            return NotImplemented
+        return self.dump() != other.dump()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'Frame(%s)' % ', '.join(
+            '%s=%r' % (field, getattr(self, field)) for field in HEADERS)
 
     def __lt__(self, other):
-        return self.start < other.start
+        return self.start_timestamp < other.start_timestamp
 
     def __lte__(self, other):
-        return self.start <= other.start
+        return self.start_timestamp <= other.start_timestamp
 
     def __gt__(self, other):
-        return self.start > other.start
+        return self.start_timestamp > other.start_timestamp
 
     def __gte__(self, other):
-        return self.start >= other.start
+        return self.start_timestamp >= other.start_timestamp
 
 
 watson.frames.Frame = Frame
 
 
+def frames_from_rows(rows):
+    """
+    Return the list of frames built in a single batch from rows formatted
+    as in the frames file of Watson.
+
+    The slots of the frames are set directly from the integer timestamps
+    of the rows, without going through the date conversions of the Frame
+    constructor. Rows that are already frames are kept as is and rows
+    that are not in the standard format fall back to the constructor.
+    """
+    new_frame = object.__new__
+    intern = sys.intern
+    frames = []
+    append = frames.append
+    for row in rows:
+        if isinstance(row, Frame):
+            append(row)
+            continue
+        if len(row) == 7:
+            start, stop, project, id, tags, updated_at, message = row
+        elif len(row) == 6:
+            # Frames saved by the Watson CLI have no message.
+            start, stop, project, id, tags, updated_at = row
+            message = None
+        else:
+            append(Frame(*row))
+            continue
+        if (type(start) is not int or type(stop) is not int or
+                type(updated_at) is not int or type(project) is not str):
+            append(Frame(*row))
+            continue
+        frame = new_frame(Frame)
+        frame.start_timestamp = start
+        frame.stop_timestamp = stop
+        frame.project = intern(project)
+        frame.id = id
+        frame.tags = list(map(intern, tags)) if tags else []
+        frame.updated_timestamp = updated_at
+        frame.message = message
+        frame._start = None
+        frame._stop = None
+        append(frame)
+    return frames
+
+
+def longest_increasing_run(values):
+    """
+    Return the indexes of the values that form a longest strictly
+    increasing subsequence of values, in increasing order.
+    """
+    tails = []
+    tail_indexes = []
+    previous = [None] * len(values)
+    for i, value in enumerate(values):
+        j = bisect_left(tails, value)
+        if j == len(tails):
+            tails.append(value)
+            tail_indexes.append(i)
+        else:
+            tails[j] = value
+            tail_indexes[j] = i
+        previous[i] = tail_indexes[j - 1] if j else None
+    indexes = []
+    i = tail_indexes[-1] if tail_indexes else None
+    while i is not None:
+        indexes.append(i)
+        i = previous[i]
+    return indexes[::-1]
+
+
+def frames_from_dumps(rows):
+    """
+    Return the list of frames built from rows returned by Frame.dump,
+    whose values are already normalized, as those saved in the snapshot
+    of the frames file.
+    """
+    new_frame = object.__new__
+    frames = []
+    append = frames.append
+    for start, stop, project, id, tags, updated_at, message in rows:
+        frame = new_frame(Frame)
+        frame.start_timestamp = start
+        frame.stop_timestamp = stop
+        frame.project = project
+        frame.id = id
+        frame.tags = tags
+        frame.updated_timestamp = updated_at
+        frame.message = message
+        frame._start = None
+        frame._stop = None
+        append(frame)
+    return frames
+
+
 class Frames(watson.frames.Frames):
     """
     This an extension of the Frames class to support adding comments to Frame.
+
+    All the changes made to the frames are also recorded, so that they
+    can be appended to the frames journal instead of rewriting the whole
+    frames file each time the frames are saved.
     """
 
+    def __init__(self, frames=None):
+        # The frames are built in a batch instead of one at a time as
+        # in Watson, which is much faster for large frames files.
+        self._rows = frames_from_rows(frames or [])
+        self.changed = False
+        self._changes = []
+
+        # A hash index that maps the frame ids to their row. The entries
+        # of the index are only guaranteed to be up-to-date for the rows
+        # below _id_rows_valid, since inserting or deleting a frame shifts
+        # all the rows after it. The rest of the index is rebuilt lazily.
+        self._id_rows = {}
+        self._id_rows_valid = 0
+
+        # Sorted indexes of the start and stop timestamps of the frames,
+        # with the ids of the corresponding frames. These are built the
+        # first time they are needed.
+        self._start_index = None
+        self._stop_index = None
+
+        # The number of frames and total duration in seconds of each
+        # project and tag. These are built the first time they are needed.
+        self._project_counts = None
+        self._project_durations = None
+        self._tag_counts = None
+        self._tag_durations = None
+
+        # The daily duration rollups of the frames, which are built the
+        # first time they are needed.
+        self._rollups = None
+
+        # A read-only columnar view of the frames, which is built the first
+        # time it is needed. The edits of the rows done since then are kept
+        # to update the view the next time it is needed.
+        self._columns = None
+        self._column_edits = []
+
+        # A counter that is incremented each time the frames are changed.
+        self.version = 0
+
+        # The ids of the loaded frames that are archived and the keys of
+        # the archived years whose frames are loaded.
+        self._archived_ids = set()
+        self._loaded_years = set()
+
+    def __setitem__(self, key, value):
+        if isinstance(value, Frame):
+            frame = value
+        else:
+            frame = self.new_frame(*value)
+
+        if isinstance(key, int):
+            self._set_row(self._get_row(key), frame)
+        else:
+            frame = frame._replace(id=key)
+            try:
+                self._set_row(self._get_index_by_id(key), frame)
+            except KeyError:
+                self._insert_row(len(self._rows), frame)
+
+    def __delitem__(self, key):
+        if isinstance(key, int):
+            self._delete_row(self._get_row(key))
+        else:
+            self._delete_row(self._get_index_by_id(key))
+
+    def _get_index_by_id(self, id):
+        """
+        Return the row of the frame with the specified id using the id
+        index. As in Watson, frames can also be retrieved with the first
+        characters of their id, but this requires a linear search, which
+        is only done for ids that are shorter than a full frame id.
+        """
+        row = self._find_row_by_id(id)
+        if row is not None:
+            return row
+        if len(id) >= FRAME_ID_LENGTH:
+            raise KeyError("Frame with id {} not found.".format(id))
+        return super(Frames, self)._get_index_by_id(id)
+
+    def _find_row_by_id(self, id):
+        """
+        Return the row of the frame with the specified full id from the id
+        index, or None if there is no frame with this id.
+        """
+        row = self._id_rows.get(id)
+        if row is None or row >= self._id_rows_valid:
+            for i in range(self._id_rows_valid, len(self._rows)):
+                self._id_rows[self._rows[i].id] = i
+            self._id_rows_valid = len(self._rows)
+            row = self._id_rows.get(id)
+        if row is not None and row < len(self._rows):
+            if self._rows[row].id == id:
+                return row
+        return None
+
+    def has_id(self, id):
+        """Return whether there is a frame with the specified full id."""
+        return self._find_row_by_id(id) is not None
+
     def new_frame(self, project, start, stop, tags=None, id=None,
                   updated_at=None, message=None):
         if not id:
@@ -90,16 +402,588 @@ class Frames(watson.frames.Frames):
         return Frame(start, stop, project, id, tags=tags,
                      updated_at=updated_at, message=message)
 
+    def add(self, *args, **kwargs):
+        """
+        Create a new frame from the provided arguments and append it at the
+        end of the frames.
+        """
+        return self.insert_frame(len(self._rows), self.new_frame(
+            *args, **kwargs))
+
     def insert(self, index, *args, **kwargs):
         """
         Create a new frame from the provided arguments and insert it at the
         specified index.
         """
-        self.changed = True
-        frame = self.new_frame(*args, **kwargs)
-        self._rows.insert(index, frame)
+        return self.insert_frame(index, self.new_frame(*args, **kwargs))
+
+    def insert_frame(self, index, frame):
+        """Insert the frame at the specified index."""
+        if index < 0:
+            index = max(len(self._rows) + index, 0)
+        self._insert_row(min(index, len(self._rows)), frame)
         return frame
 
+    # ---- Rows handlers
+
+    def _get_row(self, index):
+        """Return the positive row corresponding to a list index."""
+        row = index + len(self._rows) if index < 0 else index
+        if not 0 <= row < len(self._rows):
+            raise IndexError("list index out of range")
+        return row
+
+    def _set_row(self, row, frame):
+        """Replace the frame stored at row by the specified frame."""
+        self.changed = True
+        self.version += 1
+        old_frame = self._rows[row]
+        self._rows[row] = frame
+        self._unregister(old_frame)
+        self._register(frame)
+        self._edit_columns('set', [row], [frame])
+        if old_frame.id != frame.id:
+            self._id_rows.pop(old_frame.id, None)
+            self._id_rows[frame.id] = row
+            self._changes.append(('delete', old_frame.id))
+            self._changes.append(('insert', row, frame.dump()))
+        else:
+            self._changes.append(('edit', frame.dump()))
+
+    def _insert_row(self, row, frame):
+        """Insert the frame at the specified row."""
+        self.changed = True
+        self.version += 1
+        self._rows.insert(row, frame)
+        self._register(frame)
+        self._edit_columns('insert', row, frame)
+        self._id_rows[frame.id] = row
+        if row == self._id_rows_valid:
+            self._id_rows_valid += 1
+        else:
+            self._id_rows_valid = min(self._id_rows_valid, row)
+        self._changes.append(('insert', row, frame.dump()))
+
+    def _delete_row(self, row):
+        """Delete the frame stored at the specified row."""
+        self.changed = True
+        self.version += 1
+        frame = self._rows.pop(row)
+        self._unregister(frame)
+        self._edit_columns('delete', [row])
+        self._id_rows.pop(frame.id, None)
+        self._id_rows_valid = min(self._id_rows_valid, row)
+        self._changes.append(('delete', frame.id))
+
+    def replace_rows(self, frames):
+        """
+        Replace the frames stored at the rows of the frames dict, which
+        maps rows to new frames with the same ids, in a single pass.
+        """
+        if not frames:
+            return
+        self.changed = True
+        self.version += 1
+        self._start_index = self._stop_index = None
+        self._edit_columns('set', list(frames), list(frames.values()))
+        for row, frame in sorted(frames.items()):
+            self._unregister(self._rows[row])
+            self._rows[row] = frame
+            self._register(frame)
+            # The archived frames are saved by the archive itself.
+            if frame.id not in self._archived_ids:
+                self._changes.append(('edit', frame.dump()))
+
+    def delete_rows(self, rows):
+        """Delete the frames stored at the specified rows in a single pass."""
+        rows = set(rows)
+        if not rows:
+            return
+        self.changed = True
+        self.version += 1
+        self._start_index = self._stop_index = None
+        self._edit_columns('delete', rows)
+        kept_frames = []
+        for row, frame in enumerate(self._rows):
+            if row in rows:
+                self._unregister(frame)
+                self._id_rows.pop(frame.id, None)
+                if frame.id in self._archived_ids:
+                    self._archived_ids.discard(frame.id)
+                else:
+                    self._changes.append(('delete', frame.id))
+            else:
+                kept_frames.append(frame)
+        self._rows = kept_frames
+        self._id_rows_valid = min(self._id_rows_valid, min(rows))
+
+    def rows_for_project(self, project):
+        """Return the list of the rows of the frames of the project."""
+        return [row for row, frame in enumerate(self._rows) if
+                frame.project == project]
+
+    # ---- Indexes
+
+    def _register(self, frame):
+        """Add the frame to the indexes of the frames."""
+        self._index_dates(frame)
+        if self._project_counts is not None:
+            self._index_project(frame)
+        if self._tag_counts is not None:
+            self._index_tags(frame)
+        if self._rollups is not None:
+            self._rollups.add(frame)
+
+    def _unregister(self, frame):
+        """Remove the frame from the indexes of the frames."""
+        self._unindex_dates(frame)
+        if self._project_counts is not None:
+            self._project_counts[frame.project] -= 1
+            if self._project_counts[frame.project] == 0:
+                del self._project_counts[frame.project]
+                del self._project_durations[frame.project]
+            else:
+                self._project_durations[frame.project] -= (
+                    frame.stop_timestamp - frame.start_timestamp)
+        if self._tag_counts is not None:
+            duration = frame.stop_timestamp - frame.start_timestamp
+            for tag in set(frame.tags):
+                self._tag_counts[tag] -= 1
+                if self._tag_counts[tag] == 0:
+                    del self._tag_counts[tag]
+                    del self._tag_durations[tag]
+                else:
+                    self._tag_durations[tag] -= duration
+        if self._rollups is not None:
+            self._rollups.remove(frame)
+
+    def _index_project(self, frame):
+        """Add the frame to the count and duration of its project."""
+        project = frame.project
+        self._project_counts[project] = (
+            self._project_counts.get(project, 0) + 1)
+        self._project_durations[project] = (
+            self._project_durations.get(project, 0) +
+            frame.stop_timestamp - frame.start_timestamp)
+
+    def _build_project_index(self):
+        """Build the counts and durations of the projects of the frames."""
+        if self._project_counts is None:
+            self._project_counts = {}
+            self._project_durations = {}
+            for frame in self._rows:
+                self._index_project(frame)
+            self._add_unloaded_totals(
+                'projects', self._project_counts, self._project_durations)
+
+    @property
+    def project_counts(self):
+        """Return a dict with the number of frames of each project."""
+        self._build_project_index()
+        return self._project_counts
+
+    @property
+    def project_durations(self):
+        """
+        Return a dict with the total duration in seconds of each project.
+        """
+        self._build_project_index()
+        return self._project_durations
+
+    def _index_tags(self, frame):
+        """Add the frame to the counts and durations of its tags."""
+        duration = frame.stop_timestamp - frame.start_timestamp
+        for tag in set(frame.tags):
+            self._tag_counts[tag] = self._tag_counts.get(tag, 0) + 1
+            self._tag_durations[tag] = (
+                self._tag_durations.get(tag, 0) + duration)
+
+    def _build_tag_index(self):
+        """Build the counts and durations of the tags of the frames."""
+        if self._tag_counts is None:
+            self._tag_counts = {}
+            self._tag_durations = {}
+            for frame in self._rows:
+                self._index_tags(frame)
+            self._add_unloaded_totals(
+                'tags', self._tag_counts, self._tag_durations)
+
+    @property
+    def tag_counts(self):
+        """Return a dict with the number of frames of each tag."""
+        self._build_tag_index()
+        return self._tag_counts
+
+    @property
+    def tag_durations(self):
+        """Return a dict with the total duration in seconds of each tag."""
+        self._build_tag_index()
+        return self._tag_durations
+
+    @property
+    def rollups(self):
+        """
+        Return the daily duration rollups of the frames, for all the frames
+        and for each project and tag.
+        """
+        if self._rollups is None:
+            self._rollups = DurationRollups(self._rows)
+            if self.archive is not None:
+                for dump in self.archive.rollups(self.unloaded_years()):
+                    self._rollups.add_dump(dump)
+        return self._rollups
+
+    @property
+    def columns(self):
+        """
+        Return a read-only columnar view of the frames with NumPy arrays
+        for vectorized analytics. NumPy is imported only when this view is
+        first requested, since it is an optional dependency.
+
+        The view is updated with the edits of the rows done since it was
+        last requested. It is built anew from all the frames only if the
+        frames were changed otherwise, by loading more frames for instance.
+        """
+        columns = self._columns
+        if columns is None or columns.version != self.version:
+            if (columns is not None and
+                    columns.version + len(self._column_edits) ==
+                    self.version):
+                self._columns = columns.edited(
+                    self._column_edits, self.version)
+            else:
+                from qwatson.watson_ext.columnar import FramesColumns
+                self._columns = FramesColumns(self)
+            self._column_edits = []
+        return self._columns
+
+    def _edit_columns(self, *edit):
+        """
+        Keep the edit of the rows to apply it to the columnar view of the
+        frames, if the view was built. Each edit of the rows must increment
+        the version of the frames exactly once.
+        """
+        if self._columns is not None:
+            if len(self._column_edits) < MAX_COLUMN_EDITS:
+                self._column_edits.append(edit)
+            else:
+                # Building the view anew is faster than applying this many
+                # edits, which each copy its arrays.
+                self._columns = None
+                self._column_edits = []
+
+    def _build_date_indexes(self):
+        """Build the sorted indexes of the frames start and stop dates."""
+        if self._start_index is None:
+            starts = sorted((f.start_timestamp, f.id) for f in self._rows)
+            stops = sorted((f.stop_timestamp, f.id) for f in self._rows)
+            self._start_index = (
+                [item[0] for item in starts], [item[1] for item in starts])
+            self._stop_index = (
+                [item[0] for item in stops], [item[1] for item in stops])
+
+    def _index_dates(self, frame):
+        """Add the frame to the sorted indexes of the dates."""
+        if self._start_index is not None:
+            for (keys, ids), key in (
+                    (self._start_index, frame.start_timestamp),
+                    (self._stop_index, frame.stop_timestamp)):
+                i = bisect_right(keys, key)
+                keys.insert(i, key)
+                ids.insert(i, frame.id)
+
+    def _unindex_dates(self, frame):
+        """Remove the frame from the sorted indexes of the dates."""
+        if self._start_index is not None:
+            for (keys, ids), key in (
+                    (self._start_index, frame.start_timestamp),
+                    (self._stop_index, frame.stop_timestamp)):
+                i = bisect_left(keys, key)
+                while ids[i] != frame.id:
+                    i += 1
+                del keys[i]
+                del ids[i]
+
+    def get_date_indexes(self):
+        """
+        Return copies of the sorted indexes of the start and stop dates of
+        the frames, with the ids of the corresponding frames.
+        """
+        self._build_date_indexes()
+        return [[list(keys), list(ids)] for keys, ids in
+                (self._start_index, self._stop_index)]
+
+    def set_date_indexes(self, indexes):
+        """
+        Set the sorted indexes of the start and stop dates of the frames
+        from indexes returned by get_date_indexes.
+        """
+        (start_keys, start_ids), (stop_keys, stop_ids) = indexes
+        self._start_index = (list(start_keys), list(start_ids))
+        self._stop_index = (list(stop_keys), list(stop_ids))
+
+    def rows_in_span(self, start, stop):
+        """
+        Return the sorted list of the rows of the frames that started within
+        the span defined by the start and stop dates, inclusively.
+        """
+        self._build_date_indexes()
+        keys, ids = self._start_index
+        return sorted(
+            self._get_index_by_id(frame_id) for frame_id in
+            ids[bisect_left(keys, _to_timestamp(start)):
+                bisect_right(keys, _to_timestamp(stop))])
+
+    def row_for_start(self, start, where='above'):
+        """
+        Return the row where a frame that starts at the specified date must
+        be inserted, so that the frames stay sorted chronologically.
+
+        If where is 'above', this is the row of the first frame that starts
+        at or after the date. If where is 'below', this is the row of the
+        first frame that stops after the date.
+        """
+        self._build_date_indexes()
+        start = _to_timestamp(start)
+        if where == 'above':
+            keys, ids = self._start_index
+            i = bisect_left(keys, start)
+        else:
+            keys, ids = self._stop_index
+            i = bisect_right(keys, start)
+        return len(self._rows) if i == len(ids) else self._get_index_by_id(
+            ids[i])
+
+    def diff(self, frames):
+        """
+        Return the differences between these frames and the other frames,
+        by id and updated_at, as the rows of the frames to delete, a dict
+        of the frames that were updated by their row once these are
+        deleted, and the list of the frames to insert with their row once
+        all of them are inserted in order.
+
+        The frames in common that are not in the same relative order in
+        both frames are deleted and inserted again, so that the frames are
+        then in the same order as the other frames.
+        """
+        new_rows = {frame.id: row for row, frame in enumerate(frames._rows)}
+        common = [(row, new_rows[frame.id]) for row, frame in
+                  enumerate(self._rows) if frame.id in new_rows]
+        kept = [common[i] for i in longest_increasing_run(
+                [new_row for row, new_row in common])]
+        kept_rows = set(row for row, new_row in kept)
+        kept_new_rows = set(new_row for row, new_row in kept)
+
+        deleted = [row for row in range(len(self._rows)) if
+                   row not in kept_rows]
+        updated = {}
+        for i, (row, new_row) in enumerate(kept):
+            frame = frames._rows[new_row]
+            if (frame.updated_timestamp !=
+                    self._rows[row].updated_timestamp):
+                updated[i] = frame
+        inserted = [(new_row, frame) for new_row, frame in
+                    enumerate(frames._rows) if new_row not in kept_new_rows]
+        return deleted, updated, inserted
+
+    # ---- Journal
+
+    def pop_changes(self):
+        """
+        Return the list of the changes that were made to the frames since
+        the last time this method was called and clear that list.
+        """
+        changes, self._changes = self._changes, []
+        return [list(change) for change in changes]
+
+    def dump(self, archived=False):
+        """
+        Return the rows of the frames as saved in the frames file, without
+        the archived frames unless archived is True.
+        """
+        if archived or not self._archived_ids:
+            return tuple(frame.dump() for frame in self._rows)
+        return tuple(frame.dump() for frame in self._rows if
+                     frame.id not in self._archived_ids)
+
+    def clear_changes(self):
+        """
+        Clear the changes made to the frames and flag the frames as saved.
+        """
+        self._changes = []
+        self.changed = False
+
+    # ---- Lazy loading
+
+    # The key of the month since which the frames are loaded, or None if
+    # all the frames are loaded.
+    loaded_since = None
+
+    # The archive of the frames of the closed years, if any.
+    archive = None
+
+    def fetch_since(self, date=None):
+        """
+        Return the frames that started since date, or all the frames if
+        date is None, that are not loaded yet, with the key of the month
+        since which the frames are loaded once these are prepended. All the
+        frames that are not archived are always loaded by default.
+        """
+        if self.loaded_since is None:
+            return [], None
+        since = None if date is None else month_key(_to_timestamp(date))
+        if since is not None and since >= self.loaded_since:
+            return [], self.loaded_since
+        rows, remaining = self._fetch_rows(since)
+
+        # Frames that were saved in a month that is not loaded yet, by
+        # editing their start date, are already loaded.
+        loaded_ids = set(frame.id for frame in self._rows)
+        frames = sorted((frame for frame in frames_from_rows(rows) if
+                         frame.id not in loaded_ids),
+                        key=attrgetter('start_timestamp'))
+        return frames, since if remaining else None
+
+    def _fetch_rows(self, since):
+        """
+        Return the rows of the archived years from the year of the month
+        since, or of all the years if since is None, that are not loaded
+        yet, and whether there are archived years left before these.
+        """
+        years = self.unloaded_years()
+        fetched = [year for year in years if since is None or
+                   year >= since[:4]]
+        rows = self.archive.load(fetched) if fetched else []
+        self._loaded_years.update(fetched)
+        self._archived_ids.update(row[3] for row in rows)
+        return rows, len(fetched) < len(years)
+
+    def prepend_frames(self, frames, loaded_since=None):
+        """
+        Insert the frames returned by fetch_since before the first frame,
+        without recording them as changes.
+        """
+        if frames:
+            self.version += 1
+            self._rows[:0] = frames
+            self._id_rows = {}
+            self._id_rows_valid = 0
+            self._start_index = self._stop_index = None
+        if frames or loaded_since != self.loaded_since:
+            self._reset_aggregates()
+        self.loaded_since = loaded_since
+
+    def _reset_aggregates(self):
+        """
+        Reset the totals and rollups of the frames, which also include the
+        frames that are not loaded.
+        """
+        self._project_counts = self._project_durations = None
+        self._tag_counts = self._tag_durations = None
+        self._rollups = None
+
+    def _unloaded_totals(self):
+        """
+        Return the list of the number of frames and total duration of each
+        project and tag of the frames that are not loaded.
+        """
+        if self.archive is None:
+            return []
+        return [self.archive.totals(self.unloaded_years())]
+
+    def _add_unloaded_totals(self, name, counts, durations):
+        """
+        Add the number of frames and total duration of the projects or
+        tags of the frames that are not loaded.
+        """
+        for totals in self._unloaded_totals():
+            for key, (count, duration) in totals[name].items():
+                counts[key] = counts.get(key, 0) + count
+                durations[key] = durations.get(key, 0) + duration
+
+    # ---- Archive
+
+    def set_archive(self, archive):
+        """
+        Set the archive of the frames of the closed years, whose frames are
+        only loaded when they are fetched.
+        """
+        self.archive = archive
+        years = archive.years()
+        if years and self.loaded_since is None:
+            self.loaded_since = '%04d-01' % (int(years[-1]) + 1)
+        self._reset_aggregates()
+
+    def unloaded_years(self):
+        """Return the keys of the archived years that are not loaded."""
+        if self.archive is None:
+            return []
+        return [year for year in self.archive.years() if
+                year not in self._loaded_years]
+
+    def has_archived_frames(self):
+        """Return whether archived frames are loaded."""
+        return bool(self._archived_ids)
+
+    def is_archived(self, frame):
+        """Return whether the frame is archived and thus read-only."""
+        return frame.id in self._archived_ids
+
+    def archive_rows(self, rows):
+        """
+        Flag the frames stored at the rows as archived and record their
+        deletion, so that they are removed from the saved frames while
+        staying loaded.
+        """
+        for row in rows:
+            frame = self._rows[row]
+            self._archived_ids.add(frame.id)
+            self._loaded_years.add(year_key(frame.start_timestamp))
+            self._changes.append(('delete', frame.id))
+        if rows:
+            self.changed = True
+            self.version += 1
+
+
+class ShardedFrames(Frames):
+    """
+    Frames that are loaded by month from a sharded store, starting from
+    the month of the last week or of the last frame. The frames of the
+    earlier months are only loaded when they are fetched and prepended,
+    so that the rows of the frames stay in chronological order.
+
+    The number of frames and total duration of the projects and tags also
+    include those of the months that are not loaded, which are taken from
+    the manifest of the store. The date indexes, rollups and columnar view
+    only cover the loaded frames.
+    """
+
+    def __init__(self, store, since=None):
+        self.store = store
+        super(ShardedFrames, self).__init__(store.load(since))
+        # The key of the month since which the shards are loaded.
+        self.loaded_since = self.shards_since = since
+
+    def _fetch_rows(self, since):
+        """
+        Return the rows of the shards of the months from the month since,
+        or of all the months if since is None, that are not loaded yet,
+        with those of the archived years.
+        """
+        rows, remaining = super(ShardedFrames, self)._fetch_rows(since)
+        if self.shards_since is not None:
+            rows = self.store.load(since, self.shards_since) + rows
+            months = self.store.months()
+            if since is None or not months or months[0] >= since:
+                self.shards_since = None
+            else:
+                self.shards_since = since
+        return rows, remaining or self.shards_since is not None
+
+    def _unloaded_totals(self):
+        return super(ShardedFrames, self)._unloaded_totals() + [
+            self.store.totals_before(self.shards_since)]
+
 
 watson.watson.Frames = Frames
 watson.frames.Frames = Frames
@@ -113,7 +997,63 @@ class Watson(watson.watson.Watson):
     def __init__(self, **kwargs):
         super(Watson, self).__init__(**kwargs)
         self._projects = None
+        self._tags = None
         self.projects_file = os.path.join(self._dir, 'projects')
+        self.journal = FramesJournal(self.frames_file)
+
+        # The frames are saved in a SQLite database instead of the JSON
+        # frames file if the 'sqlite' backend is selected in the config.
+        # The frames can instead be saved in one file per month if the
+        # 'shards' backend is selected, so that only the months that are
+        # shown are loaded.
+        backend = self.config.get('qwatson', 'backend', 'json')
+        if backend == 'sqlite':
+            self.store = SQLiteFramesStore(
+                os.path.join(self._dir, SQLITE_FILENAME))
+        elif backend == 'shards':
+            self.store = ShardedFramesStore(
+                os.path.join(self._dir, SHARDS_DIRNAME))
+        else:
+            self.store = None
+        self._store_changed = False
+
+        # The frames of the closed years can be moved to a compressed
+        # archive, whose years are only loaded when they are needed.
+        self.archive = FramesArchive(os.path.join(self._dir, ARCHIVE_DIRNAME))
+
+        # A binary snapshot of the frames file that is loaded instead of
+        # the frames file when it was not changed outside of QWatson.
+        self.snapshot = FramesSnapshot(
+            os.path.join(self._dir, SNAPSHOT_FILENAME))
+
+        # The writes needed to save the client are queued, so that they
+        # can be done in order by a write-behind saver on another thread.
+        self._pending_writes = deque()
+        self._write_lock = threading.RLock()
+        self._write_failed = False
+        self.saver = None
+
+        # The fingerprints of the content last saved in the state, config,
+        # last sync and projects files, so that only the files whose
+        # content changed are written when saving.
+        self._fingerprints = {}
+
+        # The signature of the frames file as it was last loaded or written
+        # by the client, to detect the changes made outside of QWatson.
+        self._frames_file_signature = None
+
+        # The files of the data dir are written while holding a lock that
+        # is shared with the other processes. The ids of the frames that
+        # were changed and deleted by the client since the frames file was
+        # last synced are kept, to merge the frames with those saved by
+        # another process in the meantime instead of overwriting them.
+        # These ids are changed by the thread that edits the client and by
+        # the thread of the write-behind saver, so they are only accessed
+        # while holding the ids lock.
+        self.data_lock = DataDirLock(os.path.join(self._dir, LOCK_FILENAME))
+        self._ids_lock = threading.Lock()
+        self._changed_ids = set()
+        self._deleted_ids = set()
 
     # ---- Watson override
 
@@ -121,42 +1061,249 @@ class Watson(watson.watson.Watson):
         """
         Override of Watson save method to support adding comment to frame.
         """
-        try:
-            if not os.path.isdir(self._dir):
-                os.makedirs(self._dir)
+        self.queue_save()
+        self.write_pending()
+
+    def request_save(self):
+        """
+        Save the changes made to the client, in the background if a
+        write-behind saver is attached to the client or else right away.
+        """
+        if self.saver is None:
+            self.save()
+        else:
+            self.saver.schedule()
 
-            if self._current is not None and self._old_state != self._current:
-                if self.is_started:
-                    current = {
-                        'project': self.current['project'],
-                        'start': self._format_date(self.current['start']),
-                        'tags': self.current['tags'],
-                        'message': self.current.get('message'),
-                    }
+    def queue_save(self):
+        """
+        Queue the writes needed to save the changes made to the client
+        since it was last saved, with copies of the data to write, so that
+        these writes can be done later from another thread.
+        """
+        if self._write_failed:
+            # Some changes may have been lost by the write that failed,
+            # so the state and all the frames are written again.
+            self._old_state = None
+            self._fingerprints.clear()
+        writes = []
+
+        if self._current is not None and self._old_state != self._current:
+            if self.is_started:
+                current = {
+                    'project': self.current['project'],
+                    'start': self._format_date(self.current['start']),
+                    'tags': self.current['tags'],
+                    'message': self.current.get('message'),
+                }
+            else:
+                current = {}
+            self._queue_json_write(writes, self.state_file, current)
+            self._old_state = current
+
+        if self._frames is not None and (
+                self._frames.changed or self._write_failed):
+            changes = self._frames.pop_changes()
+            self._track_changes(changes)
+            if self._write_failed:
+                changes = []
+            if self.store is not None:
+                since = (self._frames.shards_since if
+                         isinstance(self._frames, ShardedFrames) else None)
+                writes.append((self._write_store, changes,
+                               None if changes else self._frames.dump(),
+                               since))
+            elif (changes and os.path.exists(self.frames_file) and
+                    not self.journal.is_full(len(changes))):
+                # Only the changes are appended to the journal instead
+                # of rewriting the whole frames file.
+                writes.append((self.journal.append, changes))
+            else:
+                writes.append((self._write_frames_file,
+                               *self._dump_frames_file()))
+            self._frames.clear_changes()
+        self._write_failed = False
+
+        # The other files are only written if their content changed.
+        if self._config_changed:
+            config = io.StringIO()
+            self.config.write(config)
+            self._queue_write(writes, self.config_file, config.getvalue())
+
+        if self._last_sync is not None:
+            self._queue_json_write(writes, self.last_sync_file,
+                                   self._format_date(self.last_sync))
+
+        if self._projects is not None:
+            self._queue_json_write(writes, self.projects_file, self.projects)
+
+        if writes:
+            self._pending_writes.append(writes)
+
+    def write_pending(self):
+        """
+        Do the writes queued to save the client in the order they were
+        queued. This can be called from another thread than the one in
+        which the client is edited.
+        """
+        with self._write_lock:
+            while self._pending_writes:
+                writes = self._pending_writes.popleft()
+                try:
+                    if not os.path.isdir(self._dir):
+                        os.makedirs(self._dir)
+                    with self.data_lock:
+                        for write in writes:
+                            write[0](*write[1:])
+                except (OSError, sqlite3.Error) as e:
+                    # The writes queued after the one that failed are
+                    # dropped, since the next save rewrites everything.
+                    self._write_failed = True
+                    self._pending_writes.clear()
+                    if isinstance(e, OSError):
+                        filename = e.filename
+                    else:
+                        filename = self.store.filename
+                    raise WatsonError(
+                        "Impossible to write {}: {}".format(filename, e))
+
+    def _track_changes(self, changes):
+        """
+        Keep the ids of the frames that were inserted, edited or deleted
+        by the changes since the frames file was last synced.
+        """
+        with self._ids_lock:
+            for change in changes:
+                if change[0] == 'delete':
+                    self._changed_ids.discard(change[1])
+                    self._deleted_ids.add(change[1])
                 else:
-                    current = {}
+                    self._deleted_ids.discard(change[-1][3])
+                    self._changed_ids.add(change[-1][3])
 
-                safe_save(self.state_file, make_json_writer(lambda: current))
-                self._old_state = current
+    def _take_tracked_ids(self):
+        """
+        Return the ids of the frames changed and deleted since the frames
+        file was last synced and start tracking them anew, since they are
+        synced by the write of the frames file to which they are passed.
+        """
+        with self._ids_lock:
+            ids = (self._changed_ids, self._deleted_ids)
+            self._changed_ids = set()
+            self._deleted_ids = set()
+        return ids
 
-            if self._frames is not None and self._frames.changed:
-                safe_save(self.frames_file,
-                          make_json_writer(self.frames.dump))
+    def _restore_tracked_ids(self, ids):
+        """
+        Track again the ids of the frames changed and deleted that were
+        taken for a write of the frames file that failed, unless these
+        frames were changed or deleted again since then.
+        """
+        changed_ids, deleted_ids = ids
+        with self._ids_lock:
+            self._changed_ids, self._deleted_ids = (
+                self._changed_ids | (changed_ids - self._deleted_ids),
+                self._deleted_ids | (deleted_ids - self._changed_ids))
 
-            if self._config_changed:
-                safe_save(self.config_file, self.config.write)
+    def _queue_write(self, writes, filename, content):
+        """
+        Queue the write of the content to the file, unless the fingerprint
+        of the content is the same as that of the content last saved in
+        the file.
+        """
+        fingerprint = content_digest(content.encode('utf-8'))
+        if filename not in self._fingerprints:
+            try:
+                self._fingerprints[filename] = file_digest(filename)
+            except OSError:
+                self._fingerprints[filename] = None
+        if fingerprint != self._fingerprints[filename]:
+            self._fingerprints[filename] = fingerprint
+            writes.append((safe_save, filename, content))
+
+    def _queue_json_write(self, writes, filename, value):
+        """
+        Queue the write of the value to the file in the JSON format,
+        unless the file already contains the same value.
+        """
+        self._queue_write(writes, filename, json.dumps(
+            value, indent=1, ensure_ascii=False))
 
-            if self._last_sync is not None:
-                safe_save(self.last_sync_file,
-                          make_json_writer(self._format_date, self.last_sync))
+    def _write_store(self, changes, rows=None, since=None):
+        """
+        Apply the changes to the frames store or, if there is no changes,
+        replace all the frames of the store with the rows, or only those
+        of the months since the loaded month if the frames are sharded.
+        """
+        if changes:
+            self.store.apply(changes)
+        elif since is None:
+            self.store.replace_all(rows)
+        else:
+            self.store.replace_all(rows, since)
+        self._store_changed = True
 
-            if self._projects is not None:
-                safe_save(self.projects_file,
-                          make_json_writer(lambda: self.projects))
-        except OSError as e:
-            raise WatsonError(
-                "Impossible to write {}: {}".format(e.filename, e)
-            )
+    @property
+    def frames(self):
+        """
+        Override the Watson frames property to replay the changes recorded
+        in the frames journal on top of the frames loaded from the file.
+        """
+        if self._frames is None:
+            self._frames = self._load_frames()
+        return self._frames
+
+    def _load_frames(self):
+        """
+        Load the frames from the frames store or from the frames file and
+        its journal and return them.
+        """
+        # The frames are not loaded while the writes queued by the
+        # write-behind saver are being done.
+        with self._write_lock:
+            if self.store is not None:
+                if not self.store.is_synced_with(self.frames_file):
+                    # The frames file was changed outside of QWatson, by
+                    # the Watson CLI for example, since it was last
+                    # exported, so its frames are merged with the store.
+                    self.store.import_frames_file(self.frames_file)
+                with gc_paused():
+                    if isinstance(self.store, ShardedFramesStore):
+                        frames = ShardedFrames(
+                            self.store, self.store.startup_month(time.time()))
+                    else:
+                        frames = Frames(self.store.load())
+            else:
+                with gc_paused():
+                    # The frames are loaded from the snapshot of the
+                    # frames file, unless the file was changed since the
+                    # snapshot was made, by the Watson CLI for example.
+                    snapshot = self.snapshot.load(self.frames_file)
+                    if snapshot is None:
+                        frames = Frames(self._load_json_file(
+                            self.frames_file, type=list))
+                        if os.path.exists(self.frames_file):
+                            self._save_snapshot(frames.dump(),
+                                                frames.get_date_indexes())
+                    else:
+                        frames = Frames(frames_from_dumps(snapshot[0]))
+                        if snapshot[1] is not None:
+                            frames.set_date_indexes(snapshot[1])
+                records = self.journal.read()
+                if records:
+                    replay_journal(frames, records)
+                    frames.clear_changes()
+                # The changes saved in the journal are not in the frames
+                # file.
+                self._take_tracked_ids()
+                self._track_changes(records)
+            if self.archive.exists():
+                frames.set_archive(self.archive)
+            self._update_frames_file_signature()
+        return frames
+
+    @frames.setter
+    def frames(self, frames):
+        self._frames = Frames(frames)
 
     @property
     def current(self):
@@ -231,6 +1378,160 @@ class Watson(watson.watson.Watson):
 
     # ---- Watson frames extension
 
+    def _write_frames_file(self, rows, indexes=None, changes=None):
+        """
+        Write the rows of the frames to the frames file and clear the
+        journal, since all the changes it contains are now saved in the
+        file. The snapshot of the frames is updated accordingly.
+
+        If the frames file or its journal was changed by another process
+        since they were last loaded or written, the rows are first merged
+        with the frames saved in them, using the ids of the frames changed
+        and deleted by the client since then, which are passed as a tuple
+        with changes. The frames must then be reloaded to include the
+        frames merged from the file. These ids are tracked again by the
+        client if the frames file cannot be written.
+        """
+        try:
+            with self.data_lock:
+                if (self.frames_file_changed() or
+                        self.journal.changed_elsewhere()):
+                    disk_rows = self._read_saved_frames()
+                else:
+                    disk_rows = None
+                if disk_rows is not None:
+                    changed_ids, deleted_ids = changes or (None, ())
+                    rows = merge_frames(
+                        rows, disk_rows, changed_ids, deleted_ids)
+                    indexes = None
+                safe_save(self.frames_file, make_json_writer(lambda: rows))
+                if disk_rows is None:
+                    # The signature is kept as is when the rows were merged,
+                    # so that the frames are reloaded.
+                    self._update_frames_file_signature()
+                self.journal.clear()
+                self._save_snapshot(rows, indexes)
+        except Exception:
+            if changes is not None:
+                self._restore_tracked_ids(changes)
+            raise
+
+    def _read_saved_frames(self):
+        """
+        Return the rows of the frames saved in the frames file with the
+        changes of the journal, or None if the frames file is missing or
+        cannot be read.
+        """
+        try:
+            with open(self.frames_file) as f:
+                frames = Frames(json.load(f))
+        except (IOError, ValueError):
+            return None
+        replay_journal(frames, self.journal.read())
+        return list(frames.dump())
+
+    def _dump_frames_file(self):
+        """
+        Return the rows of the frames to save in the frames file, which do
+        not include the archived frames, with their date indexes if these
+        can be reused as is and the ids of the frames changed and deleted
+        since the frames file was last synced, which are taken from the
+        client.
+        """
+        frames = self._frames
+        return (frames.dump(), None if frames.has_archived_frames() else
+                frames.get_date_indexes(), self._take_tracked_ids())
+
+    def _save_snapshot(self, rows, indexes=None):
+        """
+        Save a snapshot of the rows of the frames as they are saved in the
+        frames file.
+        """
+        try:
+            self.snapshot.save(self.frames_file, rows, indexes)
+        except (OSError, ValueError):
+            # The snapshot is only a cache of the frames file.
+            self.snapshot.clear()
+
+    def _update_frames_file_signature(self):
+        """
+        Keep the signature of the frames file as it was last loaded or
+        written by the client.
+        """
+        with self._write_lock:
+            try:
+                self._frames_file_signature = file_signature(self.frames_file)
+            except OSError:
+                self._frames_file_signature = None
+
+    def frames_file_changed(self):
+        """
+        Return whether the frames file was changed outside of the client
+        since the frames were last loaded or written.
+        """
+        with self._write_lock:
+            try:
+                signature = file_signature(self.frames_file)
+            except OSError:
+                signature = None
+            return signature != self._frames_file_signature
+
+    def reload_frames(self):
+        """
+        Load the frames again if the frames file was changed outside of
+        the client, by the Watson CLI or a sync for example, and return
+        them, or None if the file did not change. The changes made to the
+        loaded frames are saved first.
+
+        The loaded frames are not replaced, so that only the differences
+        with the new frames can be applied to them. The new frames include
+        at least all the months and archived years that are loaded.
+        """
+        if self._frames is None or not self.frames_file_changed():
+            return None
+        old_frames = self._frames
+        with self._write_lock, self.data_lock:
+            # The changes that are not saved yet, and those that are queued
+            # or being written by the write-behind saver, are saved first
+            # so that they are included in the new frames.
+            if old_frames.changed:
+                self.queue_save()
+            self.write_pending()
+            frames = self._load_frames()
+        since = old_frames.loaded_since
+        frames.prepend_frames(*frames.fetch_since(
+            None if since is None else month_start(since)))
+        self._projects = None
+        return frames
+
+    def compact_journal(self):
+        """
+        Compact the changes saved in the journal into the frames file.
+
+        When the frames are saved in a SQLite database, the frames file is
+        instead updated from the database if needed, so that it can still
+        be read by the Watson CLI.
+        """
+        if self.store is not None:
+            if self._store_changed:
+                self.export_frames(self.frames_file)
+            return
+        if not self.journal.exists() and (
+                self._frames is None or not self._frames.changed):
+            return
+        try:
+            if not os.path.isdir(self._dir):
+                os.makedirs(self._dir)
+            self.frames
+            with self._write_lock, self.data_lock:
+                self.write_pending()
+                self._write_frames_file(*self._dump_frames_file())
+                self._frames.clear_changes()
+        except OSError as e:
+            raise WatsonError(
+                "Impossible to write {}: {}".format(e.filename, e)
+            )
+
     def insert(self, index, project, start, stop, tags=None, id=None,
                updated_at=None, message=None):
         """
@@ -241,6 +1542,106 @@ class Watson(watson.watson.Watson):
                                    updated_at, message)
         return frame
 
+    def export_frames(self, filename):
+        """Export all the frames to a file in the JSON format of Watson."""
+        try:
+            if self.store is not None:
+                with self._write_lock, self.data_lock:
+                    self.save()
+                    merged = (filename == self.frames_file and
+                              self._merge_frames_file_in_store())
+                    self.store.export_frames_file(filename)
+                    if filename == self.frames_file:
+                        if not merged:
+                            self._update_frames_file_signature()
+                        self._store_changed = False
+            else:
+                self.load_frames_since()
+                safe_save(filename, make_json_writer(
+                    self.frames.dump, archived=True))
+        except OSError as e:
+            raise WatsonError(
+                "Impossible to write {}: {}".format(e.filename, e)
+            )
+
+    def _merge_frames_file_in_store(self):
+        """
+        Merge the frames of the frames file in the store if the file was
+        changed by another process since it was last loaded or exported,
+        so that these frames are not overwritten when the store is
+        exported. Return whether the frames were merged, in which case
+        they must be reloaded.
+        """
+        if not self.frames_file_changed() or self.store.is_synced_with(
+                self.frames_file):
+            return False
+        try:
+            self.store.import_frames_file(self.frames_file)
+        except ValueError:
+            return False
+        return True
+
+    def import_frames(self, filename):
+        """
+        Replace all the frames by those saved in a file in the JSON format
+        of Watson.
+        """
+        self.frames = self._load_json_file(filename, type=list)
+        if self.archive.exists():
+            self._frames.set_archive(self.archive)
+        self._frames.changed = True
+        self._projects = None
+        self.save()
+
+    def load_frames_since(self, date=None):
+        """
+        Load the frames that started since date, or all the frames if date
+        is None, that are not loaded yet and return their number.
+        """
+        frames, loaded_since = self.frames.fetch_since(date)
+        self.frames.prepend_frames(frames, loaded_since)
+        return len(frames)
+
+    def archive_frames(self, year=None):
+        """
+        Move the frames of the years before year, or before the previous
+        year if year is None, from the saved frames to the archive and
+        return their number. The archived frames stay loaded, but they
+        cannot be edited anymore.
+        """
+        until = '%04d' % (arrow.now().year - 1 if year is None else year)
+        frames = self.frames
+        if isinstance(frames, ShardedFrames) and (
+                frames.shards_since is not None and
+                self.store.months()[0] < until):
+            self.load_frames_since()
+
+        def rows_to_archive():
+            return [row for row, frame in enumerate(frames) if
+                    year_key(frame.start_timestamp) < until and
+                    not frames.is_archived(frame)]
+        rows = rows_to_archive()
+        if set(year_key(frames[row].start_timestamp) for row in rows) & set(
+                frames.unloaded_years()):
+            # The frames already archived in these years must be loaded,
+            # since they are written again with the new ones.
+            self.load_frames_since()
+            rows = rows_to_archive()
+        if not rows:
+            return 0
+
+        if frames.archive is None:
+            frames.set_archive(self.archive)
+        try:
+            with self._write_lock:
+                self.archive.add_rows([frames[row].dump() for row in rows])
+        except OSError as e:
+            raise WatsonError(
+                "Impossible to write {}: {}".format(e.filename, e))
+        frames.archive_rows(rows)
+        self.save()
+        return len(rows)
+
     # ---- Watson project extension
 
     @property
@@ -248,43 +1649,98 @@ class Watson(watson.watson.Watson):
         """
         Get or set the list of all the existing projects. The project list
         are returned sorted by name.
+
+        The list is built only once from the project index of the frames
+        and the projects file, and is then kept sorted when projects are
+        added, renamed or deleted.
         """
         if self._projects is None:
             self._projects = sorted(set(
-                [''] + list(self.frames['project']) +
+                [''] + list(self.frames.project_counts) +
                 self._load_json_file(self.projects_file, type=list)
                 ))
-        else:
-            self._projects = sorted(set([''] + self._projects))
-
         return self._projects
 
     @projects.setter
     def projects(self, projects):
-        self._projects = sorted(set(projects))
+        self._projects = sorted(set([''] + list(projects)))
+
+    def has_project(self, project):
+        """Return whether the project exists."""
+        i = bisect_left(self.projects, project)
+        return i < len(self._projects) and self._projects[i] == project
+
+    def _insert_project(self, project):
+        """Insert the project in the sorted list of projects."""
+        if not self.has_project(project):
+            self._projects.insert(bisect_left(self._projects, project),
+                                  project)
+
+    def _remove_project(self, project):
+        """
+        Remove the project from the sorted list of projects, except for the
+        empty project, which always exists.
+        """
+        if project and self.has_project(project):
+            del self._projects[bisect_left(self._projects, project)]
+
+    @property
+    def tags(self):
+        """
+        Override Watson property to return the sorted list of the tags from
+        the tag index of the frames instead of scanning all the frames.
+        """
+        frames = self.frames
+        if self._tags is None or self._tags[:2] != (frames, frames.version):
+            self._tags = (frames, frames.version, sorted(frames.tag_counts))
+        return self._tags[2]
+
+    @property
+    def rollups(self):
+        """
+        Return the daily duration rollups of the frames, which answer the
+        total time spent on all the frames, a project or a tag between two
+        dates and its breakdown by project or tag.
+        """
+        return self.frames.rollups
 
     def add_project(self, project):
         """Add project to the database."""
-        if project in self.projects:
+        if self.has_project(project):
             raise ValueError('Project "%s" already exist' % project)
-        self._projects.append(str(project))
+        self._insert_project(str(project))
         self.save()
 
     def rename_project(self, old_name, new_name):
-        """Extend Watson method."""
-        super(Watson, self).rename_project(old_name, new_name)
-        self._projects.remove(old_name)
-        self._projects.append(new_name)
+        """
+        Override Watson method to rename the project of all the affected
+        frames in a single pass and save the frames only once. The frames
+        are merged with those of new_name if it already exists.
+        """
+        if not self.has_project(old_name):
+            raise ValueError('Project "%s" does not exist' % old_name)
+
+        self.load_frames_since()
+        updated_at = arrow.utcnow()
+        self.frames.replace_rows({
+            row: self.frames[row]._replace(
+                project=new_name, updated_at=updated_at)
+            for row in self.frames.rows_for_project(old_name)})
+        with self._write_lock:
+            self.archive.rename_project(old_name, new_name)
+
+        self._remove_project(old_name)
+        self._insert_project(new_name)
         self.save()
 
     def delete_project(self, project):
         """Delete the project and all related frames."""
-        if project not in self.projects:
+        if not self.has_project(project):
             raise ValueError('Project "%s" does not exist' % project)
 
-        for frame in reversed(self.frames):
-            if frame.project == project:
-                del self.frames[frame.id]
-
-        self._projects.remove(project)
+        self.load_frames_since()
+        self.frames.delete_rows(self.frames.rows_for_project(project))
+        with self._write_lock:
+            self.archive.delete_project(project)
+        self._remove_project(project)
         self.save()
@@ -46,7 +46,15 @@ def edit_frame_at(client, index, start=None, stop=None, project=None,
 
 def get_frame_nbr_for_project(client, project):
     """Return the number of activities associated with a given project."""
-    return len(list(client.frames.filter(projects=[project])))
+    return client.frames.project_counts.get(project, 0)
+
+
+def get_duration_for_project(client, project):
+    """
+    Return the total duration in seconds of the activities associated
+    with a given project.
+    """
+    return client.frames.project_durations.get(project, 0)
 
 
 def round_frame_at(client, index, base):
@@ -64,13 +72,7 @@ def find_where_to_insert_new_frame(client, new_start, where='above'):
     Return the frame index where to insert a new frame according to its
     start datetime.
     """
-    for i, frame in enumerate(client.frames):
-        if where == 'above' and new_start <= frame.start:
-            return i
-        elif where == 'below' and new_start < frame.stop:
-            return i
-    else:
-        return len(client.frames)
+    return client.frames.row_for_start(new_start, where)
 
 
 def reset_watson(client):
@@ -85,3 +87,4 @@ def reset_watson(client):
     client._last_sync = None
     client._config = None
     client._config_changed = False
+    client._fingerprints.clear()
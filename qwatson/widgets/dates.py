@@ -19,7 +19,7 @@ import arrow
 # Migrate to PySide6
 
 from PySide6.QtCore import Signal as QSignal
-from PySide6.QtWidgets import QApplication, QLabel
+from PySide6.QtWidgets import QApplication, QComboBox, QLabel
 
 # ---- Local imports
 
@@ -29,14 +29,19 @@ from qwatson.widgets.toolbar import QToolButtonBase, ToolBarWidget
 
 
 class DateRangeNavigator(ToolBarWidget):
-    """A widget to navigate date spans."""
+    """
+    A widget to navigate date spans of a day, a week, a month, a quarter,
+    a year or of an arbitrary number of days.
+    """
 
     sig_date_span_changed = QSignal(tuple)
+    SPAN_FRAMES = ['day', 'week', 'month', 'quarter', 'year']
 
-    def __init__(self, icon_size='small', parent=None):
+    def __init__(self, icon_size='small', parent=None, span_frame='week'):
         super(DateRangeNavigator, self).__init__(parent)
 
-        self.home = arrow.now().floor('week').span('week')
+        self.span_frame = span_frame
+        self.home = arrow.now().floor(span_frame).span(span_frame)
         self.current = self.home
 
         self.setup(icon_size)
@@ -53,8 +58,17 @@ class DateRangeNavigator(ToolBarWidget):
         self.btn_prev = QToolButtonBase('go-previous')
         self.btn_prev.clicked.connect(self.go_previous_range)
 
+        self.span_frame_cbox = QComboBox()
+        self.span_frame_cbox.addItems(
+            [frame.title() for frame in self.SPAN_FRAMES])
+        self.span_frame_cbox.setCurrentIndex(
+            self.SPAN_FRAMES.index(self.span_frame))
+        self.span_frame_cbox.activated.connect(
+            lambda index: self.set_span_frame(self.SPAN_FRAMES[index]))
+
         # setup the layout
 
+        self.addWidget(self.span_frame_cbox)
         self.addWidget(self.btn_prev)
         self.addWidget(self.btn_next)
         self.addWidget(self.btn_home)
@@ -68,26 +82,69 @@ class DateRangeNavigator(ToolBarWidget):
         self.btn_prev.setIconSize(icons.get_iconsize(icon_size))
         self.btn_next.setIconSize(icons.get_iconsize(icon_size))
 
+    def set_span_frame(self, span_frame):
+        """
+        Set the frame of the date spans, either 'day', 'week', 'month',
+        'quarter' or 'year', and go to the span encompassing the
+        present day.
+        """
+        if span_frame != self.span_frame:
+            self.span_frame = span_frame
+            self.span_frame_cbox.setCurrentIndex(
+                self.SPAN_FRAMES.index(span_frame))
+            self.home = arrow.now().floor(span_frame).span(span_frame)
+            self.set_current(self.home)
+
+    def set_custom_span(self, date_span):
+        """
+        Set the current date span to an arbitrary range of days. The
+        previous and next ranges are then shifted by the same number
+        of days.
+        """
+        self.span_frame = None
+        self.span_frame_cbox.setCurrentIndex(-1)
+        self.set_current((date_span[0].floor('day'),
+                          date_span[1].ceil('day')))
+
+    def get_shifted_range(self, step):
+        """Return the date span that is step ranges away from the current."""
+        if self.span_frame is None:
+            ndays = (self.current[1].floor('day') -
+                     self.current[0].floor('day')).days + 1
+            return (self.current[0].shift(days=step * ndays),
+                    self.current[1].shift(days=step * ndays))
+        return self.current[0].shift(
+            **{self.span_frame + 's': step}).span(self.span_frame)
+
+    def get_adjacent_ranges(self):
+        """
+        Return the list of the date spans directly before and after the
+        current one that can be navigated to.
+        """
+        spans = [self.get_shifted_range(-1)]
+        if self.btn_next.isEnabled():
+            spans.append(self.get_shifted_range(1))
+        return spans
+
     def go_next_range(self):
         """Go forward one date range step."""
-        self.current = (self.current[0].shift(weeks=1),
-                        self.current[1].shift(weeks=1))
-        self.setup_date_range_label()
-        self.btn_next.setEnabled(self.current != self.home)
-        self.sig_date_span_changed.emit(self.current)
+        self.set_current(self.get_shifted_range(1))
 
     def go_previous_range(self):
         """Go back one date range step."""
-        self.current = (self.current[0].shift(weeks=-1),
-                        self.current[1].shift(weeks=-1))
-        self.setup_date_range_label()
-        self.btn_next.setEnabled(self.current != self.home)
-        self.sig_date_span_changed.emit(self.current)
+        self.set_current(self.get_shifted_range(-1))
 
     def go_home(self):
         """Go back to the range encompassing the present day."""
-        self.current = self.home
-        self.btn_next.setEnabled(False)
+        if self.span_frame is None:
+            self.set_span_frame('week')
+        else:
+            self.set_current(self.home)
+
+    def set_current(self, date_span):
+        """Set the current date span and emit a signal."""
+        self.current = date_span
+        self.btn_next.setEnabled(self.current[1] < arrow.now())
         self.setup_date_range_label()
         self.sig_date_span_changed.emit(self.current)
 
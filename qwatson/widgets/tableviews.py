@@ -25,7 +25,7 @@ import arrow
 # Migrate to PySide6
 
 from PySide6.QtCore import Signal as QSignal
-from PySide6.QtCore import Qt, QPoint
+from PySide6.QtCore import Qt, QPoint, QTimer
 from PySide6.QtWidgets import QApplication, QGridLayout, QHeaderView, QLabel, QMessageBox, QScrollArea, QTableView, QHBoxLayout, QVBoxLayout, QWidget, QFrame, QAbstractItemView
 from PySide6.QtGui import QCursor
 
@@ -39,24 +39,36 @@ from qwatson.widgets.layout import ColoredFrame
 from qwatson.widgets.toolbar import QToolButtonBase, ToolBarWidget
 from qwatson.widgets.dates import DateRangeNavigator
 from qwatson.widgets.filters import FilterButton
-from qwatson.models.tablemodels import WatsonSortFilterProxyModel
+from qwatson.models.tablemodels import (
+    WatsonDayProxyModel, WatsonSpanProxyModel)
 from qwatson.models.delegates import (
     BaseDelegate, ToolButtonDelegate, ComboBoxDelegate, LineEditDelegate,
     DateTimeDelegate, TagEditDelegate)
 
 
 class ActivityOverviewWidget(QWidget):
-    """A widget to show and edit activities logged with Watson."""
+    """
+    A widget to show and edit activities logged with Watson.
+
+    The activities of date spans of up to a week are shown in a stack of
+    day tables, while those of longer date spans are shown in a single
+    virtualized table, unless span_view is True, in which case the single
+    table is always used.
+    """
+    MAX_MULTI_TABLE_DAYS = 7
     sig_add_activity = QSignal(int, arrow.Arrow, arrow.Arrow)
     sig_del_activity = QSignal(int)
     sig_load_settings = QSignal(object)
 
-    def __init__(self, model, parent=None):
+    def __init__(self, model, parent=None, span_view=False):
         super(ActivityOverviewWidget, self).__init__(parent)
         self.setWindowIcon(icons.get_icon('master'))
         self.setWindowTitle("Activity Overview")
 
         self.model = model
+        self.span_view = span_view
+        self.project_filters = None
+        self.tag_filters = None
         self.model.sig_btn_delrow_clicked.connect(self.del_activity)
 
         self.setup(model)
@@ -66,14 +78,24 @@ class ActivityOverviewWidget(QWidget):
 
     def setup(self, model):
         """Setup the widget with the provided arguments."""
-        self.table_widg = WatsonMultiTableWidget(model, parent=self)
+        self.multi_table_widg = None
+        self.span_table_widg = None
         self.toolbar = self.setup_toolbar()
 
+        # The adjacent date spans are prefetched once the event loop is
+        # idle, so that stepping through the date spans is fast.
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(0)
+        self.prefetch_timer.timeout.connect(self.prefetch_adjacent_spans)
+
         # ---- Setup the layout
 
         layout = QGridLayout(self)
-        layout.addWidget(self.toolbar)
-        layout.addWidget(self.table_widg)
+        layout.addWidget(self.toolbar, 0, 0)
+
+        self.table_widg = self.get_table_widget(self.date_range_nav.current)
+        self.table_widg.show()
 
     def setup_toolbar(self):
         """Setup the toolbar of the widget."""
@@ -114,9 +136,9 @@ class ActivityOverviewWidget(QWidget):
             "Set filters to show activities only for selected "
             "tags and projects in the overview table.")
         self.filter_btn.sig_projects_checkstate_changed.connect(
-            self.table_widg.set_project_filters)
+            self.set_project_filters)
         self.filter_btn.sig_tags_checkstate_changed.connect(
-            self.table_widg.set_tag_filters)
+            self.set_tag_filters)
 
         # Setup the layout.
 
@@ -132,14 +154,66 @@ class ActivityOverviewWidget(QWidget):
 
         return toolbar
 
+    def get_table_widget(self, date_span):
+        """
+        Return the table widget to use to show the activities of the date
+        span and create it if needed.
+        """
+        ndays = ceil(round(
+            (date_span[1] - date_span[0]).total_seconds()) / (60*60*24))
+        if self.span_view or ndays > self.MAX_MULTI_TABLE_DAYS:
+            if self.span_table_widg is None:
+                self.span_table_widg = WatsonSpanTableWidget(
+                    self.model, date_span, parent=self)
+                self.layout().addWidget(self.span_table_widg, 1, 0)
+            return self.span_table_widg
+        else:
+            if self.multi_table_widg is None:
+                self.multi_table_widg = WatsonMultiTableWidget(
+                    self.model, date_span, parent=self)
+                self.layout().addWidget(self.multi_table_widg, 1, 0)
+            return self.multi_table_widg
+
+    def set_project_filters(self, project_filters):
+        """Set the project filters of the table widget."""
+        self.project_filters = project_filters
+        self.table_widg.set_project_filters(project_filters)
+
+    def set_tag_filters(self, tag_filters):
+        """Set the tag filters of the table widget."""
+        self.tag_filters = tag_filters
+        self.table_widg.set_tag_filters(tag_filters)
+
     def date_span_changed(self):
         """Handle when the range of the date range navigator widget change."""
-        self.table_widg.set_date_span(self.date_range_nav.current)
+        date_span = self.date_range_nav.current
+        # The frames of the date span are loaded first if the frames are
+        # sharded by month and the span is before the loaded months.
+        self.model.load_frames_since(date_span[0])
+        table_widg = self.get_table_widget(date_span)
+        if table_widg is not self.table_widg:
+            self.table_widg.clear_focused_table()
+            self.table_widg.hide()
+            self.table_widg = table_widg
+            self.table_widg.set_project_filters(self.project_filters)
+            self.table_widg.set_tag_filters(self.tag_filters)
+            self.table_widg.show()
+        self.table_widg.set_date_span(date_span)
+        self.prefetch_timer.start()
+
+    def prefetch_adjacent_spans(self):
+        """
+        Precompute the rows and time counts of the date spans directly
+        before and after the current one.
+        """
+        for date_span in self.date_range_nav.get_adjacent_ranges():
+            self.model.load_frames_since(date_span[0])
+            self.get_table_widget(date_span).prefetch(date_span)
 
     def show(self):
         """Qt method override to restore the window when minimized."""
-        self.table_widg.scrollarea.widget().hide()
-        # We show and hide the table_widg scrollarea to avoid flickering.
+        self.table_widg.content_widget().hide()
+        # We show and hide the table_widg content to avoid flickering.
 
         self.setWindowState(
             (self.windowState() & ~(Qt.WindowMinimized | Qt.WindowFullScreen))
@@ -155,8 +229,8 @@ class ActivityOverviewWidget(QWidget):
         self.raise_()
         self.setFocus()
 
-        self.table_widg.scrollarea.widget().show()
-        # We show and hide the table_widg scrollarea to avoid flickering.
+        self.table_widg.content_widget().show()
+        # We show and hide the table_widg content to avoid flickering.
 
     def add_new_activity(self, where):
         """
@@ -255,12 +329,17 @@ class WatsonMultiTableWidget(QFrame):
 
         return self.total_time_labl
 
+    def content_widget(self):
+        """Return the widget that holds the tables of the timespan."""
+        return self.scrollarea.widget()
+
     def set_project_filters(self, project_filters):
         """Set the project filters for all the table widgets."""
         self.scrollarea.widget().hide()
         for i, table in enumerate(self.tables):
             table.set_project_filters(project_filters)
         self.scrollarea.widget().show()
+        self.setup_time_total()
 
     def set_tag_filters(self, tag_filters):
         """Set the tag filters for all the table widgets."""
@@ -268,6 +347,7 @@ class WatsonMultiTableWidget(QFrame):
         for i, table in enumerate(self.tables):
             table.set_tag_filters(tag_filters)
         self.scrollarea.widget().show()
+        self.setup_time_total()
 
     def set_date_span(self, date_span):
         """
@@ -287,9 +367,9 @@ class WatsonMultiTableWidget(QFrame):
                     self.tableview_focused_in)
                 self.scene.insertWidget(self.scene.count()-1, self.tables[-1])
             else:
-                self.tables.remove(self.tables[-1])
-                self.scene.removeWidget(self.tables[-1])
-                self.tables[-1].deleteLater()
+                table = self.tables.pop(-1)
+                self.scene.removeWidget(table)
+                table.deleteLater()
 
         # We hide the scrollbar widget while the tables are updated
         # to avoid flickering.
@@ -299,13 +379,36 @@ class WatsonMultiTableWidget(QFrame):
             table.set_date_span(
                 (base_span[0].shift(days=i), base_span[1].shift(days=i)))
         self.scrollarea.widget().show()
+        self.setup_time_total()
 
-    def setup_time_total(self, delta_seconds):
+    def prefetch(self, date_span):
         """
-        Setup the total amount of time for all the activities listed
-        for the date span.
+        Compute and cache the rows and time counts of each day of the
+        date span, so that it can be shown quickly afterwards.
         """
-        self.total_seconds = self.total_seconds + delta_seconds
+        ndays = ceil(round(
+            (date_span[1] - date_span[0]).total_seconds()) / (60*60*24))
+        base_span = date_span[0].span('day')
+        proxy_model = self.tables[0].view.proxy_model
+        self.model.day_buckets.prefetch(
+            [(base_span[0].shift(days=i), base_span[1].shift(days=i)) for
+             i in range(ndays)],
+            proxy_model.project_filters, proxy_model.tag_filters)
+
+    def setup_time_total(self, delta_seconds=None):
+        """
+        Setup the total amount of time for all the activities listed
+        for the date span, from the duration rollups of the client when
+        possible or else from the time counts of the tables.
+        """
+        proxy_model = self.tables[0].view.proxy_model
+        total_seconds = self.model.get_total_seconds(
+            self.date_span, proxy_model.project_filters,
+            proxy_model.tag_filters)
+        if total_seconds is None:
+            total_seconds = sum(table.view.proxy_model.total_seconds or 0
+                                for table in self.tables)
+        self.total_seconds = total_seconds
         self.total_time_labl.setText(
             "Total : %s" % total_seconds_to_hour_min(self.total_seconds))
 
@@ -474,6 +577,122 @@ class WatsonTableWidget(QWidget):
         return self.view.get_selected_frame_index()
 
 
+class WatsonSpanTableWidget(QFrame):
+    """
+    A widget that displays Watson activities of a given timespan in a single
+    virtualized table view, where the activities of each day are preceded
+    by a header row that shows the date and the time count of the day.
+    Only the visible rows are painted, so that long timespans can be shown.
+    """
+
+    def __init__(self, model, date_span=arrow.now().floor('week').span('week'),
+                 parent=None):
+        super(WatsonSpanTableWidget, self).__init__(parent)
+
+        self.total_seconds = 0
+        self.model = model
+        self.last_focused_table = None
+
+        self.view = WatsonSpanTableView(model)
+        self.view.proxy_model.sig_total_seconds_changed.connect(
+            self.setup_time_total)
+
+        self.total_time_labl = QLabel()
+        self.total_time_labl.setAlignment(Qt.AlignRight)
+        font = self.total_time_labl.font()
+        font.setBold(True)
+        self.total_time_labl.setFont(font)
+
+        layout = QGridLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(3)
+        layout.addWidget(self.view, 0, 0)
+        layout.addWidget(self.total_time_labl, 1, 0)
+
+        self.set_date_span(date_span)
+
+    @property
+    def date_span(self):
+        """Return the arrow span of the proxy model."""
+        return self.view.proxy_model.date_span
+
+    def content_widget(self):
+        """Return the widget that holds the activities of the timespan."""
+        return self.view
+
+    def set_date_span(self, date_span):
+        """Set the range over which activities are displayed in the widget."""
+        self.clear_focused_table()
+        self.view.set_date_span(date_span)
+
+    def set_project_filters(self, project_filters):
+        """Set the project filters of the table."""
+        self.view.set_project_filters(project_filters)
+
+    def set_tag_filters(self, tag_filters):
+        """Set the tag filters of the table."""
+        self.view.set_tag_filters(tag_filters)
+
+    def prefetch(self, date_span):
+        """
+        Compute and cache the rows and time counts of the date span, so
+        that it can be shown quickly afterwards.
+        """
+        proxy_model = self.view.proxy_model
+        self.model.day_buckets.prefetch(
+            [date_span], proxy_model.project_filters, proxy_model.tag_filters)
+
+    def setup_time_total(self, total_seconds):
+        """
+        Setup the total amount of time for all the activities listed
+        for the date span.
+        """
+        self.total_seconds = total_seconds
+        self.total_time_labl.setText(
+            "Total : %s" % total_seconds_to_hour_min(self.total_seconds))
+
+    def get_row_count(self):
+        """Return a list with the number of activities shown for each day."""
+        return self.view.proxy_model.get_day_row_counts()
+
+    def clear_focused_table(self):
+        """Clear the selection of the table."""
+        self.view.clearSelection()
+
+    def selectedFrame(self):
+        """
+        Return the index of the frame corresponding to the selected row
+        in the table if any or else return None.
+        """
+        return self.view.get_selected_frame_index()
+
+    def get_new_activity_index_and_time(self, where='above'):
+        """
+        Get the index and datetime of the activity that is to be added to
+        Watson's frames.
+        The new activity is added above or below the selected activity if
+        there is one. Otherwise, the activity is added at the beginning of
+        the first day of the date span if where is 'above' and to the
+        beginning of the last day of the date span if where is 'below'.
+        """
+        frame_index = self.view.get_selected_frame_index()
+        if frame_index is not None:
+            if where == 'above':
+                insert_time = self.model.client.frames[frame_index].start
+            elif where == 'below':
+                insert_time = self.model.client.frames[frame_index].stop
+                frame_index += 1
+        else:
+            if where == 'above':
+                insert_time = self.date_span[0]
+            else:
+                insert_time = self.date_span[1].floor('day')
+            frame_index = find_where_to_insert_new_frame(
+                self.model.client, insert_time, 'above')
+
+        return frame_index, insert_time
+
+
 # ---- TableView
 
 class BasicWatsonTableView(QTableView):
@@ -481,13 +700,19 @@ class BasicWatsonTableView(QTableView):
     A single table view that displays Watson activity log and
     allow sorting and filtering of the data through the use of a proxy model.
     """
+    sig_focused_in = QSignal(object)
+    _hovered_row = None
+    is_selected = True
 
-    def __init__(self, source_model, parent=None):
+    def __init__(self, source_model, parent=None, proxy_model=None):
         super(BasicWatsonTableView, self).__init__(parent)
         self.setSortingEnabled(False)
 
-        self.proxy_model = WatsonSortFilterProxyModel(source_model)
+        self.proxy_model = (WatsonDayProxyModel(source_model) if
+                            proxy_model is None else proxy_model)
         self.setModel(self.proxy_model)
+        self.setMouseTracking(True)
+        self.entered.connect(self.itemEnterEvent)
 
         # ---- Setup the delegates
 
@@ -531,20 +756,63 @@ class BasicWatsonTableView(QTableView):
         self.sig_focused_in.emit(self)
         super(BasicWatsonTableView, self).focusInEvent(event)
 
+    # ---- Row selection
+
+    def set_selected(self, value):
+        self.is_selected = bool(value)
+        self.viewport().update()
+
+    def get_selected_row(self):
+        """
+        Return the index of the selected row if there is one and return
+        None otherwise.
+        """
+        selected_rows = self.selectionModel().selectedRows()
+        if self.is_selected and len(selected_rows) > 0:
+            return selected_rows[0].row()
+        else:
+            return None
+
+    def get_selected_frame_index(self):
+        """
+        Return the index of the frame corresponding to the selected row if
+        there is one, else return None.
+        """
+        if self.is_selected:
+            selected_row = self.selectionModel().selectedRows()
+            if len(selected_row) > 0:
+                return self.proxy_model.mapToSource(selected_row[0]).row()
+        return None
+
+    # ---- Mouse hovered
+
+    def set_hovered_row(self, row):
+        if self._hovered_row != row:
+            self._hovered_row = row
+            self.viewport().update()
+
+    def itemEnterEvent(self, index):
+        self.set_hovered_row(index.row())
+
+    def leaveEvent(self, event):
+        super(BasicWatsonTableView, self).leaveEvent(event)
+        self.set_hovered_row(None)
+
+    def focusOutEvent(self, event):
+        super(BasicWatsonTableView, self).focusOutEvent(event)
+        self.set_hovered_row(None)
+
 
 class FormatedWatsonTableView(BasicWatsonTableView):
     """
     A BasicWatsonTableView formatted to look good when put in a scrollarea
     in a vertical stack of tables.
     """
-    sig_focused_in = QSignal(object)
-    _hovered_row = None
 
     def __init__(self, source_model, parent=None):
         super(FormatedWatsonTableView, self).__init__(source_model, parent)
         self.setup()
         self.update_table_height()
-        self.entered.connect(self.itemEnterEvent)
 
     def setup(self):
         """Setup the table view with the provided arguments."""
@@ -553,7 +821,6 @@ class FormatedWatsonTableView(BasicWatsonTableView):
         self.setFrameShape(QFrame.NoFrame)
         self.setWordWrap(False)
 
-        self.setMouseTracking(True)
         # self.setSelectionBehavior(self.SelectRows)
         self.setSelectionBehavior(QAbstractItemView.SelectRows)
         # self.setSelectionMode(self.SingleSelection)
@@ -605,51 +872,42 @@ class FormatedWatsonTableView(BasicWatsonTableView):
         super().set_tag_filters(tag_filters)
         self.update_table_height()
 
-    # ---- Row selection
 
-    def set_selected(self, value):
-        self.is_selected = bool(value)
-        self.viewport().update()
-
-    def get_selected_row(self):
-        """
-        Return the index of the selected row if there is one and return
-        None otherwise.
-        """
-        selected_rows = self.selectionModel().selectedRows()
-        if self.is_selected and len(selected_rows) > 0:
-            return selected_rows[0].row()
-        else:
-            return None
-
-    def get_selected_frame_index(self):
-        """
-        Return the index of the frame corresponding to the selected row if
-        there is one, else return None.
-        """
-        if self.is_selected:
-            selected_row = self.selectionModel().selectedRows()
-            if len(selected_row) > 0:
-                return self.proxy_model.mapToSource(selected_row[0]).row()
-        return None
-
-    # ---- Mouse hovered
+class WatsonSpanTableView(BasicWatsonTableView):
+    """
+    A BasicWatsonTableView that shows the activities of all the days of
+    a timespan with day header rows. All rows have the same height, so
+    that the view can lay out and paint only the rows that are visible.
+    """
 
-    def set_hovered_row(self, row):
-        if self._hovered_row != row:
-            self._hovered_row = row
-            self.viewport().update()
+    def __init__(self, source_model, parent=None):
+        super(WatsonSpanTableView, self).__init__(
+            source_model, parent, WatsonSpanProxyModel(source_model))
+        self.setAlternatingRowColors(False)
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setMinimumWidth(900)
+        self.setMinimumHeight(500)
 
-    def itemEnterEvent(self, index):
-        self.set_hovered_row(index.row())
+        self.horizontalHeader().hide()
+        self.verticalHeader().hide()
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
 
-    def leaveEvent(self, event):
-        super(FormatedWatsonTableView, self).leaveEvent(event)
-        self.set_hovered_row(None)
+        self.verticalScrollBar().valueChanged.connect(
+            self.srollbar_value_changed)
 
-    def focusOutEvent(self, event):
-        super(FormatedWatsonTableView, self).focusOutEvent(event)
-        self.set_hovered_row(None)
+    def srollbar_value_changed(self, value):
+        """
+        Handle when the value of the vertical scrollbar changes, so that
+        the mouse hovered highlighted row can be updated correctly.
+        """
+        mouse_pos = self.viewport().mapFromGlobal(QCursor.pos())
+        if self.viewport().rect().contains(mouse_pos):
+            self.set_hovered_row(self.rowAt(mouse_pos.y()))
+        else:
+            self.set_hovered_row(None)
 
 
 if __name__ == '__main__':
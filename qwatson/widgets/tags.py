@@ -13,13 +13,55 @@
 
 # Migrate to PySide6
 
-from PySide6.QtWidgets import QLineEdit
+from PySide6.QtCore import Qt, QStringListModel
+from PySide6.QtWidgets import QCompleter, QLineEdit
 
 
 class TagLineEdit(QLineEdit):
-    """A lineedit to show and edit tags."""
-    def __init__(self, parent=None):
+    """
+    A lineedit to show and edit tags. If a Watson client is provided, the
+    tag that is being typed is completed with the existing tags, sorted by
+    the number of frames in which they are used.
+    """
+    def __init__(self, parent=None, client=None):
         super(TagLineEdit, self).__init__(parent)
+        self.client = client
+        self._completer_version = None
+        if client is not None:
+            self.completer_model = QStringListModel(self)
+            self.tag_completer = QCompleter(self.completer_model, self)
+            self.tag_completer.setCaseSensitivity(Qt.CaseInsensitive)
+            self.tag_completer.setWidget(self)
+            self.tag_completer.activated.connect(self.insert_completion)
+            self.textEdited.connect(self.complete_tag)
+
+    def update_completer_model(self):
+        """Update the list of tags of the completer from the tag index."""
+        frames = self.client.frames
+        if self._completer_version != (frames, frames.version):
+            self._completer_version = (frames, frames.version)
+            counts = frames.tag_counts
+            self.completer_model.setStringList(
+                sorted(counts, key=lambda tag: (-counts[tag], tag)))
+
+    def complete_tag(self, text):
+        """Show the tags that start with the tag that is being typed."""
+        prefix = text[:self.cursorPosition()].split(',')[-1].strip()
+        if prefix:
+            self.update_completer_model()
+            self.tag_completer.setCompletionPrefix(prefix)
+            self.tag_completer.complete()
+        else:
+            self.tag_completer.popup().hide()
+
+    def insert_completion(self, tag):
+        """Replace the tag that is being typed with the completed tag."""
+        head = self.text()[:self.cursorPosition()].rsplit(',', 1)
+        tail = self.text()[self.cursorPosition():]
+        head[-1] = (' ' if len(head) > 1 else '') + tag
+        text = ','.join(head)
+        self.setText(text + tail)
+        self.setCursorPosition(len(text))
 
     @property
     def tags(self):